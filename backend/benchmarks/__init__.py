@@ -0,0 +1,3 @@
+"""
+Micro-benchmarks for hot paths: `python -m benchmarks --help`
+"""
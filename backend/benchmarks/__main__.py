@@ -0,0 +1,70 @@
+"""
+Benchmark suite
+
+    cd backend
+    python -m benchmarks                          # run everything
+    python -m benchmarks -k parsing --runs 20     # names containing "parsing"
+    python -m benchmarks --save benchmarks/baseline.json
+    python -m benchmarks --compare benchmarks/baseline.json --threshold 0.1
+
+With --compare the exit status is 1 when any benchmark's median is more
+than --threshold slower than the saved run (and slower by more than the
+noise between runs).
+"""
+import argparse
+import os
+import platform
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# Runnable as `python -m benchmarks` from backend/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# Services check for an LLM at construction; nothing here calls one
+os.environ['LLM_BACKEND'] = "fake"
+
+from benchmarks import bench_models, bench_parsing, bench_scoring  # noqa: F401 (registers benchmarks)
+from benchmarks.runner import BENCHMARKS, compare, format_results, load_results, run_benchmark, save_results
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run hot-path micro-benchmarks")
+    parser.add_argument("-k", dest="filter", default="", help="Only benchmarks whose name contains this")
+    parser.add_argument("--runs", type=int, default=10, help="Samples per benchmark")
+    parser.add_argument("--min-time", type=float, default=0.1, help="Minimum seconds per sample")
+    parser.add_argument("--save", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Compare against results saved earlier")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Allowed median slowdown (0.1 = 10%%)")
+    args = parser.parse_args()
+
+    names = [name for name in BENCHMARKS if args.filter in name]
+    if not names:
+        print(f"No benchmarks match {args.filter!r}")
+        return 1
+
+    results = {}
+    for name in names:
+        results[name] = run_benchmark(BENCHMARKS[name], runs=args.runs, min_time=args.min_time)
+        print(f"{name}: done", file=sys.stderr)
+
+    print(format_results(results))
+
+    if args.save:
+        save_results(args.save, results, {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "recorded_at": datetime.utcnow().isoformat()
+        })
+        print(f"Results saved to {args.save}")
+
+    if args.compare:
+        lines = compare(load_results(args.compare), results, args.threshold)
+        print()
+        print("\n".join(lines))
+        if any(line.startswith("REGRESSION") for line in lines):
+            return 1
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
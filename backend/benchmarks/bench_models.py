@@ -0,0 +1,75 @@
+"""
+Pydantic model construction and serialization on read paths
+"""
+import json
+from typing import Any, Dict, List
+from benchmarks.fixtures import CHAT_HISTORY_DOCUMENTS, PROFILE_RESPONSE, TEST_RESULT_DOCUMENTS, USER_SESSION
+from benchmarks.runner import benchmark, run_sync
+from models import ChatMessage, UnifiedProfile
+from services.profile_service import ProfileService
+from services.responses import dumps
+
+class _Cursor:
+    """Async cursor over in-memory documents that never waits"""
+
+    def __init__(self, documents: List[Dict[str, Any]]):
+        # The service mutates documents it reads, as it may with Motor's
+        self._documents = iter([dict(doc) for doc in documents])
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._documents)
+        except StopIteration:
+            raise StopAsyncIteration
+
+class _Collection:
+    def __init__(self, documents: List[Dict[str, Any]]):
+        self.documents = documents
+
+    def find(self, query, projection=None):
+        return _Cursor(self.documents)
+
+class _Database:
+    def __init__(self, **collections: List[Dict[str, Any]]):
+        for name, documents in collections.items():
+            setattr(self, name, _Collection(documents))
+
+profile_service = ProfileService(_Database(test_results=TEST_RESULT_DOCUMENTS))
+
+@benchmark("models.get_user_test_results")
+def get_user_test_results():
+    run_sync(profile_service.get_user_test_results(USER_SESSION))
+
+PROFILE_DOCUMENT = {
+    **json.loads(PROFILE_RESPONSE),
+    "user_session": USER_SESSION,
+    "source_tests": ["mbti", "enneagram", "bigFive"],
+    "ai_model_used": "gpt-4o-mini"
+}
+PROFILE = UnifiedProfile(**PROFILE_DOCUMENT)
+
+@benchmark("models.unified_profile_construct")
+def unified_profile_construct():
+    UnifiedProfile(**PROFILE_DOCUMENT)
+
+@benchmark("serialization.unified_profile_dict")
+def unified_profile_dict():
+    PROFILE.dict()
+
+@benchmark("serialization.chat_history_page")
+def chat_history_page():
+    # A history page: documents to models to JSON, as the endpoint returns them
+    messages = [ChatMessage(**doc) for doc in CHAT_HISTORY_DOCUMENTS]
+    json.dumps([message.dict() for message in messages], default=str)
+
+@benchmark("serialization.chat_history_response")
+def chat_history_response():
+    # What the endpoint does now: raw documents straight to orjson
+    dumps({"success": True, "messages": CHAT_HISTORY_DOCUMENTS})
+
+@benchmark("serialization.unified_profile_response")
+def unified_profile_response():
+    dumps({"success": True, "profile": PROFILE})
@@ -0,0 +1,31 @@
+"""
+LLM response parsing (services/json_extract.py)
+"""
+from benchmarks.fixtures import BLUEPRINT_FENCED, BLUEPRINT_RESPONSE, BLUEPRINT_TRUNCATED, PROFILE_RESPONSE
+from benchmarks.runner import benchmark
+from models import ProfileSynthesisOutput
+from routers.blueprint import BlueprintSynthesis
+from services.json_extract import IncrementalJsonParser, parse_llm_json
+from services.tokens import CHARS_PER_TOKEN
+
+@benchmark("parsing.profile_plain")
+def profile_plain():
+    parse_llm_json(PROFILE_RESPONSE, ProfileSynthesisOutput)
+
+@benchmark("parsing.blueprint_fenced")
+def blueprint_fenced():
+    parse_llm_json(BLUEPRINT_FENCED, BlueprintSynthesis)
+
+@benchmark("parsing.blueprint_truncated")
+def blueprint_truncated():
+    parse_llm_json(BLUEPRINT_TRUNCATED)
+
+# A streamed response arrives in chunks of a few tokens
+STREAM_CHUNKS = [BLUEPRINT_RESPONSE[i:i + 8 * CHARS_PER_TOKEN] for i in range(0, len(BLUEPRINT_RESPONSE), 8 * CHARS_PER_TOKEN)]
+
+@benchmark("parsing.blueprint_incremental")
+def blueprint_incremental():
+    parser = IncrementalJsonParser(BlueprintSynthesis)
+    for chunk in STREAM_CHUNKS:
+        parser.feed(chunk)
+    parser.result()
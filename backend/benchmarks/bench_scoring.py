@@ -0,0 +1,16 @@
+"""
+Test scoring: TestScoringService.score_test_comprehensive per test type
+"""
+from benchmarks.fixtures import ANSWERS
+from benchmarks.runner import benchmark
+from services.test_service import TestScoringService
+
+def _register(test_id: str):
+    answers = ANSWERS[test_id]
+
+    @benchmark(f"scoring.{test_id}")
+    def score():
+        TestScoringService.score_test_comprehensive(test_id, answers)
+
+for _test_id in ANSWERS:
+    _register(_test_id)
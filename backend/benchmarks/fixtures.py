@@ -0,0 +1,87 @@
+"""
+Realistic inputs for the benchmarks, built once at import
+"""
+import random
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+from services.llm_backends import FakeLlmBackend
+from services.test_service import TestScoringService
+
+rng = random.Random(42)
+
+PREMIUM_QUESTIONS = 42
+
+def likert(questions: int) -> Dict[str, int]:
+    return {str(q): rng.randint(1, 5) for q in range(1, questions + 1)}
+
+# Answers as the frontend submits them (string question ids)
+ANSWERS: Dict[str, Dict[str, Any]] = {
+    "mbti": {str(q): rng.choice("EISNTFJP"[(q - 1) % 4 * 2:(q - 1) % 4 * 2 + 2]) for q in range(1, 21)},
+    "enneagram": likert(15),
+    "disc": {str(q): rng.choice("DISC") for q in range(1, 25)},
+    "humanDesign": {1: "1990-04-12", 2: "07:30", 3: "Lisbon", 4: "sacral", 5: "generator"},
+    "bigFive": likert(PREMIUM_QUESTIONS),
+    "values": likert(PREMIUM_QUESTIONS),
+    "riasec": likert(PREMIUM_QUESTIONS),
+    "darkTriad": likert(PREMIUM_QUESTIONS),
+    "grit": likert(PREMIUM_QUESTIONS),
+    "chronotype": likert(PREMIUM_QUESTIONS),
+    "numerology": {"1": "04/12/1990", "2": "Maria Joana Silva", "3": "Maria Silva", "4": "career"}
+}
+
+USER_SESSION = "benchmark-session"
+
+def test_result_documents() -> List[Dict[str, Any]]:
+    """One stored result per test, shaped like documents read from MongoDB"""
+    documents = []
+    for test_id, answers in ANSWERS.items():
+        result_type, raw_score, confidence = TestScoringService.score_test_comprehensive(test_id, answers)
+        documents.append({
+            "_id": uuid.uuid4().hex[:24],
+            "id": str(uuid.uuid4()),
+            "test_id": test_id,
+            "user_session": USER_SESSION,
+            "user_id": None,
+            "answers": {str(k): v for k, v in answers.items()},
+            "raw_score": raw_score,
+            "result_type": result_type,
+            "confidence": confidence,
+            "completed_at": datetime(2026, 1, 1),
+            "ai_analysis": None,
+            "puzzle_piece": None
+        })
+    return documents
+
+TEST_RESULT_DOCUMENTS = test_result_documents()
+
+_fake_llm = FakeLlmBackend(seed=42)
+
+def llm_response(endpoint: str) -> str:
+    return _fake_llm.response_for(endpoint, "system", "prompt")
+
+PROFILE_RESPONSE = llm_response("profile_synthesis")
+BLUEPRINT_RESPONSE = llm_response("blueprint_synthesis")
+
+# How models actually wrap output
+BLUEPRINT_FENCED = f"Here is your Operating Manual:\n\n```json\n{BLUEPRINT_RESPONSE}\n```\n\nLet me know if you want changes."
+# Cut off by the output token limit
+BLUEPRINT_TRUNCATED = BLUEPRINT_RESPONSE[:int(len(BLUEPRINT_RESPONSE) * 0.8)]
+
+def chat_history_documents(count: int = 50) -> List[Dict[str, Any]]:
+    started = datetime(2026, 1, 1)
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "user_session": USER_SESSION,
+            "user_id": None,
+            "message": llm_response("chat")[:80],
+            "response": llm_response("chat"),
+            "context_tests": ["mbti", "enneagram"],
+            "timestamp": started + timedelta(minutes=i),
+            "ai_model_used": "gpt-4o-mini"
+        }
+        for i in range(count)
+    ]
+
+CHAT_HISTORY_DOCUMENTS = chat_history_documents()
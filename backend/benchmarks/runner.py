@@ -0,0 +1,126 @@
+"""
+Micro-benchmark runner
+
+Each benchmark is a zero-argument callable registered with @benchmark.
+A run calibrates the loop count so one sample takes at least `min_time`,
+then takes `runs` samples after a warm-up; results are reported per call.
+Saved results can be compared against a later run, which fails when a
+benchmark's median slows down by more than the threshold and by more
+than the run-to-run noise.
+"""
+import gc
+import json
+import statistics
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+BENCHMARKS: Dict[str, Callable[[], Any]] = {}
+
+def benchmark(name: str):
+    """Register a benchmark under a dotted name, e.g. "scoring.mbti" """
+    def register(func: Callable[[], Any]) -> Callable[[], Any]:
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+def run_sync(coro) -> Any:
+    """Drive a coroutine that never actually waits, without an event loop.
+
+    Keeps loop overhead out of timings of async code running against
+    in-memory fixtures.
+    """
+    try:
+        coro.send(None)
+    except StopIteration as done:
+        return done.value
+    coro.close()
+    raise RuntimeError("Coroutine suspended; use in-memory fixtures that don't wait")
+
+def _time_loops(func: Callable[[], Any], loops: int) -> float:
+    started = time.perf_counter()
+    for _ in range(loops):
+        func()
+    return time.perf_counter() - started
+
+def calibrate(func: Callable[[], Any], min_time: float) -> int:
+    loops = 1
+    while True:
+        elapsed = _time_loops(func, loops)
+        if elapsed >= min_time:
+            return loops
+        # Aim a little past min_time so the next try usually succeeds
+        loops = max(loops * 2, int(loops * min_time * 1.2 / max(elapsed, 1e-9)))
+
+def run_benchmark(func: Callable[[], Any], runs: int = 10, min_time: float = 0.1, warmup: int = 1) -> Dict[str, Any]:
+    """Per-call timings (microseconds) over `runs` samples"""
+
+    loops = calibrate(func, min_time)
+    for _ in range(warmup):
+        _time_loops(func, loops)
+
+    samples: List[float] = []
+    gc_was_enabled = gc.isenabled()
+    try:
+        # Collections land in random samples otherwise
+        gc.disable()
+        for _ in range(runs):
+            samples.append(_time_loops(func, loops) / loops * 1e6)
+            gc.collect()
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    return {
+        "median_us": round(statistics.median(samples), 3),
+        "mean_us": round(statistics.fmean(samples), 3),
+        "stdev_us": round(statistics.stdev(samples), 3) if len(samples) > 1 else 0.0,
+        "min_us": round(min(samples), 3),
+        "runs": runs,
+        "loops": loops
+    }
+
+def format_results(results: Dict[str, Dict[str, Any]]) -> str:
+    width = max([len("benchmark")] + [len(name) for name in results])
+    lines = [f"{'benchmark':<{width}}  {'median':>12}  {'mean +- stdev':>22}  {'min':>12}  {'runs x loops':>14}"]
+    for name, r in results.items():
+        spread = f"{_format_us(r['mean_us'])} +- {_format_us(r['stdev_us'])}"
+        lines.append(
+            f"{name:<{width}}  {_format_us(r['median_us']):>12}  {spread:>22}  "
+            f"{_format_us(r['min_us']):>12}  {r['runs']:>6} x {r['loops']:<6}"
+        )
+    return "\n".join(lines)
+
+def _format_us(value: float) -> str:
+    if value >= 1000:
+        return f"{value / 1000:.2f} ms"
+    return f"{value:.2f} us"
+
+def compare(
+    baseline: Dict[str, Dict[str, Any]],
+    current: Dict[str, Dict[str, Any]],
+    threshold: float = 0.1
+) -> List[str]:
+    """Lines describing each benchmark's change; regressions start with "REGRESSION" """
+
+    lines = []
+    for name, now in current.items():
+        before = baseline.get(name)
+        if not before:
+            lines.append(f"{name}: new")
+            continue
+
+        change = now["median_us"] / before["median_us"] - 1 if before["median_us"] else 0.0
+        # A slowdown within two standard deviations is noise, whatever the ratio
+        noise = 2 * max(now["stdev_us"], before["stdev_us"])
+        regressed = change > threshold and now["median_us"] - before["median_us"] > noise
+        prefix = "REGRESSION " if regressed else ""
+        lines.append(f"{prefix}{name}: {_format_us(before['median_us'])} -> {_format_us(now['median_us'])} ({change:+.1%})")
+    return lines
+
+def save_results(path: str, results: Dict[str, Dict[str, Any]], metadata: Optional[Dict[str, Any]] = None):
+    with open(path, "w") as f:
+        json.dump({"metadata": metadata or {}, "benchmarks": results}, f, indent=2, sort_keys=True)
+
+def load_results(path: str) -> Dict[str, Dict[str, Any]]:
+    with open(path) as f:
+        return json.load(f)["benchmarks"]
@@ -1,13 +1,20 @@
-from fastapi import Depends
+import os
+import secrets
+from typing import Optional
+from fastapi import Depends, Header, HTTPException
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from services.profile_service import ProfileService
 from services.auth_service import AuthService
 from services.chat_service import ChatService
 from services.palmistry_service import PalmistryService
+from services.palmistry_queue import PalmistryJobQueue
 
 # Global database instance - will be set by server.py
 db = None
 
+# Global palm analysis queue - will be set by server.py
+palmistry_queue = None
+
 def set_database(database: AsyncIOMotorDatabase):
     """Set the global database instance"""
     global db
@@ -17,6 +24,15 @@ def get_database():
     """Get database instance"""
     return db
 
+def set_palmistry_queue(queue: PalmistryJobQueue):
+    """Set the global palm analysis queue"""
+    global palmistry_queue
+    palmistry_queue = queue
+
+def get_palmistry_queue() -> PalmistryJobQueue:
+    """Get palm analysis queue instance"""
+    return palmistry_queue
+
 def get_profile_service(database = Depends(get_database)) -> ProfileService:
     """Get ProfileService instance with database dependency"""
     return ProfileService(database)
@@ -31,4 +47,13 @@ def get_chat_service(database = Depends(get_database)) -> ChatService:
 
 def get_palmistry_service(database = Depends(get_database)) -> PalmistryService:
     """Get PalmistryService instance with database dependency"""
-    return PalmistryService(database)
\ No newline at end of file
+    return PalmistryService(database)
+
+def require_admin(x_admin_token: Optional[str] = Header(default=None)):
+    """Guard for operator endpoints: X-Admin-Token must match ADMIN_TOKEN"""
+    admin_token = os.environ.get('ADMIN_TOKEN')
+    # Admin endpoints are disabled unless a token is configured
+    if not admin_token:
+        raise HTTPException(status_code=404, detail="Not found")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, admin_token):
+        raise HTTPException(status_code=403, detail="Admin token required")
@@ -0,0 +1,104 @@
+"""
+Offline batch job: generate quick-question suggestions per archetype.
+
+Writes one document per archetype to `quick_question_sets`; the API loads
+them at startup (services/quick_questions.py). Safe to re-run; archetypes
+that fail keep their rule-based defaults.
+
+    python generate_quick_questions.py [--limit N] [--overwrite]
+"""
+import argparse
+import asyncio
+import os
+from datetime import datetime
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from services.json_extract import parse_llm_json, LlmJsonError
+from services.llm_gateway import send_llm_message
+from services.llm_usage import usage_recorder
+from services.quick_questions import (
+    MAX_QUESTIONS, all_archetype_keys, build_default_questions, key_to_id
+)
+
+load_dotenv()
+
+SYSTEM_MESSAGE = "You write short, specific questions a person might ask their personality coach."
+
+def build_prompt(key) -> str:
+    mbti, enneagram, has_profile = key
+    profile = [
+        f"MBTI: {mbti}" if mbti else "MBTI: not taken",
+        f"Enneagram: Type {enneagram}" if enneagram else "Enneagram: not taken",
+        "Has a synthesized personality profile" if has_profile else "No synthesized profile yet"
+    ]
+    return f"""USER PROFILE:
+{chr(10).join(profile)}
+
+Write {MAX_QUESTIONS} varied questions (under 15 words each) this user could ask a personality coach: careers, relationships, growth, stress, habits. Refer to their types where it helps.
+
+Respond with a JSON array of strings only."""
+
+def parse_questions(response: str):
+    try:
+        questions = parse_llm_json(response, expect=list)
+    except LlmJsonError:
+        return []
+    return [q.strip() for q in questions if isinstance(q, str) and q.strip()][:MAX_QUESTIONS]
+
+async def main(limit: int, overwrite: bool):
+    client = AsyncIOMotorClient(os.environ.get('MONGO_URL'))
+    db = client[os.environ.get('DB_NAME', 'superhuman_blueprint')]
+    await usage_recorder.start(db)
+
+    existing = set()
+    if not overwrite:
+        existing = {doc["_id"] async for doc in db.quick_question_sets.find({}, {"_id": 1})}
+
+    keys = [key for key in all_archetype_keys() if key_to_id(key) not in existing]
+    if limit:
+        keys = keys[:limit]
+
+    print(f"Generating quick questions for {len(keys)} archetypes")
+
+    generated = 0
+    for key in keys:
+        doc_id = key_to_id(key)
+        try:
+            response = await send_llm_message(
+                "quick_questions_batch", SYSTEM_MESSAGE, build_prompt(key),
+                session_id=f"quick_questions_{doc_id}"
+            )
+            questions = parse_questions(response)
+
+            if len(questions) < MAX_QUESTIONS // 2:
+                print(f"❌ {doc_id}: too few questions, keeping defaults")
+                continue
+
+            # Top up with rule-based questions so every set is full
+            for question in build_default_questions(key):
+                if len(questions) >= MAX_QUESTIONS:
+                    break
+                if question not in questions:
+                    questions.append(question)
+
+            await db.quick_question_sets.replace_one(
+                {"_id": doc_id},
+                {"questions": questions, "model": "gpt-4o-mini", "generated_at": datetime.utcnow()},
+                upsert=True
+            )
+            generated += 1
+            print(f"✅ {doc_id}")
+
+        except Exception as e:
+            print(f"❌ {doc_id}: {str(e)}")
+
+    print(f"Done: {generated}/{len(keys)} archetypes generated")
+    await usage_recorder.stop()
+    client.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--limit", type=int, default=0, help="Generate at most N archetypes")
+    parser.add_argument("--overwrite", action="store_true", help="Regenerate archetypes that already have a set")
+    args = parser.parse_args()
+    asyncio.run(main(args.limit, args.overwrite))
@@ -0,0 +1,3 @@
+"""
+In-process load testing: `python -m loadtest --help`
+"""
@@ -0,0 +1,240 @@
+"""
+Load test runner
+
+Boots the API in-process (lifespan included) with the fake LLM backend and
+either a local MongoDB or an in-memory stand-in, replays user journeys at
+the given concurrency and prints throughput and latency percentiles per
+endpoint. Onboarding users are signed in directly in the database (the
+OAuth provider is out of reach), so their palm scans run through the
+analysis queue; how long scans waited for a worker and how long analysis
+took are read back from the scans and reported alongside the endpoints.
+Results can be saved as a baseline and later runs compared against it;
+the exit status is 1 when a run regresses.
+
+    cd backend
+    python -m loadtest --users 200 --concurrency 20
+    python -m loadtest --mongo-url mongodb://localhost:27017 --save-baseline loadtest/baseline.json
+    python -m loadtest --baseline loadtest/baseline.json --tolerance 0.2
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import time
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List
+
+# Runnable as `python -m loadtest` from backend/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx
+from loadtest.journeys import JOURNEYS, Recorder, new_session
+from loadtest.stats import compare, format_table, load_baseline, save_baseline, summarize
+from models import User, UserSession
+
+# GridFS is not available in the in-memory stand-in
+MEMORY_SKIPPED_ROUTES = {"POST /api/palmistry/upload"}
+
+async def sign_in(db) -> str:
+    """A user and session as AuthService stores them after OAuth; returns the token"""
+    user = User(email=f"loadtest-{uuid.uuid4()}@example.com", name="Load Test")
+    session = UserSession(
+        user_id=user.id,
+        session_token=str(uuid.uuid4()),
+        expires_at=datetime.utcnow() + timedelta(days=1)
+    )
+    await db.users.insert_one(user.dict())
+    await db.user_sessions.insert_one(session.dict())
+    return session.session_token
+
+async def palm_scan_stages(db, scan_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Queue wait (upload to worker pickup) and analysis time of the recorded scans"""
+    if not scan_ids:
+        return {}
+    waits, analyses = [], []
+    failed = 0
+    async for scan in db.palm_scans.find({"_id": {"$in": scan_ids}}):
+        created, started, completed = scan.get("created_at"), scan.get("started_at"), scan.get("completed_at")
+        if scan.get("status") != "completed":
+            failed += 1
+        if created and started:
+            waits.append((started - created).total_seconds() * 1000)
+        if started and completed:
+            analyses.append((completed - started).total_seconds() * 1000)
+    return {
+        "palm scan: queue wait": summarize(waits),
+        "palm scan: analysis": summarize(analyses, failed)
+    }
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """"onboarding=1,returning=3" -> journey weights"""
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        if name not in JOURNEYS:
+            raise argparse.ArgumentTypeError(f"Unknown journey: {name}")
+        weights[name] = float(weight or 1)
+    return weights
+
+def configure_environment(args: argparse.Namespace):
+    """Settings read at import time, so set before the app is imported"""
+    os.environ['LLM_BACKEND'] = "fake"
+    os.environ['FAKE_LLM_LATENCY_MS'] = str(args.llm_latency_ms)
+    os.environ['FAKE_LLM_TOKENS_PER_SECOND'] = str(args.llm_tokens_per_second)
+    os.environ['FAKE_LLM_ERROR_RATE'] = str(args.llm_error_rate)
+    os.environ['FAKE_LLM_SEED'] = str(args.seed)
+    os.environ['DB_NAME'] = args.db_name
+    if args.mongo_url:
+        os.environ['MONGO_URL'] = args.mongo_url
+
+@asynccontextmanager
+async def running_app(args: argparse.Namespace):
+    configure_environment(args)
+    import server
+
+    if not args.mongo_url:
+        from mongomock_motor import AsyncMongoMockClient
+        server.AsyncIOMotorClient = lambda *a, **kw: AsyncMongoMockClient()
+        print("Using in-memory MongoDB (mongomock-motor), palm uploads skipped; pass --mongo-url for a real server")
+
+    # One log line per request would drown the results
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    async with server.lifespan(server.app):
+        if args.mongo_url:
+            # Start from an empty database so runs are comparable
+            await server.client.drop_database(args.db_name)
+        yield server.app
+        if args.mongo_url and not args.keep_data:
+            await server.client.drop_database(args.db_name)
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    rng = random.Random(args.seed)
+    weights = parse_mix(args.mix)
+    plan: List[str] = rng.choices(list(weights), weights=list(weights.values()), k=args.users)
+    recorder = Recorder(skip=set() if args.mongo_url else MEMORY_SKIPPED_ROUTES)
+    completed: List[str] = []
+    db = None
+
+    async def play(client: httpx.AsyncClient, journey: str):
+        user_rng = random.Random(rng.random())
+        user_session = rng.choice(completed) if journey == "returning" else new_session()
+        started = time.perf_counter()
+        if journey == "onboarding" and "POST /api/palmistry/upload" not in recorder.skip:
+            session_token = await sign_in(db)
+            await JOURNEYS[journey](client, recorder, user_rng, user_session, session_token)
+        else:
+            await JOURNEYS[journey](client, recorder, user_rng, user_session)
+        if recorder.enabled:
+            recorder.journeys[journey].append((time.perf_counter() - started) * 1000)
+        if journey == "onboarding":
+            completed.append(user_session)
+
+    async with running_app(args) as app:
+        import server
+        db = server.db
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=args.timeout) as client:
+            # Warm-up users, unrecorded, also give returning journeys someone to be
+            recorder.enabled = False
+            await asyncio.gather(*(play(client, "onboarding") for _ in range(max(args.warmup, 1))))
+            recorder.enabled = True
+
+            queue: asyncio.Queue = asyncio.Queue()
+            for journey in plan:
+                queue.put_nowait(journey)
+
+            async def worker():
+                while not queue.empty():
+                    await play(client, queue.get_nowait())
+
+            started = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+            elapsed = time.perf_counter() - started
+
+        stages = await palm_scan_stages(db, recorder.palm_scans)
+
+    endpoints = {
+        name: summarize(latencies, recorder.errors.get(name, 0), elapsed)
+        for name, latencies in sorted(recorder.latencies.items())
+    }
+    journeys = {
+        f"journey: {name}": summarize(latencies, elapsed_seconds=elapsed)
+        for name, latencies in sorted(recorder.journeys.items())
+    }
+    total_requests = sum(len(latencies) for latencies in recorder.latencies.values())
+
+    return {
+        "config": {
+            "users": args.users,
+            "concurrency": args.concurrency,
+            "mix": args.mix,
+            "mongo": "server" if args.mongo_url else "memory",
+            "llm_latency_ms": args.llm_latency_ms,
+            "llm_tokens_per_second": args.llm_tokens_per_second,
+            "llm_error_rate": args.llm_error_rate,
+            "seed": args.seed
+        },
+        "elapsed_seconds": round(elapsed, 2),
+        "throughput_rps": round(total_requests / elapsed, 2),
+        "journeys_per_second": round(args.users / elapsed, 2),
+        "endpoints": endpoints,
+        "stages": stages,
+        "journeys": journeys
+    }
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Load test the API in-process with the fake LLM backend")
+    parser.add_argument("--users", type=int, default=100, help="Journeys to run")
+    parser.add_argument("--concurrency", type=int, default=10, help="Journeys running at once")
+    parser.add_argument("--mix", default="onboarding=1,returning=2", help="Journey weights")
+    parser.add_argument("--warmup", type=int, default=3, help="Unrecorded onboarding journeys first")
+    parser.add_argument("--mongo-url", default=None, help="MongoDB to use (default: in-memory)")
+    parser.add_argument("--db-name", default="loadtest")
+    parser.add_argument("--keep-data", action="store_true", help="Don't drop the database afterwards")
+    parser.add_argument("--llm-latency-ms", type=float, default=800, help="Median fake LLM time to first token")
+    parser.add_argument("--llm-tokens-per-second", type=float, default=60)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--timeout", type=float, default=120, help="Per-request client timeout")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save-baseline", help="Write results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against this baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed p95 growth over the baseline")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+
+    print()
+    print(format_table({**results["endpoints"], **results["stages"], **results["journeys"]}))
+    print()
+    print(f"{results['elapsed_seconds']}s, {results['throughput_rps']} req/s, {results['journeys_per_second']} journeys/s")
+
+    if args.save_baseline:
+        save_baseline(args.save_baseline, results)
+        print(f"Baseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        baseline = load_baseline(args.baseline)
+        if baseline.get("config") != results["config"]:
+            print("Warning: baseline was recorded with different settings")
+        regressions = compare(
+            {**baseline["endpoints"], **baseline.get("stages", {})},
+            {**results["endpoints"], **results["stages"]},
+            tolerance=args.tolerance
+        )
+        if regressions:
+            print("Regressions against baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("No regressions against baseline")
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
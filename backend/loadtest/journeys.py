@@ -0,0 +1,196 @@
+"""
+User journeys replayed by the load test
+
+Each journey is a coroutine taking the HTTP client, the recorder and a
+per-user random generator; requests are recorded under a route name so
+results group by endpoint rather than by URL.
+
+Onboarding users upload their palm signed in, so the scan goes through
+the analysis queue, and follow its event stream until the reading is
+ready.
+"""
+import io
+import json
+import random
+import time
+import uuid
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Set
+import httpx
+from PIL import Image
+
+MBTI_QUESTIONS = 20
+ENNEAGRAM_QUESTIONS = 15
+
+CHAT_MESSAGES = [
+    "What careers suit my personality?",
+    "How can I handle stress better at work?",
+    "Why do I find small talk so draining?",
+    "How should I approach a difficult conversation with my manager?",
+    "What study habits fit the way I think?",
+    "How can I keep motivated on long projects?"
+]
+
+class Recorder:
+    """Latencies and failures per route name"""
+
+    def __init__(self, skip: Optional[Set[str]] = None):
+        # Routes left out of every journey
+        self.skip = skip or set()
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.journeys: Dict[str, List[float]] = defaultdict(list)
+        # Palm scans uploaded while recording, for queue timings afterwards
+        self.palm_scans: List[str] = []
+        self.enabled = True
+
+    async def request(
+        self,
+        client: httpx.AsyncClient,
+        name: str,
+        method: str,
+        url: str,
+        check_success: bool = True,
+        **kwargs
+    ) -> Optional[httpx.Response]:
+        """Send a request and record it; `check_success=False` accepts success: false bodies"""
+        if name in self.skip:
+            return None
+
+        started = time.perf_counter()
+        response = None
+        try:
+            response = await client.request(method, url, **kwargs)
+        except Exception as e:
+            print(f"{name} failed: {str(e)}")
+
+        failed = response is None or response.status_code >= 400
+        self.record(name, started, failed or (check_success and not _succeeded(response)))
+        return response
+
+    def record(self, name: str, started: float, failed: bool = False):
+        """Record something timed from `started` (perf_counter) until now"""
+        if self.enabled:
+            self.latencies[name].append((time.perf_counter() - started) * 1000)
+            if failed:
+                self.errors[name] += 1
+
+def _succeeded(response: httpx.Response) -> bool:
+    """Endpoints report soft failures as success: false with a 200"""
+    try:
+        body = response.json()
+    except ValueError:
+        return True
+    return not (isinstance(body, dict) and body.get("success") is False)
+
+def palm_image(width: int = 1200, height: int = 1600) -> bytes:
+    """A camera-sized JPEG with some texture, so derivatives do real work"""
+    rng = random.Random(0)
+    image = Image.new("RGB", (width, height), (224, 180, 150))
+    pixels = image.load()
+    for _ in range(40):
+        x, y = rng.randrange(width), rng.randrange(height)
+        dx, dy = rng.choice([(1, 0), (0, 1), (1, 1)])
+        for step in range(rng.randrange(100, 600)):
+            px, py = x + dx * step, y + dy * step
+            if 0 <= px < width and 0 <= py < height:
+                pixels[px, py] = (120, 80, 70)
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=85)
+    return buffer.getvalue()
+
+PALM_IMAGE = palm_image()
+
+def mbti_answers(rng: random.Random) -> Dict[str, str]:
+    pairs = ["EI", "SN", "TF", "JP"]
+    return {str(i + 1): rng.choice(pairs[i % 4]) for i in range(MBTI_QUESTIONS)}
+
+def enneagram_answers(rng: random.Random) -> Dict[str, int]:
+    return {str(i + 1): rng.randint(1, 5) for i in range(ENNEAGRAM_QUESTIONS)}
+
+async def onboarding(
+    client: httpx.AsyncClient,
+    recorder: Recorder,
+    rng: random.Random,
+    user_session: str,
+    session_token: Optional[str] = None
+):
+    """New user: take tests, synthesize a profile, read daily content, chat, upload a palm"""
+
+    for test_id, answers in [("mbti", mbti_answers(rng)), ("enneagram", enneagram_answers(rng))]:
+        await recorder.request(
+            client, "POST /api/tests/{test_id}/submit", "POST", f"/api/tests/{test_id}/submit",
+            json={"test_id": test_id, "answers": answers, "user_session": user_session}
+        )
+
+    await recorder.request(
+        client, "POST /api/profile/synthesize", "POST", "/api/profile/synthesize",
+        json={"user_session": user_session, "user_goals": "Find a role where I can do deep work"}
+    )
+    await recorder.request(client, "GET /api/daily/content/{user_session}", "GET", f"/api/daily/content/{user_session}")
+
+    for message in rng.sample(CHAT_MESSAGES, 2):
+        await recorder.request(
+            client, "POST /api/chat/message", "POST", "/api/chat/message",
+            json={"user_session": user_session, "message": message}
+        )
+
+    # Signed in, the scan is queued for analysis; a guest's would wait for login
+    headers = {"Authorization": f"Bearer {session_token}"} if session_token else {}
+    response = await recorder.request(
+        client, "POST /api/palmistry/upload", "POST", "/api/palmistry/upload",
+        check_success=session_token is not None,
+        params={"user_session": user_session},
+        files={"file": ("palm.jpg", PALM_IMAGE, "image/jpeg")},
+        headers=headers
+    )
+    scan_id = response.json().get("scan_id") if response is not None and response.status_code == 200 else None
+    if session_token and scan_id:
+        await follow_palm_scan(client, recorder, scan_id, user_session)
+
+async def follow_palm_scan(client: httpx.AsyncClient, recorder: Recorder, scan_id: str, user_session: str):
+    """Wait on the scan's event stream for the reading, then load its preview"""
+
+    if recorder.enabled:
+        recorder.palm_scans.append(scan_id)
+
+    name = "GET /api/palmistry/scan/{scan_id}/events"
+    started = time.perf_counter()
+    status = None
+    try:
+        async with client.stream(
+            "GET", f"/api/palmistry/scan/{scan_id}/events", params={"user_session": user_session}
+        ) as response:
+            async for line in response.aiter_lines():
+                if line.startswith("data: "):
+                    status = json.loads(line[len("data: "):]).get("status")
+    except Exception as e:
+        print(f"{name} failed: {str(e)}")
+    recorder.record(name, started, failed=status != "completed")
+
+    await recorder.request(
+        client, "GET /api/palmistry/image/{scan_id}/{variant}", "GET", f"/api/palmistry/image/{scan_id}/medium",
+        params={"user_session": user_session}
+    )
+
+async def returning(client: httpx.AsyncClient, recorder: Recorder, rng: random.Random, user_session: str):
+    """Existing user: profile and daily content (cached), chat, scroll history"""
+
+    await recorder.request(client, "GET /api/profile/unified/{user_session}", "GET", f"/api/profile/unified/{user_session}")
+    await recorder.request(client, "GET /api/daily/content/{user_session}", "GET", f"/api/daily/content/{user_session}")
+    await recorder.request(
+        client, "POST /api/chat/message", "POST", "/api/chat/message",
+        json={"user_session": user_session, "message": rng.choice(CHAT_MESSAGES)}
+    )
+    await recorder.request(
+        client, "GET /api/chat/history/{user_session}", "GET", f"/api/chat/history/{user_session}",
+        params={"limit": 20}
+    )
+
+JOURNEYS: Dict[str, Callable] = {
+    "onboarding": onboarding,
+    "returning": returning
+}
+
+def new_session() -> str:
+    return f"loadtest-{uuid.uuid4()}"
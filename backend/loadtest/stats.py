@@ -0,0 +1,79 @@
+"""
+Latency statistics and baseline comparison for load tests and benchmarks
+"""
+import json
+from typing import Any, Dict, List, Optional
+
+PERCENTILES = (50, 95, 99)
+
+def percentile(ordered: List[float], pct: float) -> float:
+    """Linear-interpolated percentile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+def summarize(latencies_ms: List[float], errors: int = 0, elapsed_seconds: Optional[float] = None) -> Dict[str, Any]:
+    ordered = sorted(latencies_ms)
+    summary = {
+        "count": len(ordered),
+        "errors": errors,
+        "mean_ms": round(sum(ordered) / len(ordered), 2) if ordered else 0.0,
+        "max_ms": round(ordered[-1], 2) if ordered else 0.0
+    }
+    for pct in PERCENTILES:
+        summary[f"p{pct}_ms"] = round(percentile(ordered, pct), 2)
+    if elapsed_seconds:
+        summary["throughput_rps"] = round(len(ordered) / elapsed_seconds, 2)
+    return summary
+
+def format_table(rows: Dict[str, Dict[str, Any]]) -> str:
+    """Fixed-width table of summaries, one row per name"""
+
+    columns = ["count", "errors", "p50_ms", "p95_ms", "p99_ms", "max_ms", "throughput_rps"]
+    width = max([len("name")] + [len(name) for name in rows])
+    lines = [f"{'name':<{width}}  " + "  ".join(f"{c:>14}" for c in columns)]
+    for name, summary in rows.items():
+        lines.append(f"{name:<{width}}  " + "  ".join(f"{summary.get(c, ''):>14}" for c in columns))
+    return "\n".join(lines)
+
+def save_baseline(path: str, results: Dict[str, Any]):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+def load_baseline(path: str) -> Dict[str, Any]:
+    with open(path) as f:
+        return json.load(f)
+
+def compare(
+    baseline: Dict[str, Dict[str, Any]],
+    current: Dict[str, Dict[str, Any]],
+    metric: str = "p95_ms",
+    tolerance: float = 0.2,
+    min_delta_ms: float = 5.0
+) -> List[str]:
+    """Regressions of current against baseline, as readable lines.
+
+    A row regresses when `metric` grew by more than `tolerance` (a
+    fraction) and by more than `min_delta_ms`, so sub-millisecond noise on
+    fast rows is ignored, or when its error rate went up.
+    """
+
+    regressions = []
+    for name, now in current.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+
+        old, new = before.get(metric, 0.0), now.get(metric, 0.0)
+        if new > old * (1 + tolerance) and new - old > min_delta_ms:
+            regressions.append(f"{name}: {metric} {old} -> {new} (+{(new / old - 1) * 100 if old else 100:.0f}%)")
+
+        old_rate = before.get("errors", 0) / max(before.get("count", 0), 1)
+        new_rate = now.get("errors", 0) / max(now.get("count", 0), 1)
+        if new_rate > old_rate + 0.01:
+            regressions.append(f"{name}: error rate {old_rate:.1%} -> {new_rate:.1%}")
+
+    return regressions
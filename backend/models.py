@@ -171,10 +171,16 @@ class PalmScan(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     user_session: str
     user_id: Optional[str] = None
-    image_data: str  # Base64 encoded image
+    image_data: Optional[str] = None  # Legacy base64 image, new scans keep images in the blob store
+    images: Dict[str, Dict[str, Any]] = Field(default_factory=dict)  # Stored variants (original, medium, thumbnail)
+    features: Dict[str, Any] = Field(default_factory=dict)  # Locally extracted line measurements
     analysis_result: Optional[Dict[str, Any]] = None
     confidence: Optional[float] = None
+    status: str = "queued"  # awaiting_login, queued, processing, completed, failed
+    result_id: Optional[str] = None  # palmistry_results id once analyzed
+    error: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    completed_at: Optional[datetime] = None
 
 class PalmistryResult(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -222,6 +228,9 @@ class PalmistryResponse(BaseModel):
     success: bool
     analysis: Optional[PalmistryResult]
     message: str
+    scan_id: Optional[str] = None
+    status: Optional[str] = None  # Job status of the scan
+    preliminary: Optional[Dict[str, Any]] = None  # Instant reading from extracted features
 
 class AuthResponse(BaseModel):
     success: bool
@@ -233,4 +242,48 @@ class AIGenerationStatus(BaseModel):
     status: str  # generating, completed, failed
     progress: float
     estimated_time_remaining: Optional[int]  # seconds
-    error_message: Optional[str]
\ No newline at end of file
+    error_message: Optional[str]
+
+# LLM output models: what the prompts ask the model to return
+class ProfileSynthesisOutput(BaseModel):
+    strengths: List[str]
+    challenges: List[str]
+    communication_style: str
+    career_guidance: str
+    study_tactics: str
+    motivation_levers: str
+    relationship_tips: str
+    daily_micro_coaching: str
+    confidence: float = 0.7
+    reasoning_summary: str = ""
+    ai_model_used: str = "gpt-4o-mini"
+
+class DailyContentOutput(BaseModel):
+    horoscope: str
+    mantra: str
+    micro_routine: MicroRoutine
+    meditation: Meditation
+
+class MeditationOutput(BaseModel):
+    title: str
+    duration: str
+    script: str
+    techniques_used: List[str] = Field(default_factory=list)
+    personality_adaptations: str = ""
+
+class TestAnalysisOutput(BaseModel):
+    insights: str
+    key_implications: List[str] = Field(default_factory=list)
+    actionable_next_steps: List[str] = Field(default_factory=list)
+    confidence_level: float = 0.7
+    source_attribution: str = ""
+    disclaimer: Optional[str] = None
+
+class PalmReadingOutput(BaseModel):
+    life_line: Dict[str, Any] = Field(default_factory=dict)
+    heart_line: Dict[str, Any] = Field(default_factory=dict)
+    head_line: Dict[str, Any] = Field(default_factory=dict)
+    fate_line: Dict[str, Any] = Field(default_factory=dict)
+    personality_traits: List[str]
+    life_predictions: List[str] = Field(default_factory=list)
+    confidence: float = 0.8
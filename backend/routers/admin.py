@@ -0,0 +1,112 @@
+"""
+Admin Router - Operator endpoints (require the X-Admin-Token header)
+
+Provides endpoints for:
+- /api/admin/llm-usage - LLM token, cost and latency rollups
+- /api/admin/llm-models - Model routing policy, upstream health and circuit state
+- /api/admin/profile/cpu - Sampling profile of this worker as collapsed stacks
+- /api/admin/profile/memory - Allocation growth per site (tracemalloc)
+"""
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import PlainTextResponse
+from services.llm_usage import usage_recorder
+from services.model_router import model_router
+from services.llm_gateway import llm_breaker
+from services.profiler import MAX_PROFILE_SECONDS, profile_allocations, profile_cpu, profiling_in_progress
+from dependencies import require_admin
+
+router = APIRouter(prefix="/api/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+USAGE_GROUPS = ("endpoint", "model", "user_session")
+PROFILE_FORMATS = ("collapsed", "json")
+ALLOCATION_GROUPS = ("lineno", "traceback", "filename")
+
+@router.get("/llm-usage")
+async def get_llm_usage(days: int = 7, group_by: str = "endpoint"):
+    """LLM usage per day, grouped by endpoint, model or user session"""
+    
+    if group_by not in USAGE_GROUPS:
+        raise HTTPException(status_code=400, detail=f"group_by must be one of: {', '.join(USAGE_GROUPS)}")
+    
+    try:
+        rows = await usage_recorder.rollup(days=max(1, min(days, 90)), group_by=group_by)
+        
+        return {
+            "success": True,
+            "days": days,
+            "group_by": group_by,
+            "rows": rows,
+            "totals": {
+                field: round(sum(row[field] for row in rows), 4)
+                for field in ("calls", "errors", "cancelled", "cache_hits", "input_tokens", "output_tokens", "cost_usd")
+            }
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get LLM usage: {str(e)}")
+
+@router.get("/llm-models")
+async def get_llm_models():
+    """Routing policy per endpoint and recent latency / error rate per model"""
+    
+    return {
+        "success": True,
+        "routes": {
+            endpoint: {
+                "call_class": policy.call_class,
+                "model": policy.model,
+                "premium_model": policy.premium_model,
+                "fallbacks": policy.fallbacks,
+                "latency_slo_ms": policy.latency_slo_ms
+            }
+            for endpoint, policy in model_router.routes.items()
+        },
+        "health": model_router.stats(),
+        "circuit": llm_breaker.stats()
+    }
+
+def _check_profile_request(seconds: float):
+    if not 0 < seconds <= MAX_PROFILE_SECONDS:
+        raise HTTPException(status_code=400, detail=f"seconds must be between 0 and {MAX_PROFILE_SECONDS}")
+    if profiling_in_progress():
+        raise HTTPException(status_code=409, detail="A profile is already running on this worker")
+
+@router.get("/profile/cpu")
+async def get_cpu_profile(seconds: float = 10, interval_ms: float = 5, idle: bool = False, format: str = "collapsed"):
+    """Sample this worker's threads; collapsed output feeds flamegraph.pl or speedscope"""
+    
+    if format not in PROFILE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(PROFILE_FORMATS)}")
+    _check_profile_request(seconds)
+    
+    try:
+        profiler = await profile_cpu(seconds, interval_ms=max(1.0, interval_ms), include_idle=idle)
+        
+        if format == "collapsed":
+            return PlainTextResponse(profiler.collapsed())
+        
+        return {
+            "success": True,
+            "seconds": round(profiler.elapsed, 2),
+            "samples": profiler.samples,
+            "distinct_stacks": len(profiler.stacks),
+            "top_functions": profiler.top_functions()
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to profile: {str(e)}")
+
+@router.get("/profile/memory")
+async def get_memory_profile(seconds: float = 10, limit: int = 25, group_by: str = "lineno"):
+    """Allocation sites that grew the most while tracing for `seconds`"""
+    
+    if group_by not in ALLOCATION_GROUPS:
+        raise HTTPException(status_code=400, detail=f"group_by must be one of: {', '.join(ALLOCATION_GROUPS)}")
+    _check_profile_request(seconds)
+    
+    try:
+        allocations = await profile_allocations(seconds, limit=max(1, min(limit, 200)), group_by=group_by)
+        return {"success": True, "seconds": seconds, **allocations}
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to profile allocations: {str(e)}")
@@ -2,9 +2,11 @@ from fastapi import APIRouter, HTTPException, Response, Request, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import Optional
 from services.auth_service import AuthService
+from services.palmistry_queue import PalmistryJobQueue
 from models import AuthResponse
+from services.responses import model_response
 import os
-from dependencies import get_auth_service
+from dependencies import get_auth_service, get_palmistry_queue
 
 router = APIRouter(prefix="/api/auth", tags=["authentication"])
 security = HTTPBearer(auto_error=False)
@@ -14,7 +16,8 @@ async def authenticate_session(
     request: Request,
     response: Response,
     session_id: str,
-    auth_service: AuthService = Depends(get_auth_service)
+    auth_service: AuthService = Depends(get_auth_service),
+    palmistry_queue: PalmistryJobQueue = Depends(get_palmistry_queue)
 ):
     """Authenticate user with Emergent OAuth session ID"""
     
@@ -38,8 +41,11 @@ async def authenticate_session(
             user_session = request.headers.get("X-User-Session")
             if user_session and auth_result.user:
                 await auth_service.migrate_anonymous_data(user_session, auth_result.user.id)
+                
+                # Analyze palm scans taken before login
+                await palmistry_queue.enqueue_deferred(user_session)
         
-        return auth_result
+        return model_response(auth_result, response)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Authentication failed: {str(e)}")
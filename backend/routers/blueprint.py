@@ -6,10 +6,12 @@ Provides endpoints for:
 """
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Union
 import logging
-import os
-from emergentintegrations.llm.chat import LlmChat, UserMessage
+from services.llm_backends import llm_configured
+from services.llm_gateway import send_llm_message
+from services.json_extract import parse_llm_json, LlmJsonError
+from services.responses import model_response
 
 logger = logging.getLogger(__name__)
 
@@ -36,6 +38,18 @@ class SynthesisRequest(BaseModel):
     profile: Optional[UserProfile] = None
     tests: List[TestResult] = []
 
+class BlueprintSynthesis(BaseModel):
+    """Operating Manual as returned by the LLM"""
+    coreTraits: str
+    work: str
+    relationships: str
+    daily: str
+    strengths: Union[List[str], str] = []
+    challenges: Union[List[str], str] = []
+    attributions: Dict[str, List[str]] = {}
+    confidence: Dict[str, str] = {}
+    evidenceLabel: Dict[str, str] = {}
+
 class SynthesisResponse(BaseModel):
     success: bool
     synthesis: Dict[str, Any]
@@ -58,9 +72,7 @@ async def synthesize_profile(request: SynthesisRequest):
     - Evidence labels and confidence scores
     """
     try:
-        # Get Emergent LLM key
-        api_key = os.environ.get('EMERGENT_LLM_KEY')
-        if not api_key:
+        if not llm_configured():
             raise HTTPException(status_code=500, detail="LLM API key not configured")
         
         # Build context from user data
@@ -146,24 +158,14 @@ GUIDELINES:
 
 Generate a detailed, personalized synthesis following the JSON format specified. Make it actionable and insightful."""
 
-        # Initialize LLM chat
-        logger.info(f"Initializing LLM chat for synthesis")
-        chat = LlmChat(
-            api_key=api_key,
-            session_id=f"synthesis_{id(request)}",
-            system_message=system_message
-        )
-        
-        # Configure model - use gpt-4o-mini for reliability
-        logger.info(f"Configuring model: openai/gpt-4o-mini")
-        chat.with_model("openai", "gpt-4o-mini")
-        
-        # Send message
-        logger.info(f"Sending synthesis request to LLM")
-        user_message = UserMessage(text=user_prompt)
+        # Send message - use gpt-4o-mini for reliability
+        logger.info("Sending synthesis request to LLM")
         
         try:
-            response = await chat.send_message(user_message)
+            response = await send_llm_message(
+                "blueprint_synthesis", system_message, user_prompt,
+                session_id=f"synthesis_{id(request)}"
+            )
             logger.info(f"Received response from LLM (length: {len(response)})")
         except Exception as llm_error:
             logger.error(f"LLM connection failed: {llm_error}")
@@ -198,24 +200,10 @@ Generate a detailed, personalized synthesis following the JSON format specified.
 ```'''
             logger.info(f"Using fallback synthesis response")
         
-        # Parse response - expect JSON
-        import json
+        # Parse response - expect JSON, possibly fenced or wrapped in prose
         try:
-            # Try to extract JSON from response
-            response_text = response.strip()
-            if "```json" in response_text:
-                # Extract JSON from markdown code block
-                start = response_text.find("```json") + 7
-                end = response_text.find("```", start)
-                response_text = response_text[start:end].strip()
-            elif "```" in response_text:
-                # Extract from generic code block
-                start = response_text.find("```") + 3
-                end = response_text.find("```", start)
-                response_text = response_text[start:end].strip()
-            
-            synthesis_data = json.loads(response_text)
-        except json.JSONDecodeError as e:
+            synthesis_data = parse_llm_json(response, BlueprintSynthesis)
+        except LlmJsonError as e:
             logger.error(f"Failed to parse LLM response as JSON: {e}")
             logger.error(f"Response: {response}")
             # Fallback: create structured response from text
@@ -231,11 +219,11 @@ Generate a detailed, personalized synthesis following the JSON format specified.
                 "evidenceLabel": {"coreTraits": "Mixed"}
             }
         
-        return SynthesisResponse(
+        return model_response(SynthesisResponse(
             success=True,
             synthesis=synthesis_data,
             message="Operating Manual generated successfully" + (" (using AI fallback due to connection issues)" if "fallback" in locals() else "")
-        )
+        ))
         
     except HTTPException:
         raise
@@ -1,10 +1,12 @@
 from fastapi import APIRouter, HTTPException, Depends
-from typing import Optional, List
-from services.chat_service import ChatService
+from typing import Literal, Optional
+from services.chat_service import ChatService, DEFAULT_HISTORY_PAGE_SIZE
 from services.auth_service import AuthService
 from routers.auth import get_current_user_dependency
 from models import ChatRequest, ChatResponse, ChatMessage
+from services import quick_questions
 from dependencies import get_chat_service
+from services.responses import FastJSONResponse, model_response
 
 router = APIRouter(prefix="/api/chat", tags=["ai-chat"])
 
@@ -23,10 +25,11 @@ async def send_chat_message(
             user_session=request.user_session,
             user_id=user_id,
             message=request.message,
-            include_context=request.include_context
+            include_context=request.include_context,
+            is_premium=bool(current_user and current_user.get("is_premium"))
         )
         
-        return response
+        return model_response(response)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Chat processing failed: {str(e)}")
@@ -34,26 +37,45 @@ async def send_chat_message(
 @router.get("/history/{user_session}")
 async def get_chat_history(
     user_session: str,
+    limit: int = DEFAULT_HISTORY_PAGE_SIZE,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    view: Literal["list", "full"] = "full",
     current_user: Optional[dict] = Depends(get_current_user_dependency),
     chat_service: ChatService = Depends(get_chat_service)
 ):
-    """Get chat history for user session"""
+    """Get a page of chat history for user session.
+    
+    Pass the returned `before` cursor to scroll back and `after` to fetch
+    newer messages; `view=list` returns only the fields list views need.
+    """
     
     try:
         user_id = current_user.get("id") if current_user else None
         
-        history = await chat_service.get_chat_history(
+        page = await chat_service.get_chat_history(
             user_session=user_session,
             user_id=user_id,
-            limit=50
+            limit=limit,
+            before=before,
+            after=after,
+            view=view
         )
         
-        return {
+        # Raw documents straight to orjson, no jsonable_encoder pass
+        return FastJSONResponse({
             "success": True,
-            "messages": [msg.dict() for msg in history],
-            "count": len(history)
-        }
-        
+            "messages": page["messages"],
+            "count": len(page["messages"]),
+            "has_more": page["has_more"],
+            "cursors": {
+                "before": page["before"],
+                "after": page["after"]
+            }
+        })
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get chat history: {str(e)}")
 
@@ -116,40 +138,12 @@ async def get_quick_questions(
         user_id = current_user.get("id") if current_user else None
         context = await chat_service._get_user_context(user_session, user_id)
         
-        # Generate contextual quick questions
-        questions = []
-        
-        if not context:
-            questions = [
-                "What personality test should I take first?",
-                "How can I better understand myself?",
-                "What are the benefits of personality assessments?",
-                "How do I start my self-discovery journey?"
-            ]
-        else:
-            if 'mbti' in context:
-                questions.append(f"How can I use my {context['mbti']['type']} personality type in my career?")
-                questions.append("What are the best ways to communicate with other personality types?")
-            
-            if 'enneagram' in context:
-                questions.append(f"How can I grow as an Enneagram Type {context['enneagram']['type']}?")
-                questions.append("What are healthy ways to manage my core fears?")
-            
-            if 'unified_profile' in context:
-                questions.append("How can I leverage my unique combination of traits?")
-                questions.append("What specific steps should I take for personal growth?")
-                questions.append("How can I become more of a 'superhuman' version of myself?")
-            
-            # Add general questions
-            questions.extend([
-                "What meditation practices work best for my personality?",
-                "How can I improve my relationships based on my personality?",
-                "What career paths align with my personality profile?"
-            ])
+        # Precomputed per archetype (MBTI, Enneagram, profile presence)
+        questions = quick_questions.get_quick_questions(context)
         
         return {
             "success": True,
-            "questions": questions[:8]  # Return max 8 questions
+            "questions": questions
         }
         
     except Exception as e:
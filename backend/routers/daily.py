@@ -1,33 +1,61 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
 from typing import Optional
 from datetime import date
 
 from models import DailyContentRequest, DailyContentResponse
 from services.profile_service import ProfileService
 from dependencies import get_profile_service
+from services.responses import make_etag, model_response, not_modified
 
 router = APIRouter(prefix="/api/daily", tags=["daily"])
 
+async def _revalidate_stored(
+    request: Request,
+    response: Response,
+    profile_service: ProfileService,
+    user_session: str,
+    target_date: str,
+    kind: str
+) -> Optional[Response]:
+    """304 straight from the stored content's id, before loading or generating it"""
+    if not request.headers.get("if-none-match"):
+        return None
+    content_id = await profile_service.get_daily_content_id(user_session, target_date)
+    if content_id is None:
+        return None
+    return not_modified(request, response, make_etag(kind, content_id))
+
 @router.get("/content/{user_session}", response_model=DailyContentResponse)
 async def get_daily_content(
     user_session: str,
+    request: Request,
+    response: Response,
     target_date: Optional[str] = None,
     focus_area: Optional[str] = None,
     profile_service: ProfileService = Depends(get_profile_service)
 ):
-    """Get personalized daily content"""
+    """Get personalized daily content (ETag / If-None-Match aware)"""
     
     try:
         if not target_date:
             target_date = date.today().isoformat()
         
+        cached = await _revalidate_stored(request, response, profile_service, user_session, target_date, "daily.content")
+        if cached:
+            return cached
+        
         result = await profile_service.generate_daily_content(
             user_session=user_session,
             target_date=target_date,
             focus_area=focus_area
         )
         
-        return DailyContentResponse(**result)
+        # Stored daily content is immutable, so its id identifies the body
+        cached = not_modified(request, response, make_etag("daily.content", result["content"].id))
+        if cached:
+            return cached
+        
+        return model_response(DailyContentResponse(**result), response)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating daily content: {str(e)}")
@@ -48,7 +76,7 @@ async def create_daily_content(
             focus_area=request.focus_area
         )
         
-        return DailyContentResponse(**result)
+        return model_response(DailyContentResponse(**result))
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating daily content: {str(e)}")
@@ -56,6 +84,8 @@ async def create_daily_content(
 @router.get("/horoscope/{user_session}")
 async def get_personalized_horoscope(
     user_session: str,
+    request: Request,
+    response: Response,
     target_date: Optional[str] = None,
     profile_service: ProfileService = Depends(get_profile_service)
 ):
@@ -65,6 +95,10 @@ async def get_personalized_horoscope(
         if not target_date:
             target_date = date.today().isoformat()
         
+        cached = await _revalidate_stored(request, response, profile_service, user_session, target_date, "daily.horoscope")
+        if cached:
+            return cached
+        
         # Get daily content which includes horoscope
         result = await profile_service.generate_daily_content(
             user_session=user_session,
@@ -74,6 +108,10 @@ async def get_personalized_horoscope(
         if not result["success"]:
             raise HTTPException(status_code=500, detail="Failed to generate horoscope")
         
+        cached = not_modified(request, response, make_etag("daily.horoscope", result["content"].id))
+        if cached:
+            return cached
+        
         return {
             "success": True,
             "horoscope": result["content"].horoscope,
@@ -90,6 +128,8 @@ async def get_personalized_horoscope(
 @router.get("/mantra/{user_session}")
 async def get_daily_mantra(
     user_session: str,
+    request: Request,
+    response: Response,
     target_date: Optional[str] = None,
     profile_service: ProfileService = Depends(get_profile_service)
 ):
@@ -99,6 +139,10 @@ async def get_daily_mantra(
         if not target_date:
             target_date = date.today().isoformat()
         
+        cached = await _revalidate_stored(request, response, profile_service, user_session, target_date, "daily.mantra")
+        if cached:
+            return cached
+        
         # Get daily content which includes mantra
         result = await profile_service.generate_daily_content(
             user_session=user_session,
@@ -108,6 +152,10 @@ async def get_daily_mantra(
         if not result["success"]:
             raise HTTPException(status_code=500, detail="Failed to generate mantra")
         
+        cached = not_modified(request, response, make_etag("daily.mantra", result["content"].id))
+        if cached:
+            return cached
+        
         return {
             "success": True,
             "mantra": result["content"].mantra,
@@ -123,6 +171,8 @@ async def get_daily_mantra(
 @router.get("/routine/{user_session}")
 async def get_micro_routine(
     user_session: str,
+    request: Request,
+    response: Response,
     target_date: Optional[str] = None,
     profile_service: ProfileService = Depends(get_profile_service)
 ):
@@ -132,6 +182,10 @@ async def get_micro_routine(
         if not target_date:
             target_date = date.today().isoformat()
         
+        cached = await _revalidate_stored(request, response, profile_service, user_session, target_date, "daily.routine")
+        if cached:
+            return cached
+        
         # Get daily content which includes micro-routine
         result = await profile_service.generate_daily_content(
             user_session=user_session,
@@ -141,6 +195,10 @@ async def get_micro_routine(
         if not result["success"]:
             raise HTTPException(status_code=500, detail="Failed to generate routine")
         
+        cached = not_modified(request, response, make_etag("daily.routine", result["content"].id))
+        if cached:
+            return cached
+        
         return {
             "success": True,
             "routine": result["content"].micro_routine.dict(),
@@ -156,6 +214,8 @@ async def get_micro_routine(
 @router.get("/meditation/{user_session}")
 async def get_daily_meditation(
     user_session: str,
+    request: Request,
+    response: Response,
     target_date: Optional[str] = None,
     profile_service: ProfileService = Depends(get_profile_service)
 ):
@@ -165,6 +225,10 @@ async def get_daily_meditation(
         if not target_date:
             target_date = date.today().isoformat()
         
+        cached = await _revalidate_stored(request, response, profile_service, user_session, target_date, "daily.meditation")
+        if cached:
+            return cached
+        
         # Get daily content which includes meditation
         result = await profile_service.generate_daily_content(
             user_session=user_session,
@@ -174,6 +238,10 @@ async def get_daily_meditation(
         if not result["success"]:
             raise HTTPException(status_code=500, detail="Failed to generate meditation")
         
+        cached = not_modified(request, response, make_etag("daily.meditation", result["content"].id))
+        if cached:
+            return cached
+        
         return {
             "success": True,
             "meditation": result["content"].meditation.dict(),
@@ -1,100 +1,321 @@
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File
-from typing import Optional
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
+from fastapi.responses import StreamingResponse
+from typing import List, Optional, Tuple
 from services.palmistry_service import PalmistryService
+from services.palmistry_queue import PalmistryJobQueue, TERMINAL_STATUSES
+from services.upload_stream import spool_multipart_file, UploadTooLargeError, InvalidUploadError
 from routers.auth import get_current_user_dependency
-from models import PalmistryResponse
-import base64
-from io import BytesIO
-from PIL import Image
-import json
-from dependencies import get_palmistry_service
+from models import PalmistryResponse, PalmScan
+from services.palm_features import build_preliminary_reading
+from services.responses import model_response
+import asyncio
+import os
+from dependencies import get_palmistry_service, get_palmistry_queue
 
 router = APIRouter(prefix="/api/palmistry", tags=["palmistry"])
 
+# How often an open status stream re-checks the database
+SSE_POLL_SECONDS = 5
+
+# Upload limits: bodies above the memory threshold are spooled to disk
+MAX_UPLOAD_BYTES = int(os.environ.get('PALM_UPLOAD_MAX_BYTES', str(10 * 1024 * 1024)))
+UPLOAD_MEMORY_BYTES = int(os.environ.get('PALM_UPLOAD_MEMORY_BYTES', str(1024 * 1024)))
+
 @router.post("/scan", response_model=PalmistryResponse)
 async def analyze_palm_scan(
     user_session: str,
     image_data: str,  # Base64 encoded image
     current_user: Optional[dict] = Depends(get_current_user_dependency),
-    palmistry_service: PalmistryService = Depends(get_palmistry_service)
+    palmistry_service: PalmistryService = Depends(get_palmistry_service),
+    palmistry_queue: PalmistryJobQueue = Depends(get_palmistry_queue)
 ):
-    """Analyze palm scan from camera image"""
+    """Queue palm scan from camera image for analysis"""
     
     try:
         user_id = current_user.get("id") if current_user else None
         
-        # For guests, require login after taking the scan
-        if not current_user:
-            return PalmistryResponse(
-                success=False,
-                analysis=None,
-                message="Please log in to get your palm reading results. Your scan has been saved and will be analyzed after login."
-            )
-        
-        response = await palmistry_service.analyze_palm_scan(
+        scan = await palmistry_service.create_palm_scan(
             user_session=user_session,
             user_id=user_id,
-            image_data=image_data
+            image_data=image_data,
+            status=_initial_status(current_user)
         )
         
-        return response
+        return model_response(await _queue_palm_scan(scan, current_user, palmistry_queue))
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Palm scan analysis failed: {str(e)}")
 
-@router.post("/upload", response_model=PalmistryResponse)
+@router.post(
+    "/upload",
+    response_model=PalmistryResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "required": ["file"],
+                        "properties": {"file": {"type": "string", "format": "binary"}}
+                    }
+                }
+            }
+        }
+    }
+)
 async def upload_palm_image(
     user_session: str,
-    file: UploadFile = File(...),
+    request: Request,
     current_user: Optional[dict] = Depends(get_current_user_dependency),
-    palmistry_service: PalmistryService = Depends(get_palmistry_service)
+    palmistry_service: PalmistryService = Depends(get_palmistry_service),
+    palmistry_queue: PalmistryJobQueue = Depends(get_palmistry_queue)
 ):
     """Upload palm image file for analysis"""
     
+    upload = None
     try:
-        user_id = current_user.get("id") if current_user else None
+        # Stream the body to a spooled buffer instead of reading it whole
+        upload = await spool_multipart_file(
+            request,
+            field_name="file",
+            max_bytes=MAX_UPLOAD_BYTES,
+            memory_bytes=UPLOAD_MEMORY_BYTES
+        )
         
         # Validate file type
-        if not file.content_type.startswith('image/'):
+        if not upload.content_type.startswith('image/'):
             raise HTTPException(status_code=400, detail="File must be an image")
         
-        # Read and convert image to base64
-        image_bytes = await file.read()
-        
-        # Optional: Resize image to reduce size
-        try:
-            image = Image.open(BytesIO(image_bytes))
-            # Resize if too large
-            if image.width > 1024 or image.height > 1024:
-                image.thumbnail((1024, 1024), Image.Resampling.LANCZOS)
-                buffer = BytesIO()
-                image.save(buffer, format=image.format)
-                image_bytes = buffer.getvalue()
-        except Exception as e:
-            print(f"Image processing warning: {str(e)}")
-        
-        # Convert to base64
-        image_base64 = base64.b64encode(image_bytes).decode()
-        image_data = f"data:{file.content_type};base64,{image_base64}"
-        
-        # For guests, require login after taking the scan
-        if not current_user:
-            return PalmistryResponse(
-                success=False,
-                analysis=None,
-                message="Please log in to get your palm reading results. Your image has been saved and will be analyzed after login."
-            )
+        user_id = current_user.get("id") if current_user else None
         
-        response = await palmistry_service.analyze_palm_scan(
+        # Resizing and previews are handled by the service in the worker pool
+        scan = await palmistry_service.create_palm_scan_from_source(
             user_session=user_session,
             user_id=user_id,
-            image_data=image_data
+            source=upload.source(),
+            content_type=upload.content_type,
+            status=_initial_status(current_user)
         )
         
-        return response
+        return model_response(await _queue_palm_scan(scan, current_user, palmistry_queue))
         
+    except UploadTooLargeError:
+        raise HTTPException(status_code=413, detail=f"Image must be smaller than {MAX_UPLOAD_BYTES // (1024 * 1024)} MB")
+    except InvalidUploadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Palm image upload failed: {str(e)}")
+    finally:
+        if upload:
+            upload.close()
+
+def _initial_status(current_user: Optional[dict]) -> str:
+    """Guest scans are kept and analyzed once the user logs in"""
+    return "queued" if current_user else "awaiting_login"
+
+async def _queue_palm_scan(
+    scan: Optional[PalmScan],
+    current_user: Optional[dict],
+    palmistry_queue: PalmistryJobQueue
+) -> PalmistryResponse:
+    """Queue a saved scan for analysis, or tell guests to log in first"""
+    
+    if not scan:
+        return PalmistryResponse(
+            success=False,
+            analysis=None,
+            message="Invalid image data provided"
+        )
+    
+    preliminary = build_preliminary_reading(scan.features) if scan.features else None
+    
+    if not current_user:
+        return PalmistryResponse(
+            success=False,
+            analysis=None,
+            message="Please log in to get your palm reading results. Your scan has been saved and will be analyzed after login.",
+            scan_id=scan.id,
+            status=scan.status,
+            preliminary=preliminary
+        )
+    
+    await palmistry_queue.enqueue(scan.id)
+    
+    return PalmistryResponse(
+        success=True,
+        analysis=None,
+        message="Palm scan queued for analysis",
+        scan_id=scan.id,
+        status=scan.status,
+        preliminary=preliminary
+    )
+
+@router.get("/scan/{scan_id}", response_model=PalmistryResponse)
+async def get_palm_scan_status(
+    scan_id: str,
+    user_session: str,
+    palmistry_service: PalmistryService = Depends(get_palmistry_service)
+):
+    """Get analysis status of a palm scan, with the result once completed"""
+    
+    try:
+        response = await palmistry_service.get_palm_scan_status(scan_id, user_session)
+        
+        if not response:
+            raise HTTPException(status_code=404, detail="Palm scan not found")
+        
+        return model_response(response)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get palm scan status: {str(e)}")
+
+@router.get("/scan/{scan_id}/events")
+async def stream_palm_scan_status(
+    scan_id: str,
+    user_session: str,
+    request: Request,
+    palmistry_service: PalmistryService = Depends(get_palmistry_service),
+    palmistry_queue: PalmistryJobQueue = Depends(get_palmistry_queue)
+):
+    """Server-sent events stream that reports status changes of a palm scan"""
+    
+    initial = await palmistry_service.get_palm_scan_status(scan_id, user_session)
+    if not initial:
+        raise HTTPException(status_code=404, detail="Palm scan not found")
+    
+    async def event_stream():
+        listener = palmistry_queue.subscribe(scan_id)
+        try:
+            response = initial
+            last_status = None
+            while True:
+                if response.status != last_status:
+                    last_status = response.status
+                    yield f"event: status\ndata: {response.json()}\n\n"
+                
+                if response.status in TERMINAL_STATUSES or await request.is_disconnected():
+                    break
+                
+                # Wake on local notifications; re-check periodically since
+                # another worker process may be handling the scan
+                try:
+                    await asyncio.wait_for(listener.get(), timeout=SSE_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                
+                response = await palmistry_service.get_palm_scan_status(scan_id, user_session)
+                if not response:
+                    break
+        finally:
+            palmistry_queue.unsubscribe(scan_id, listener)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/image/{scan_id}/{variant}")
+async def get_palm_image(
+    scan_id: str,
+    variant: str,
+    user_session: str,
+    request: Request,
+    palmistry_service: PalmistryService = Depends(get_palmistry_service)
+):
+    """Serve a stored palm image variant with strong ETags and byte-range support"""
+    
+    grid_out = await palmistry_service.open_scan_image(scan_id, variant, user_session)
+    if grid_out is None:
+        raise HTTPException(status_code=404, detail="Palm image not found")
+    
+    metadata = grid_out.metadata or {}
+    etag = f'"{metadata.get("etag", "")}"'
+    size = grid_out.length
+    headers = {
+        "ETag": etag,
+        # Variants never change once written, so clients can keep them
+        "Cache-Control": "private, max-age=31536000, immutable",
+        "Accept-Ranges": "bytes"
+    }
+    
+    if_none_match = _parse_etags(request.headers.get("if-none-match"))
+    if "*" in if_none_match or etag in if_none_match:
+        return Response(status_code=304, headers=headers)
+    
+    # Ignore the range if the client's copy is stale (If-Range mismatch)
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (not if_range or if_range == etag):
+        byte_range = _parse_byte_range(range_header, size)
+        if byte_range is None:
+            return Response(
+                status_code=416,
+                headers={**headers, "Content-Range": f"bytes */{size}"}
+            )
+        
+        start, end = byte_range
+        grid_out.seek(start)
+        data = await grid_out.read(end - start + 1)
+        return Response(
+            content=data,
+            status_code=206,
+            media_type=metadata.get("content_type", "image/jpeg"),
+            headers={**headers, "Content-Range": f"bytes {start}-{end}/{size}"}
+        )
+    
+    async def chunks():
+        # One GridFS chunk at a time instead of the whole variant in memory
+        while True:
+            chunk = await grid_out.readchunk()
+            if not chunk:
+                break
+            yield chunk
+    
+    return StreamingResponse(
+        chunks(),
+        media_type=metadata.get("content_type", "image/jpeg"),
+        headers={**headers, "Content-Length": str(size)}
+    )
+
+def _parse_etags(header: Optional[str]) -> List[str]:
+    """Parse an If-None-Match header into a list of etags"""
+    if not header:
+        return []
+    if header.strip() == "*":
+        return ["*"]
+    return [tag.strip().removeprefix("W/") for tag in header.split(",")]
+
+def _parse_byte_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single `bytes=start-end` range; None if unsatisfiable"""
+    
+    units, _, spec = header.partition("=")
+    if units.strip() != "bytes" or "," in spec:
+        return None
+    
+    start_text, _, end_text = spec.strip().partition("-")
+    try:
+        if not start_text:
+            # Suffix range: last N bytes
+            length = int(end_text)
+            if length <= 0:
+                return None
+            return max(size - length, 0), size - 1
+        
+        start = int(start_text)
+        end = int(end_text) if end_text else size - 1
+    except ValueError:
+        return None
+    
+    if start >= size or end < start:
+        return None
+    
+    return start, min(end, size - 1)
 
 @router.get("/history/{user_session}")
 async def get_palm_history(
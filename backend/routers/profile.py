@@ -1,16 +1,19 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
 from typing import Optional
 from datetime import date
 
 from models import ProfileSynthesisRequest, ProfileResponse, CustomMeditationRequest
 from services.profile_service import ProfileService
+from routers.auth import get_current_user_dependency
 from dependencies import get_profile_service
+from services.responses import FastJSONResponse, make_etag, model_response, not_modified
 
 router = APIRouter(prefix="/api/profile", tags=["profile"])
 
 @router.post("/synthesize", response_model=ProfileResponse)
 async def synthesize_profile(
     request: ProfileSynthesisRequest,
+    current_user: Optional[dict] = Depends(get_current_user_dependency),
     profile_service: ProfileService = Depends(get_profile_service)
 ):
     """Generate unified personality profile from completed tests"""
@@ -19,17 +22,23 @@ async def synthesize_profile(
         result = await profile_service.generate_unified_profile(
             user_session=request.user_session,
             user_goals=request.user_goals,
-            regenerate=request.regenerate
+            regenerate=request.regenerate,
+            is_premium=bool(current_user and current_user.get("is_premium"))
         )
         
-        return ProfileResponse(**result)
+        return model_response(ProfileResponse(**result))
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Profile synthesis failed: {str(e)}")
 
 @router.get("/unified/{user_session}", response_model=ProfileResponse)
-async def get_unified_profile(user_session: str, profile_service: ProfileService = Depends(get_profile_service)):
-    """Retrieve existing unified profile"""
+async def get_unified_profile(
+    user_session: str,
+    request: Request,
+    response: Response,
+    profile_service: ProfileService = Depends(get_profile_service)
+):
+    """Retrieve existing unified profile (ETag / If-None-Match aware)"""
     
     try:
         profile = await profile_service.get_unified_profile(user_session)
@@ -39,29 +48,34 @@ async def get_unified_profile(user_session: str, profile_service: ProfileService
             test_results = await profile_service.get_user_test_results(user_session)
             
             if not test_results:
-                return ProfileResponse(
+                return model_response(ProfileResponse(
                     success=False,
                     profile=None,
                     completion_percentage=0,
                     missing_tests=["mbti", "enneagram", "disc", "humanDesign"],
                     message="No test results found. Complete personality tests to generate your profile."
-                )
+                ))
             else:
-                return ProfileResponse(
+                return model_response(ProfileResponse(
                     success=False,
                     profile=None,
                     completion_percentage=profile_service._calculate_completion_percentage([r.test_id for r in test_results]),
                     missing_tests=profile_service._get_missing_tests([r.test_id for r in test_results]),
                     message="Profile not generated yet. Click 'Generate Profile' to create your unified blueprint."
-                )
+                ))
         
-        return ProfileResponse(
+        # A stored profile never changes; regenerating creates a new one
+        cached = not_modified(request, response, make_etag("profile", profile.id, profile.generated_at.isoformat()))
+        if cached:
+            return cached
+        
+        return model_response(ProfileResponse(
             success=True,
             profile=profile,
             completion_percentage=profile_service._calculate_completion_percentage(profile.source_tests),
             missing_tests=profile_service._get_missing_tests(profile.source_tests),
             message="Profile retrieved successfully"
-        )
+        ), response)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving profile: {str(e)}")
@@ -70,6 +84,7 @@ async def get_unified_profile(user_session: str, profile_service: ProfileService
 async def regenerate_profile(
     user_session: str,
     user_goals: Optional[str] = None,
+    current_user: Optional[dict] = Depends(get_current_user_dependency),
     profile_service: ProfileService = Depends(get_profile_service)
 ):
     """Regenerate unified profile with latest test data"""
@@ -78,10 +93,11 @@ async def regenerate_profile(
         result = await profile_service.generate_unified_profile(
             user_session=user_session,
             user_goals=user_goals,
-            regenerate=True
+            regenerate=True,
+            is_premium=bool(current_user and current_user.get("is_premium"))
         )
         
-        return ProfileResponse(**result)
+        return model_response(ProfileResponse(**result))
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Profile regeneration failed: {str(e)}")
@@ -92,10 +108,10 @@ async def get_user_stats(user_session: str, profile_service: ProfileService = De
     
     try:
         stats = await profile_service.get_user_stats(user_session)
-        return {
+        return FastJSONResponse({
             "success": True,
             "stats": stats
-        }
+        })
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving stats: {str(e)}")
@@ -167,11 +183,11 @@ async def export_user_data(user_session: str, profile_service: ProfileService =
     try:
         export_data = await profile_service.export_user_data(user_session)
         
-        return {
+        return FastJSONResponse({
             "success": True,
             "data": export_data,
             "message": "Data exported successfully"
-        }
+        })
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error exporting data: {str(e)}")
\ No newline at end of file
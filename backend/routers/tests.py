@@ -9,6 +9,7 @@ from services.ai_service import AIService
 from services.profile_service import ProfileService
 from models import TestResult
 from dependencies import get_profile_service
+from services.responses import model_response
 
 router = APIRouter(prefix="/api/tests", tags=["tests"])
 
@@ -63,12 +64,12 @@ async def submit_test(
         # Get recommendations for next steps
         next_recommendations = get_next_recommendations(test_id, user_session, profile_service)
         
-        return TestResultResponse(
+        return model_response(TestResultResponse(
             success=True,
             result=test_result,
             insights=insights,
             next_recommendations=await next_recommendations
-        )
+        ))
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing test: {str(e)}")
@@ -109,7 +110,8 @@ async def generate_test_analysis(test_result: TestResult, profile_service: Profi
             test_result.test_id,
             test_result.answers,
             test_result.raw_score,
-            test_result.result_type
+            test_result.result_type,
+            user_session=test_result.user_session
         )
         
         if ai_response["success"]:
@@ -1,4 +1,5 @@
 from fastapi import FastAPI, Depends, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
 from dotenv import load_dotenv
@@ -11,11 +12,21 @@ import dependencies
 # Import services
 from services.profile_service import ProfileService
 from services.auth_service import AuthService
-from services.chat_service import ChatService
+from services.chat_service import ChatService, ensure_chat_indexes
 from services.palmistry_service import PalmistryService
+from services.palmistry_queue import PalmistryJobQueue
+from services.worker_pool import shutdown_process_pool
+from services.quick_questions import load_quick_questions
+from services.llm_usage import usage_recorder
+from services.request_timing import RequestTimingMiddleware
+from services.responses import FastJSONResponse
+from services.compression import CompressionMiddleware
+from services.metrics import registry as metrics_registry, MetricsMiddleware
+from services.loop_monitor import loop_monitor
+from services.health import health_monitor
 
 # Import routers
-from routers import tests, profile, daily, auth, chat, palmistry, blueprint
+from routers import tests, profile, daily, auth, chat, palmistry, blueprint, admin
 
 # Load environment variables
 ROOT_DIR = Path(__file__).parent
@@ -45,9 +56,38 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logging.error(f"Failed to connect to MongoDB: {e}")
     
+    # Indexes backing keyset-paginated queries
+    try:
+        await ensure_chat_indexes(db)
+    except Exception as e:
+        logging.error(f"Failed to create indexes: {e}")
+    
+    # Quick-question suggestions, enriched by the offline batch job when available
+    enriched = await load_quick_questions(db)
+    logging.info(f"Loaded quick questions ({enriched} enriched archetypes)")
+    
+    # Periodic flush of LLM usage accounting
+    await usage_recorder.start(db)
+    
+    # Event loop lag for /metrics
+    await loop_monitor.start()
+    
+    # Start palm analysis workers
+    palmistry_queue = PalmistryJobQueue(db)
+    dependencies.set_palmistry_queue(palmistry_queue)
+    await palmistry_queue.start()
+    
+    # Dependency status for health probes, refreshed in the background
+    await health_monitor.start(client, palmistry_queue)
+    
     yield
     
     # Shutdown
+    await health_monitor.stop()
+    await palmistry_queue.stop()
+    await usage_recorder.stop()
+    await loop_monitor.stop()
+    shutdown_process_pool()
     if client:
         client.close()
 
@@ -56,7 +96,8 @@ app = FastAPI(
     title="Personal Blueprint AI API",
     description="AI-powered personality synthesis platform for creating personalized Operating Manuals",
     version="3.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
 # CORS middleware
@@ -68,6 +109,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# gzip/brotli for large JSON bodies (streams and images pass through)
+app.add_middleware(CompressionMiddleware)
+
+# Per-request stage timing (sampled logs, optional Server-Timing header); wraps compression, CORS and the app
+app.add_middleware(RequestTimingMiddleware)
+# Prometheus request metrics; added last so its latency covers every other layer
+app.add_middleware(MetricsMiddleware)
+
 # Dependencies to get service instances
 async def get_profile_service() -> ProfileService:
     return ProfileService(db)
@@ -89,25 +138,46 @@ app.include_router(daily.router)
 app.include_router(chat.router)
 app.include_router(palmistry.router)
 app.include_router(blueprint.router)
+app.include_router(admin.router)
 
-# Health check endpoint
+# Health check endpoints; dependency status comes from the background
+# health monitor, so probes never wait on MongoDB
 @app.get("/api/health")
 async def health_check():
     """Health check endpoint"""
-    try:
-        # Test database connection
-        await client.admin.command('ismaster')
-        db_status = "connected"
-    except Exception:
-        db_status = "disconnected"
-    
     return {
         "status": "healthy",
-        "database": db_status,
+        "database": health_monitor.status.get("database", {}).get("status", "unknown"),
         "service": "Superhuman Identity Puzzle API",
         "version": "2.0.0"
     }
 
+@app.get("/api/health/live")
+async def liveness():
+    """Liveness probe: the process is serving requests"""
+    return {"status": "alive"}
+
+@app.get("/api/health/ready")
+async def readiness():
+    """Readiness probe: 503 while a dependency this worker needs is down"""
+    ready, reasons = health_monitor.readiness()
+    age = health_monitor.age_seconds()
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else "not_ready",
+            "reasons": reasons,
+            "degraded": health_monitor.degraded(),
+            "checked_seconds_ago": round(age, 1) if age is not None else None,
+            **health_monitor.status
+        }
+    )
+
+# Prometheus scrape endpoint; outside /api so it is not routed publicly
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
+
 # Root endpoint
 @app.get("/api/")
 async def root():
@@ -146,7 +216,8 @@ async def get_user_summary(
     user_session: str, 
     request: Request,
     profile_service: ProfileService = Depends(dependencies.get_profile_service),
-    auth_service: AuthService = Depends(dependencies.get_auth_service)
+    auth_service: AuthService = Depends(dependencies.get_auth_service),
+    palmistry_service: PalmistryService = Depends(dependencies.get_palmistry_service)
 ):
     """Get summary of user's progress and data"""
     
@@ -171,30 +242,35 @@ async def get_user_summary(
         # Get stats
         stats = await profile_service.get_user_stats(user_session, user_id)
         
+        # Palm readings live outside test_results
+        completed_test_types = [r.test_id for r in test_results]
+        if await palmistry_service.get_latest_reading(user_session) and 'palmistry' not in completed_test_types:
+            completed_test_types.append('palmistry')
+        
         # Calculate puzzle pieces
         puzzle_pieces = []
-        for result in test_results:
-            if result.test_id == 'mbti':
+        for test_id in completed_test_types:
+            if test_id == 'mbti':
                 puzzle_pieces.append('Mental Architecture')
-            elif result.test_id == 'enneagram':
+            elif test_id == 'enneagram':
                 puzzle_pieces.append('Motivational Core')
-            elif result.test_id == 'disc':
+            elif test_id == 'disc':
                 puzzle_pieces.append('Behavioral Pattern')
-            elif result.test_id == 'humanDesign':
+            elif test_id == 'humanDesign':
                 puzzle_pieces.append('Energy Architecture')
-            elif result.test_id == 'palmistry':
+            elif test_id == 'palmistry':
                 puzzle_pieces.append('Ancient Wisdom')
         
         superhuman_progress = len(puzzle_pieces) / 5.0  # 5 total puzzle pieces
         
-        return {
+        return FastJSONResponse({
             "success": True,
             "summary": {
                 "user_session": user_session,
                 "user_id": user_id,
                 "authenticated": current_user is not None,
                 "tests_completed": len(test_results),
-                "completed_test_types": [r.test_id for r in test_results],
+                "completed_test_types": completed_test_types,
                 "profile_generated": profile is not None,
                 "profile_confidence": profile.confidence if profile else 0.0,
                 "last_activity": stats["last_activity"],
@@ -203,7 +279,7 @@ async def get_user_summary(
                 "superhuman_progress": superhuman_progress,
                 "superhuman_qualities_unlocked": int(superhuman_progress * 6)  # 6 total qualities
             }
-        }
+        })
         
     except Exception as e:
         return {
@@ -217,7 +293,8 @@ async def get_superhuman_progress(
     user_session: str,
     request: Request,
     profile_service: ProfileService = Depends(dependencies.get_profile_service),
-    auth_service: AuthService = Depends(dependencies.get_auth_service)
+    auth_service: AuthService = Depends(dependencies.get_auth_service),
+    palmistry_service: PalmistryService = Depends(dependencies.get_palmistry_service)
 ):
     """Get detailed superhuman evolution progress"""
     
@@ -252,6 +329,8 @@ async def get_superhuman_progress(
         ]
         
         completed_tests = [r.test_id for r in test_results]
+        if await palmistry_service.get_latest_reading(user_session):
+            completed_tests.append("palmistry")
         unlocked_puzzles = []
         
         for puzzle in all_puzzles:
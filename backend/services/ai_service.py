@@ -3,32 +3,35 @@ import json
 import uuid
 from typing import Dict, List, Optional, Any
 from datetime import datetime
-from emergentintegrations.llm.chat import LlmChat, UserMessage
+from models import ProfileSynthesisOutput, DailyContentOutput, MeditationOutput, TestAnalysisOutput
+from services.json_extract import parse_llm_json, LlmJsonError
+from services.llm_backends import llm_configured
+from services.llm_gateway import send_llm_message
+from services.prompt_compaction import compact_test_results
+from services.tokens import estimate_tokens, truncate_to_tokens
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Token budget for the profile synthesis prompt (system message included)
+PROFILE_PROMPT_TOKEN_BUDGET = int(os.environ.get('PROFILE_PROMPT_TOKEN_BUDGET', '2000'))
+
+# Size of the synthesis prompt around the test results and user goals
+SYNTHESIS_TEMPLATE_TOKENS = 450
+
+GOALS_MAX_TOKENS = 150
+
 class AIService:
     def __init__(self):
-        self.api_key = os.environ.get('EMERGENT_LLM_KEY')
-        if not self.api_key:
+        if not llm_configured():
             raise ValueError("EMERGENT_LLM_KEY not found in environment variables")
-            
-    def _create_chat(self, session_id: str, system_message: str) -> LlmChat:
-        """Create a new LLM chat instance"""
-        chat = LlmChat(
-            api_key=self.api_key,
-            session_id=session_id,
-            system_message=system_message
-        )
-        # Using gpt-4o-mini as default model
-        return chat.with_model("openai", "gpt-4o-mini")
     
     async def synthesize_personality_profile(
         self, 
         test_results: List[Dict], 
         user_session: str,
-        user_goals: Optional[str] = None
+        user_goals: Optional[str] = None,
+        is_premium: bool = False
     ) -> Dict[str, Any]:
         """Generate unified personality profile from multiple test results"""
         
@@ -50,23 +53,26 @@ CONFIDENCE SCORING:
 
 Always include source attribution for each insight."""
 
-        # Prepare test data summary
-        test_summary = []
-        for result in test_results:
-            test_info = {
-                "test_type": result.get("test_id"),
-                "result": result.get("result_type"),
-                "confidence": result.get("confidence", 0.7),
-                "key_traits": result.get("raw_score", {})
-            }
-            test_summary.append(test_info)
+        user_context = (
+            f"User goals/context: {truncate_to_tokens(user_goals, GOALS_MAX_TOKENS)}"
+            if user_goals else "No specific user goals provided."
+        )
         
-        user_context = f"User goals/context: {user_goals}" if user_goals else "No specific user goals provided."
+        # Test results get whatever the rest of the prompt leaves of the budget
+        test_budget = (
+            PROFILE_PROMPT_TOKEN_BUDGET
+            - estimate_tokens(system_message)
+            - estimate_tokens(user_context)
+            - SYNTHESIS_TEMPLATE_TOKENS
+        )
+        test_summary, dropped_tests = compact_test_results(test_results, test_budget)
+        if dropped_tests:
+            print(f"Profile synthesis prompt over budget, left out: {', '.join(dropped_tests)}")
         
         prompt = f"""Synthesize the following personality test results into a comprehensive profile:
 
-TEST RESULTS:
-{json.dumps(test_summary, indent=2)}
+TEST RESULTS (scores show the strongest dimensions):
+{test_summary}
 
 USER CONTEXT:
 {user_context}
@@ -82,23 +88,23 @@ IMPORTANT: Respond ONLY with valid JSON in exactly this format (no additional te
     "relationship_tips": "interpersonal advice with actionable steps for better relationships",
     "daily_micro_coaching": "one specific action they can take today to improve their life",
     "confidence": 0.85,
-    "reasoning_summary": "brief explanation of how these insights were derived and which test patterns were most influential",
-    "ai_model_used": "gpt-4o-mini"
+    "reasoning_summary": "brief explanation of how these insights were derived and which test patterns were most influential"
 }}
 
 Ensure all advice is practical, specific, and immediately actionable. Base confidence on consistency across test results (0.5-0.95 range)."""
 
         try:
-            chat = self._create_chat(f"profile_synthesis_{user_session}", system_message)
-            user_message = UserMessage(text=prompt)
-            response = await chat.send_message(user_message)
-            
-            # Parse JSON response
-            profile_data = json.loads(response.strip())
+            response = await send_llm_message(
+                "profile_synthesis", system_message, prompt,
+                session_id=f"profile_synthesis_{user_session}",
+                user_session=user_session,
+                premium=is_premium
+            )
             
-            # Remove source_tests if present (we'll set it separately)
-            if 'source_tests' in profile_data:
-                del profile_data['source_tests']
+            # Only the generated fields; source_tests is set by the caller
+            profile_data = parse_llm_json(response, ProfileSynthesisOutput)
+            # The model that answered, not whatever the output claims
+            profile_data["ai_model_used"] = response.model
             
             return {
                 "success": True,
@@ -106,7 +112,7 @@ Ensure all advice is practical, specific, and immediately actionable. Base confi
                 "generation_time": datetime.utcnow().isoformat()
             }
             
-        except json.JSONDecodeError as e:
+        except LlmJsonError as e:
             return {
                 "success": False,
                 "error": f"Failed to parse AI response as JSON: {str(e)}",
@@ -176,12 +182,13 @@ IMPORTANT: Respond ONLY with valid JSON in exactly this format (no additional te
 Make all content personally relevant, practical, and actionable for today. Ensure horoscope includes disclaimer about entertainment value."""
 
         try:
-            chat = self._create_chat(f"daily_content_{user_session}_{date}", system_message)
-            user_message = UserMessage(text=prompt)
-            response = await chat.send_message(user_message)
+            response = await send_llm_message(
+                "daily_content", system_message, prompt,
+                session_id=f"daily_content_{user_session}_{date}",
+                user_session=user_session
+            )
             
-            # Parse JSON response
-            daily_data = json.loads(response.strip())
+            daily_data = parse_llm_json(response, DailyContentOutput)
             
             return {
                 "success": True,
@@ -190,7 +197,7 @@ Make all content personally relevant, practical, and actionable for today. Ensur
                 "generation_time": datetime.utcnow().isoformat()
             }
             
-        except json.JSONDecodeError as e:
+        except LlmJsonError as e:
             return {
                 "success": False,
                 "error": f"Failed to parse daily content JSON: {str(e)}",
@@ -250,11 +257,13 @@ Generate JSON:
 Make the script ready for immediate use with clear guidance throughout."""
 
         try:
-            chat = self._create_chat(f"meditation_{user_session}_{focus_area}", system_message)
-            user_message = UserMessage(text=prompt)
-            response = await chat.send_message(user_message)
+            response = await send_llm_message(
+                "meditation", system_message, prompt,
+                session_id=f"meditation_{user_session}_{focus_area}",
+                user_session=user_session
+            )
             
-            meditation_data = json.loads(response.strip())
+            meditation_data = parse_llm_json(response, MeditationOutput)
             
             return {
                 "success": True,
@@ -262,7 +271,7 @@ Make the script ready for immediate use with clear guidance throughout."""
                 "generation_time": datetime.utcnow().isoformat()
             }
             
-        except json.JSONDecodeError as e:
+        except LlmJsonError as e:
             return {
                 "success": False,
                 "error": f"Failed to parse meditation JSON: {str(e)}",
@@ -280,7 +289,8 @@ Make the script ready for immediate use with clear guidance throughout."""
         test_id: str,
         answers: Dict[str, Any],
         raw_score: Dict[str, Any],
-        result_type: str
+        result_type: str,
+        user_session: Optional[str] = None
     ) -> Dict[str, Any]:
         """Generate AI-powered analysis of individual test results"""
         
@@ -325,11 +335,13 @@ Provide JSON analysis:
 Make insights practical and immediately useful."""
 
         try:
-            chat = self._create_chat(f"test_analysis_{test_id}", system_message)
-            user_message = UserMessage(text=prompt)
-            response = await chat.send_message(user_message)
+            response = await send_llm_message(
+                "test_analysis", system_message, prompt,
+                session_id=f"test_analysis_{user_session}_{test_id}",
+                user_session=user_session
+            )
             
-            analysis_data = json.loads(response.strip())
+            analysis_data = parse_llm_json(response, TestAnalysisOutput)
             
             return {
                 "success": True,
@@ -4,6 +4,7 @@ from typing import Optional, Dict, Any
 from datetime import datetime, timedelta
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from models import User, UserSession, AuthResponse
+from services.context_cache import invalidate_user_context
 from fastapi import HTTPException
 import uuid
 
@@ -172,6 +173,9 @@ class AuthService:
                 {"$set": {"user_id": user_id}}
             )
             
+            # Cached chat context was built for the anonymous user
+            await invalidate_user_context(self.db, user_session)
+            
             return True
             
         except Exception as e:
@@ -0,0 +1,48 @@
+from typing import Any, Dict, Optional, Union, BinaryIO
+from motor.motor_asyncio import AsyncIOMotorDatabase, AsyncIOMotorGridFSBucket, AsyncIOMotorGridOut
+import gridfs
+
+class BlobStore:
+    """Binary object storage backed by MongoDB GridFS.
+
+    Blobs are addressed by a string key (e.g. "palm/<scan_id>/thumbnail") and
+    carry a metadata dict with at least `content_type` and `etag`.
+    """
+
+    def __init__(self, db: AsyncIOMotorDatabase, bucket_name: str = "blobs"):
+        self.db = db
+        self.bucket_name = bucket_name
+        self._bucket: Optional[AsyncIOMotorGridFSBucket] = None
+
+    @property
+    def bucket(self) -> AsyncIOMotorGridFSBucket:
+        # Created on first use; services holding a store are built per request
+        if self._bucket is None:
+            self._bucket = AsyncIOMotorGridFSBucket(self.db, bucket_name=self.bucket_name)
+        return self._bucket
+
+    async def put(self, key: str, source: Union[bytes, BinaryIO], metadata: Dict[str, Any]):
+        """Store a blob under key, replacing any existing blob"""
+        await self.delete(key)
+        await self.bucket.upload_from_stream_with_id(key, key, source, metadata=metadata)
+
+    async def open(self, key: str) -> Optional[AsyncIOMotorGridOut]:
+        """Open a blob for reading; supports seek() for range requests"""
+        try:
+            return await self.bucket.open_download_stream(key)
+        except gridfs.errors.NoFile:
+            return None
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """Read a whole blob into memory"""
+        grid_out = await self.open(key)
+        if grid_out is None:
+            return None
+        return await grid_out.read()
+
+    async def delete(self, key: str):
+        """Delete a blob if it exists"""
+        try:
+            await self.bucket.delete(key)
+        except gridfs.errors.NoFile:
+            pass
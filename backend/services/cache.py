@@ -0,0 +1,78 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional
+from services.metrics import registry
+
+cache_hits = registry.counter("cache_hits_total", "In-process cache hits", ["cache"])
+cache_misses = registry.counter("cache_misses_total", "In-process cache misses", ["cache"])
+cache_entries = registry.gauge("cache_entries", "In-process cache entries", ["cache"])
+cache_hit_ratio = registry.gauge("cache_hit_ratio", "In-process cache hit ratio since start", ["cache"])
+
+# Every cache created in this process, for metrics
+CACHES: List["TTLCache"] = []
+
+class TTLCache:
+    """Small in-process LRU cache with per-entry expiry.
+
+    Each worker process has its own copy, so entries are kept short-lived and
+    writers invalidate the keys they change.
+    """
+
+    def __init__(self, name: str, max_size: int = 10000, ttl_seconds: float = 300):
+        self.name = name
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        CACHES.append(self)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired"""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None):
+        """Store a value, evicting the least recently used entry when full"""
+        expires_at = time.monotonic() + (ttl_seconds if ttl_seconds is not None else self.ttl_seconds)
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        """Drop a single entry"""
+        self._entries.pop(key, None)
+
+    def clear(self):
+        """Drop all entries"""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for monitoring"""
+        total = self.hits + self.misses
+        return {
+            "name": self.name,
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0
+        }
+
+def _collect_cache_metrics():
+    for cache in CACHES:
+        stats = cache.stats()
+        cache_hits.set_total(stats["hits"], cache=cache.name)
+        cache_misses.set_total(stats["misses"], cache=cache.name)
+        cache_entries.set(stats["size"], cache=cache.name)
+        cache_hit_ratio.set(stats["hit_ratio"], cache=cache.name)
+
+registry.add_collector(_collect_cache_metrics)
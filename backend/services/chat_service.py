@@ -1,19 +1,56 @@
-from typing import List, Dict, Any, Optional
+from typing import Dict, Any, Literal, Optional, Tuple
 from datetime import datetime
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from emergentintegrations.llm.chat import LlmChat, UserMessage
+from services.llm_gateway import send_llm_message
 from models import ChatMessage, ChatRequest, ChatResponse, TestResult, UnifiedProfile
 from services.ai_service import AIService
+from services.palmistry_service import PalmistryService
+from services.context_cache import get_cached_context, get_context_version, set_cached_context
+from services.conversation_memory import ConversationMemory
+from services.tokens import estimate_tokens, truncate_to_tokens
 import json
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Token budget for one chat prompt (system message + history + question)
+PROMPT_TOKEN_BUDGET = int(os.environ.get('CHAT_PROMPT_TOKEN_BUDGET', '3000'))
+
+# Longest user message sent verbatim; the rest of the budget goes to history
+MESSAGE_MAX_TOKENS = 500
+
+# Chat history page sizes
+DEFAULT_HISTORY_PAGE_SIZE = 50
+MAX_HISTORY_PAGE_SIZE = 200
+
+# Fields returned for list views of the chat history
+HISTORY_LIST_PROJECTION = {"_id": 0, "id": 1, "message": 1, "response": 1, "timestamp": 1, "context_tests": 1}
+
+def encode_history_cursor(message: Dict[str, Any]) -> str:
+    """Opaque cursor for a chat message: its timestamp and id"""
+    return f"{message['timestamp'].isoformat()}|{message['id']}"
+
+def decode_history_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Parse a cursor from encode_history_cursor; raises ValueError if malformed"""
+    timestamp, sep, message_id = cursor.partition("|")
+    if not sep or not message_id:
+        raise ValueError(f"Invalid history cursor: {cursor}")
+    return datetime.fromisoformat(timestamp), message_id
+
+async def ensure_chat_indexes(db: AsyncIOMotorDatabase):
+    """Create the index backing paginated chat history"""
+    await db.chat_messages.create_index(
+        [("user_session", 1), ("timestamp", -1), ("id", -1)],
+        name="chat_history_keyset"
+    )
+
 class ChatService:
     def __init__(self, db: AsyncIOMotorDatabase):
         self.db = db
         self.ai_service = AIService()
+        self.palmistry_service = PalmistryService(db)
+        self.memory = ConversationMemory(db)
         self.api_key = os.environ.get('EMERGENT_LLM_KEY')
         
     async def process_chat_message(
@@ -21,24 +58,28 @@ class ChatService:
         user_session: str,
         user_id: Optional[str],
         message: str,
-        include_context: bool = True
+        include_context: bool = True,
+        is_premium: bool = False
     ) -> ChatResponse:
         """Process chat message with personality context"""
         
         try:
             # Get user's personality context if requested
             context_data = {}
+            context_summary = self._build_context_summary({})
             context_tests = []
             
             if include_context:
-                context_data = await self._get_user_context(user_session, user_id)
+                context_data, context_summary = await self.get_user_context_with_summary(user_session, user_id)
                 context_tests = list(context_data.keys())
             
             # Generate AI response
             ai_response = await self._generate_chat_response(
                 message, 
                 context_data,
-                user_session
+                user_session,
+                context_summary,
+                is_premium
             )
             
             if not ai_response["success"]:
@@ -57,11 +98,14 @@ class ChatService:
                 message=message,
                 response=ai_response["response"],
                 context_tests=context_tests,
-                ai_model_used="gpt-4o-mini"
+                ai_model_used=ai_response["model"]
             )
             
             await self._save_chat_message(chat_message)
             
+            # Fold this turn into conversation memory after the reply is sent
+            self.memory.schedule_update(user_session, message, ai_response["response"])
+            
             return ChatResponse(
                 success=True,
                 message=message,
@@ -79,9 +123,39 @@ class ChatService:
                 context_used=[]
             )
     
+    async def get_user_context_with_summary(
+        self,
+        user_session: str,
+        user_id: Optional[str]
+    ) -> Tuple[Dict[str, Any], str]:
+        """Get personality context and its prompt summary, served from cache when possible"""
+        
+        # Read before loading, so a write landing mid-load leaves the entry stale
+        version = await get_context_version(self.db, user_session)
+        cached = get_cached_context(user_session, user_id, version)
+        if cached:
+            return cached["context"], cached["summary"]
+        
+        context = await self._load_user_context(user_session, user_id)
+        
+        # Failed loads are served empty but not cached
+        if context is None:
+            return {}, self._build_context_summary({})
+        
+        summary = self._build_context_summary(context)
+        set_cached_context(user_session, user_id, version, context, summary)
+        
+        return context, summary
+    
     async def _get_user_context(self, user_session: str, user_id: Optional[str]) -> Dict[str, Any]:
         """Get user's personality context from completed tests and profile"""
         
+        context, _ = await self.get_user_context_with_summary(user_session, user_id)
+        return context
+    
+    async def _load_user_context(self, user_session: str, user_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Load user's personality context from completed tests and profile; None on error"""
+        
         context = {}
         
         try:
@@ -113,17 +187,45 @@ class ChatService:
                     "confidence": profile_doc.get("confidence", 0.0)
                 }
             
+            # Latest palm reading summary (cached, no scan/result lookups)
+            palm_reading = await self.palmistry_service.get_latest_reading(user_session)
+            if palm_reading:
+                context["palmistry"] = {
+                    "type": "Palm reading",
+                    "confidence": palm_reading["confidence"],
+                    "completed_at": palm_reading["analysis_date"],
+                    "key_insights": "; ".join(palm_reading["key_traits"])
+                }
+            
             return context
             
         except Exception as e:
             print(f"Error getting user context: {str(e)}")
-            return {}
+            return None
+    
+    def _build_context_summary(self, context: Dict[str, Any]) -> str:
+        """Condense personality context into the summary used in chat prompts"""
+        
+        context_summary = "No personality data available yet."
+        if context:
+            context_summary = f"User has completed: {', '.join(context.keys())}"
+            if 'unified_profile' in context:
+                profile = context['unified_profile']
+                context_summary += f"\n\nKey traits: {', '.join(profile.get('strengths', [])[:3])}"
+                context_summary += f"\nCommunication style: {profile.get('communication_style', 'Unknown')}"
+                context_summary += f"\nMotivation: {profile.get('motivation_levers', 'Unknown')}"
+            if 'palmistry' in context:
+                context_summary += f"\nPalm reading (entertainment): {context['palmistry']['key_insights']}"
+        
+        return context_summary
     
     async def _generate_chat_response(
         self, 
         message: str, 
         context: Dict[str, Any],
-        user_session: str
+        user_session: str,
+        context_summary: Optional[str] = None,
+        is_premium: bool = False
     ) -> Dict[str, Any]:
         """Generate AI chat response with personality context"""
         
@@ -147,14 +249,11 @@ PERSONALITY CONTEXT AVAILABLE:
 Always provide helpful, personalized responses that help the user grow and understand themselves better."""
 
         # Prepare context summary for the prompt
-        context_summary = "No personality data available yet."
-        if context:
-            context_summary = f"User has completed: {', '.join(context.keys())}"
-            if 'unified_profile' in context:
-                profile = context['unified_profile']
-                context_summary += f"\n\nKey traits: {', '.join(profile.get('strengths', [])[:3])}"
-                context_summary += f"\nCommunication style: {profile.get('communication_style', 'Unknown')}"
-                context_summary += f"\nMotivation: {profile.get('motivation_levers', 'Unknown')}"
+        if context_summary is None:
+            context_summary = self._build_context_summary(context)
+        
+        system_message = system_message.format(context=context_summary)
+        message = truncate_to_tokens(message, MESSAGE_MAX_TOKENS)
         
         prompt = f"""The user asks: "{message}"
 
@@ -169,19 +268,25 @@ Provide a helpful, personalized response that:
 
 Keep responses conversational but insightful, typically 2-4 paragraphs."""
 
+        # Whatever the fixed parts leave of the budget goes to conversation history
+        memory = await self.memory.load(user_session)
+        history_budget = PROMPT_TOKEN_BUDGET - estimate_tokens(system_message) - estimate_tokens(prompt) - 10
+        history = self.memory.build_history(memory, history_budget)
+        if history:
+            prompt = f"CONVERSATION SO FAR:\n{history}\n\n{prompt}"
+
         try:
-            chat = LlmChat(
-                api_key=self.api_key,
+            response = await send_llm_message(
+                "chat", system_message, prompt,
                 session_id=f"chat_{user_session}",
-                system_message=system_message.format(context=context_summary)
-            ).with_model("openai", "gpt-4o-mini")
-            
-            user_message = UserMessage(text=prompt)
-            response = await chat.send_message(user_message)
+                user_session=user_session,
+                premium=is_premium
+            )
             
             return {
                 "success": True,
                 "response": response.strip(),
+                "model": response.model,
                 "confidence": 0.85 if context else 0.7
             }
             
@@ -203,25 +308,60 @@ Keep responses conversational but insightful, typically 2-4 paragraphs."""
         self, 
         user_session: str,
         user_id: Optional[str] = None,
-        limit: int = 50
-    ) -> List[ChatMessage]:
-        """Get chat history for user"""
+        limit: int = DEFAULT_HISTORY_PAGE_SIZE,
+        before: Optional[str] = None,
+        after: Optional[str] = None,
+        view: Literal["list", "full"] = "full"
+    ) -> Dict[str, Any]:
+        """Get one page of chat history in chronological order.
+        
+        Pages are keyed on (timestamp, id): `before` returns the messages just
+        older than a cursor, `after` the ones just newer; with neither, the
+        latest page. Raises ValueError for a malformed cursor.
+        """
+        
+        if before and after:
+            raise ValueError("Use either before or after, not both")
+        
+        limit = max(1, min(limit, MAX_HISTORY_PAGE_SIZE))
+        query: Dict[str, Any] = {"user_session": user_session}
+        if user_id:
+            query["user_id"] = user_id
+        
+        # Newer pages are read oldest-first from the cursor, everything else newest-first
+        direction = 1 if after else -1
+        cursor = before or after
+        if cursor:
+            timestamp, message_id = decode_history_cursor(cursor)
+            op = "$gt" if after else "$lt"
+            query["$or"] = [
+                {"timestamp": {op: timestamp}},
+                {"timestamp": timestamp, "id": {op: message_id}}
+            ]
+        
+        projection = HISTORY_LIST_PROJECTION if view == "list" else {"_id": 0}
         
         try:
-            query = {"user_session": user_session}
-            if user_id:
-                query["user_id"] = user_id
-            
-            cursor = self.db.chat_messages.find(query).sort("timestamp", -1).limit(limit)
-            messages = await cursor.to_list(length=limit)
-            
-            # Convert to ChatMessage objects and reverse for chronological order
-            chat_messages = [ChatMessage(**msg) for msg in reversed(messages)]
-            return chat_messages
-            
+            # One extra row tells us whether another page exists
+            messages = await self.db.chat_messages.find(query, projection).sort(
+                [("timestamp", direction), ("id", direction)]
+            ).limit(limit + 1).to_list(length=limit + 1)
         except Exception as e:
             print(f"Error getting chat history: {str(e)}")
-            return []
+            messages = []
+        
+        has_more = len(messages) > limit
+        messages = messages[:limit]
+        if direction == -1:
+            messages.reverse()
+        
+        return {
+            "messages": messages,
+            "has_more": has_more,
+            # Cursors for the neighbouring pages, relative to this one
+            "before": encode_history_cursor(messages[0]) if messages else before,
+            "after": encode_history_cursor(messages[-1]) if messages else after
+        }
     
     async def delete_chat_history(self, user_session: str, user_id: Optional[str] = None) -> bool:
         """Delete all chat history for user"""
@@ -232,6 +372,7 @@ Keep responses conversational but insightful, typically 2-4 paragraphs."""
                 query["user_id"] = user_id
                 
             result = await self.db.chat_messages.delete_many(query)
+            await self.memory.clear(user_session)
             return result.deleted_count > 0
             
         except Exception as e:
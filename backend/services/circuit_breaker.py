@@ -0,0 +1,129 @@
+"""
+Circuit breaker
+
+Tracks the outcome of recent calls to an upstream. When the error rate
+over the window crosses the threshold the circuit opens and calls are
+rejected immediately (CircuitOpenError), so callers serve their fallbacks
+without waiting for the upstream to fail. After `open_seconds` the circuit
+goes half-open and lets one trial request through every
+`probe_interval_seconds`; a success closes it, a failure reopens it.
+
+Every state change bumps `generation`. Callers read it when a call starts
+and pass it back with the result, so a slow call that started before the
+circuit opened cannot close it while it is probing (or reopen it once it
+has closed again).
+"""
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit is open"""
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        error_rate_threshold: float = 0.5,
+        min_requests: int = 10,
+        window_seconds: float = 30,
+        open_seconds: float = 30,
+        probe_interval_seconds: float = 5
+    ):
+        self.name = name
+        self.error_rate_threshold = error_rate_threshold
+        self.min_requests = min_requests
+        self.window_seconds = window_seconds
+        self.open_seconds = open_seconds
+        self.probe_interval_seconds = probe_interval_seconds
+
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.last_probe_at = 0.0
+        self.times_opened = 0
+        self.rejected = 0
+        self.generation = 0
+        self._outcomes: Deque[Tuple[float, bool]] = deque()
+
+    def allow_request(self) -> bool:
+        """Whether a call may go upstream now"""
+
+        now = time.monotonic()
+        if self.state == OPEN and now - self.opened_at >= self.open_seconds:
+            self.state = HALF_OPEN
+            self.generation += 1
+
+        if self.state == CLOSED:
+            return True
+
+        if self.state == HALF_OPEN and now - self.last_probe_at >= self.probe_interval_seconds:
+            self.last_probe_at = now
+            return True
+
+        self.rejected += 1
+        return False
+
+    def check(self):
+        """Raise CircuitOpenError unless a call may go upstream"""
+        if not self.allow_request():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+
+    def record_success(self, generation: Optional[int] = None):
+        if self._stale(generation):
+            return
+        if self.state == HALF_OPEN:
+            self._close()
+            return
+        self._add_outcome(True)
+
+    def record_failure(self, generation: Optional[int] = None):
+        if self._stale(generation):
+            return
+        if self.state == HALF_OPEN:
+            self._open()
+            return
+        self._add_outcome(False)
+
+        if self.state == CLOSED and len(self._outcomes) >= self.min_requests:
+            failures = sum(1 for _, success in self._outcomes if not success)
+            if failures / len(self._outcomes) >= self.error_rate_threshold:
+                self._open()
+
+    def _stale(self, generation: Optional[int]) -> bool:
+        """Whether the call started before the last state change"""
+        return generation is not None and generation != self.generation
+
+    def _add_outcome(self, success: bool):
+        now = time.monotonic()
+        self._outcomes.append((now, success))
+        while self._outcomes and self._outcomes[0][0] < now - self.window_seconds:
+            self._outcomes.popleft()
+
+    def _open(self):
+        self.state = OPEN
+        self.generation += 1
+        self.opened_at = time.monotonic()
+        self.times_opened += 1
+        self._outcomes.clear()
+        print(f"Circuit {self.name} opened")
+
+    def _close(self):
+        self.state = CLOSED
+        self.generation += 1
+        self._outcomes.clear()
+        print(f"Circuit {self.name} closed")
+
+    def stats(self) -> Dict[str, Any]:
+        failures = sum(1 for _, success in self._outcomes if not success)
+        return {
+            "name": self.name,
+            "state": self.state,
+            "window_requests": len(self._outcomes),
+            "window_error_rate": failures / len(self._outcomes) if self._outcomes else 0.0,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected
+        }
@@ -0,0 +1,154 @@
+"""
+Response compression
+
+Compresses complete JSON and text responses above a size threshold with
+brotli when the client accepts it, gzip otherwise. `brotli` is in
+requirements.txt; an install without it still runs but compresses with
+gzip only, and says so once at startup. Streamed responses (palm scan SSE) and
+images pass through untouched: a stream has to reach the client as each
+event is written, and JPEG/PNG are already compressed.
+
+A compressed body is a different representation, so a strong ETag gets
+the encoding appended ("abc" -> "abc-gzip"); `strip_encoding` undoes
+that when a revalidation comes back.
+
+    COMPRESSION_MIN_BYTES   smallest body worth compressing (default 1024)
+    GZIP_LEVEL              gzip level (default 6)
+    BROTLI_QUALITY          brotli quality (default 5)
+"""
+import gzip
+import logging
+import os
+from typing import Dict, Optional
+from starlette.datastructures import Headers, MutableHeaders
+
+logger = logging.getLogger(__name__)
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+    logger.warning("brotli is not installed; responses are compressed with gzip only")
+
+MIN_BYTES = int(os.environ.get('COMPRESSION_MIN_BYTES', '1024'))
+GZIP_LEVEL = int(os.environ.get('GZIP_LEVEL', '6'))
+BROTLI_QUALITY = int(os.environ.get('BROTLI_QUALITY', '5'))
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript")
+
+ENCODINGS = ("br", "gzip")
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """'"abc"' -> '"abc-gzip"'; weak tags already cover every encoding"""
+    if etag.startswith("W/") or not etag.endswith('"'):
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+def strip_encoding(etag: str) -> str:
+    """Undo `encoded_etag`"""
+    for encoding in ENCODINGS:
+        suffix = f'-{encoding}"'
+        if etag.endswith(suffix):
+            return etag[:-len(suffix)] + '"'
+    return etag
+
+def _accepted_encodings(accept_encoding: str) -> Dict[str, float]:
+    """"gzip, br;q=0.8" -> {"gzip": 1.0, "br": 0.8}"""
+    encodings = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            encodings[name.lower()] = quality
+    return encodings
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    encodings = _accepted_encodings(accept_encoding)
+    if brotli is not None and encodings.get("br", 0) > 0:
+        return "br"
+    if encodings.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+class CompressionMiddleware:
+    """ASGI middleware compressing complete, compressible response bodies"""
+
+    def __init__(self, app, minimum_size: int = MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        encoding = choose_encoding(request_headers.get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start_message, passthrough
+            if message["type"] == "http.response.start":
+                if message["status"] == 304:
+                    # Echo the tag the client holds, i.e. the one its 200 carried
+                    headers = MutableHeaders(raw=message["headers"])
+                    if "etag" in headers:
+                        etag = encoded_etag(headers["etag"], encoding)
+                        if etag in request_headers.get("if-none-match", ""):
+                            headers["ETag"] = etag
+                    await send(message)
+                    passthrough = True
+                    return
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                passthrough = (
+                    "content-encoding" in headers
+                    or not content_type.startswith(COMPRESSIBLE_TYPES)
+                    or content_type.startswith("text/event-stream")
+                )
+                if passthrough:
+                    await send(message)
+                else:
+                    # Held until the body shows whether to compress
+                    start_message = message
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            if start_message is not None:
+                start, start_message = start_message, None
+                headers = MutableHeaders(raw=start["headers"])
+                headers.add_vary_header("Accept-Encoding")
+                body = message.get("body", b"")
+                if not message.get("more_body", False) and len(body) >= self.minimum_size:
+                    body = compress(body, encoding)
+                    headers["Content-Encoding"] = encoding
+                    headers["Content-Length"] = str(len(body))
+                    if "etag" in headers:
+                        headers["ETag"] = encoded_etag(headers["etag"], encoding)
+                    message = {**message, "body": body}
+                else:
+                    # Small or streamed: send as is
+                    passthrough = True
+                await send(start)
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
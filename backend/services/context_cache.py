@@ -0,0 +1,58 @@
+import os
+from typing import Any, Dict, Optional
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+from services.cache import TTLCache
+
+# Prebuilt chat context per user session. Writers that change anything the
+# context is built from (test results, profiles, palm readings, ownership)
+# call invalidate_user_context so the next chat turn rebuilds it.
+#
+# The cache is per process, so invalidation also bumps a version stamp in
+# the context_versions collection; entries remember the version they were
+# built at and are ignored once it moves, which keeps every uvicorn worker
+# consistent. The stamp itself is cached for a few seconds, so a warm chat
+# turn makes no query; a write in another worker shows up here within
+# CONTEXT_VERSION_TTL_SECONDS, and immediately in the worker that wrote it.
+chat_context_cache = TTLCache("chat_context", max_size=10000, ttl_seconds=900)
+context_version_cache = TTLCache(
+    "context_version",
+    max_size=10000,
+    ttl_seconds=float(os.environ.get('CONTEXT_VERSION_TTL_SECONDS', '5'))
+)
+
+async def get_context_version(db: AsyncIOMotorDatabase, user_session: str) -> int:
+    """Current context version of a session (0 until first invalidated)"""
+    version = context_version_cache.get(user_session)
+    if version is None:
+        doc = await db.context_versions.find_one({"_id": user_session})
+        version = doc["version"] if doc else 0
+        context_version_cache.set(user_session, version)
+    return version
+
+def get_cached_context(user_session: str, user_id: Optional[str], version: int) -> Optional[Dict[str, Any]]:
+    """Get cached context entry ({"context", "summary"}) for a session"""
+    entry = chat_context_cache.get(user_session)
+    if entry is None or entry["user_id"] != user_id or entry["version"] != version:
+        return None
+    return entry
+
+def set_cached_context(user_session: str, user_id: Optional[str], version: int, context: Dict[str, Any], summary: str):
+    """Cache the context dict and its prompt summary, built at `version`"""
+    chat_context_cache.set(user_session, {
+        "user_id": user_id,
+        "version": version,
+        "context": context,
+        "summary": summary
+    })
+
+async def invalidate_user_context(db: AsyncIOMotorDatabase, user_session: str):
+    """Drop the cached context after a write affecting the session, in every process"""
+    chat_context_cache.invalidate(user_session)
+    doc = await db.context_versions.find_one_and_update(
+        {"_id": user_session},
+        {"$inc": {"version": 1}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    context_version_cache.set(user_session, doc["version"])
@@ -0,0 +1,213 @@
+import asyncio
+import os
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Any, Dict, List, Set
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+from services.llm_gateway import send_llm_message
+from services.tokens import estimate_tokens, truncate_to_tokens
+
+# Number of most recent turns kept verbatim; older turns are folded into the summary
+RECENT_TURNS = int(os.environ.get('CHAT_MEMORY_RECENT_TURNS', '6'))
+
+# Upper bound for the rolling summary itself
+SUMMARY_MAX_TOKENS = 300
+
+# Per-turn cap so one long answer can't crowd out the rest of the history
+TURN_MAX_TOKENS = 250
+
+class _SessionLock:
+    """A lock plus the number of tasks holding or waiting for it"""
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.users = 0
+
+class ConversationMemory:
+    """Per-session chat memory: a rolling summary plus the last few turns.
+
+    Stored in the `chat_memory` collection (one document per user session)
+    and updated in the background after each reply, so the reply itself
+    never waits on summarization. Updates are atomic in MongoDB, so
+    several worker processes can record turns for the same session, and
+    every turn reads the document afresh (one _id lookup) rather than a
+    per-process copy that other workers can't invalidate.
+    """
+
+    # Background updates in flight, kept referenced until they finish
+    _pending: Set[asyncio.Task] = set()
+    # Serializes writes per session within this process, so clear() can
+    # shut them out; entries are dropped once nobody holds or waits for them
+    _locks: Dict[str, _SessionLock] = {}
+    # Sessions whose overflow this process is summarizing right now
+    _folding: Set[str] = set()
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.db = db
+
+    async def load(self, user_session: str) -> Dict[str, Any]:
+        """Get memory for a session ({"summary", "turns"})"""
+
+        try:
+            doc = await self.db.chat_memory.find_one({"_id": user_session}, {"summary": 1, "turns": 1})
+        except Exception as e:
+            # Chat still works without history
+            print(f"Error loading conversation memory: {str(e)}")
+            return {"summary": "", "turns": []}
+
+        return {
+            "summary": doc.get("summary", "") if doc else "",
+            "turns": doc.get("turns", []) if doc else []
+        }
+
+    def build_history(self, memory: Dict[str, Any], max_tokens: int) -> str:
+        """Render memory for the prompt within a token budget.
+
+        Recent turns are kept newest-first until the budget runs out; the
+        summary gets whatever budget remains.
+        """
+
+        if max_tokens <= 0:
+            return ""
+
+        lines: List[str] = []
+        used = 0
+        for turn in reversed(memory.get("turns", [])):
+            text = (
+                f"User: {truncate_to_tokens(turn['message'], TURN_MAX_TOKENS // 2)}\n"
+                f"Coach: {truncate_to_tokens(turn['response'], TURN_MAX_TOKENS)}"
+            )
+            cost = estimate_tokens(text)
+            if used + cost > max_tokens:
+                break
+            lines.insert(0, text)
+            used += cost
+
+        parts = []
+        summary = memory.get("summary", "")
+        remaining = max_tokens - used
+        if summary and remaining > 20:
+            parts.append(f"Earlier in this conversation: {truncate_to_tokens(summary, remaining - 10)}")
+        if lines:
+            parts.append("Recent messages:\n" + "\n\n".join(lines))
+
+        return "\n\n".join(parts)
+
+    def schedule_update(self, user_session: str, message: str, response: str):
+        """Record a finished turn in the background"""
+
+        task = asyncio.create_task(
+            self.record_turn(user_session, message, response),
+            name=f"chat_memory:{user_session}"
+        )
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    @asynccontextmanager
+    async def _session_lock(self, user_session: str):
+        entry = self._locks.get(user_session)
+        if entry is None:
+            entry = self._locks[user_session] = _SessionLock()
+        entry.users += 1
+        try:
+            async with entry.lock:
+                yield
+        finally:
+            entry.users -= 1
+            if entry.users == 0:
+                del self._locks[user_session]
+
+    async def record_turn(self, user_session: str, message: str, response: str):
+        """Append a turn and fold turns beyond the recent window into the summary"""
+
+        try:
+            turn = {"id": str(uuid.uuid4()), "message": message, "response": response}
+            async with self._session_lock(user_session):
+                doc = await self.db.chat_memory.find_one_and_update(
+                    {"_id": user_session},
+                    {
+                        "$push": {"turns": turn},
+                        "$set": {"updated_at": datetime.utcnow()},
+                        "$setOnInsert": {"summary": "", "summary_revision": 0}
+                    },
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER
+                )
+
+            turns = doc.get("turns", [])
+            if len(turns) > RECENT_TURNS and user_session not in self._folding:
+                self._folding.add(user_session)
+                try:
+                    await self._fold_overflow(user_session, doc, turns[:-RECENT_TURNS])
+                finally:
+                    self._folding.discard(user_session)
+
+        except Exception as e:
+            print(f"Error updating conversation memory: {str(e)}")
+
+    async def _fold_overflow(self, user_session: str, doc: Dict[str, Any], overflow: List[Dict[str, Any]]):
+        """Summarize the oldest turns and remove them, unless another worker got there first"""
+
+        # The summary call runs without the lock; the revision check below
+        # discards it if the memory moved on (or was cleared) meanwhile
+        revision = doc.get("summary_revision", 0)
+        summary = await self._summarize(user_session, doc.get("summary", ""), overflow)
+
+        # Compare-and-swap on the revision; $pull removes exactly the folded
+        # turns, so turns pushed meanwhile by other workers are kept
+        async with self._session_lock(user_session):
+            await self.db.chat_memory.update_one(
+                {"_id": user_session, "summary_revision": revision if revision else {"$in": [0, None]}},
+                {
+                    "$set": {"summary": summary, "updated_at": datetime.utcnow()},
+                    "$inc": {"summary_revision": 1},
+                    "$pull": {"turns": {"$in": overflow}}
+                }
+            )
+
+    async def clear(self, user_session: str):
+        """Forget the conversation for a session"""
+
+        # Let scheduled updates land first, and hold the lock against any
+        # still running, so neither can write the memory back afterwards
+        pending = [task for task in self._pending if task.get_name() == f"chat_memory:{user_session}"]
+        await asyncio.gather(*pending, return_exceptions=True)
+        async with self._session_lock(user_session):
+            await self.db.chat_memory.delete_one({"_id": user_session})
+
+    async def _summarize(self, user_session: str, summary: str, turns: List[Dict[str, str]]) -> str:
+        """Merge older turns into the rolling summary"""
+
+        transcript = "\n".join(
+            f"User: {truncate_to_tokens(t['message'], 100)}\nCoach: {truncate_to_tokens(t['response'], 150)}"
+            for t in turns
+        )
+
+        prompt = f"""Update the running summary of a coaching conversation.
+
+CURRENT SUMMARY:
+{summary or "(none)"}
+
+NEW MESSAGES:
+{transcript}
+
+Write the updated summary in at most {SUMMARY_MAX_TOKENS * 3 // 4} words. Keep the user's goals, concerns, decisions and any advice already given. Output only the summary."""
+
+        try:
+            response = await send_llm_message(
+                "chat_memory_summary",
+                "You condense conversations into short factual summaries.",
+                prompt,
+                session_id=f"chat_memory_{id(turns)}",
+                user_session=user_session
+            )
+            return truncate_to_tokens(response.strip(), SUMMARY_MAX_TOKENS)
+
+        except Exception as e:
+            print(f"Conversation summarization failed: {str(e)}")
+            # Keep the user's side of the conversation if the model is unavailable
+            asked = "; ".join(truncate_to_tokens(t["message"], 30) for t in turns)
+            merged = f"{summary} The user also asked about: {asked}." if summary else f"The user asked about: {asked}."
+            return truncate_to_tokens(merged, SUMMARY_MAX_TOKENS)
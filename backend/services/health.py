@@ -0,0 +1,115 @@
+"""
+Health status for liveness and readiness probes
+
+Dependency checks (MongoDB ping, LLM circuit, palm queue, event loop lag)
+run in a background task every few seconds; probes read the last result,
+so they answer in O(1) and orchestrator probing adds no load to MongoDB.
+
+    HEALTH_REFRESH_SECONDS      check interval (default 5)
+    HEALTH_DB_TIMEOUT_SECONDS   MongoDB ping timeout (default 2)
+    READY_MAX_QUEUE_BACKLOG     not ready above this many queued palm scans (default 200)
+
+Readiness fails when MongoDB is unreachable, the palm queue backlog is over
+the limit, its workers have died or the checks themselves have stopped
+refreshing. An open LLM circuit is reported but does not fail readiness:
+every worker shares the upstream, and non-LLM endpoints still work.
+"""
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from services.llm_gateway import llm_breaker
+from services.loop_monitor import loop_monitor
+from services.circuit_breaker import CLOSED
+
+logger = logging.getLogger(__name__)
+
+REFRESH_SECONDS = float(os.environ.get('HEALTH_REFRESH_SECONDS', '5'))
+DB_TIMEOUT_SECONDS = float(os.environ.get('HEALTH_DB_TIMEOUT_SECONDS', '2'))
+MAX_QUEUE_BACKLOG = int(os.environ.get('READY_MAX_QUEUE_BACKLOG', '200'))
+
+class HealthMonitor:
+    def __init__(self, refresh_seconds: float = REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self.status: Dict[str, Any] = {}
+        self._checked_at: Optional[float] = None
+        self._client = None
+        self._queue = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, client, queue=None):
+        """Run the first check before serving, then refresh in the background"""
+        self._client = client
+        self._queue = queue
+        await self.refresh()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.refresh_seconds)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Health check failed: {e}")
+
+    async def _check_database(self) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._client.admin.command('ping'), DB_TIMEOUT_SECONDS)
+            return {"status": "connected", "latency_ms": round((time.perf_counter() - started) * 1000, 1)}
+        except Exception as e:
+            return {"status": "disconnected", "error": str(e) or type(e).__name__}
+
+    def _check_queue(self) -> Optional[Dict[str, Any]]:
+        if self._queue is None:
+            return None
+        return {
+            "backlog": self._queue.backlog,
+            "workers_alive": self._queue.workers_alive,
+            "workers": self._queue.worker_count
+        }
+
+    async def refresh(self):
+        circuit = llm_breaker.stats()
+        self.status = {
+            "database": await self._check_database(),
+            "llm_circuit": circuit["state"],
+            "palmistry_queue": self._check_queue(),
+            "event_loop": loop_monitor.stats(),
+            "checked_at": datetime.utcnow().isoformat()
+        }
+        self._checked_at = time.monotonic()
+
+    def age_seconds(self) -> Optional[float]:
+        if self._checked_at is None:
+            return None
+        return time.monotonic() - self._checked_at
+
+    def readiness(self) -> Tuple[bool, List[str]]:
+        """Whether this worker should receive traffic, and why not"""
+        reasons = []
+        age = self.age_seconds()
+        if age is None or age > 3 * self.refresh_seconds:
+            reasons.append("health checks are not refreshing")
+        if self.status.get("database", {}).get("status") != "connected":
+            reasons.append("database unreachable")
+        queue = self.status.get("palmistry_queue")
+        if queue:
+            if queue["backlog"] > MAX_QUEUE_BACKLOG:
+                reasons.append(f"palm queue backlog {queue['backlog']} over {MAX_QUEUE_BACKLOG}")
+            if queue["workers_alive"] < queue["workers"]:
+                reasons.append("palm queue workers stopped")
+        return not reasons, reasons
+
+    def degraded(self) -> bool:
+        return self.status.get("llm_circuit", CLOSED) != CLOSED
+
+health_monitor = HealthMonitor()
@@ -0,0 +1,71 @@
+"""
+Palm image derivatives
+
+Pure functions that run in the process pool (see services/worker_pool.py):
+the original is capped at 1024px and smaller renditions are produced once
+at upload time so history views never download the full image.
+"""
+import hashlib
+from io import BytesIO
+from typing import Dict, Any, Union
+from PIL import Image, ImageOps
+
+# Longest edge in pixels for each stored variant
+ORIGINAL_MAX_SIZE = 1024
+DERIVATIVE_SIZES = {
+    "medium": 512,
+    "thumbnail": 160
+}
+
+VARIANTS = ("original",) + tuple(DERIVATIVE_SIZES.keys())
+
+def _encode(image: Image.Image, image_format: str) -> bytes:
+    buffer = BytesIO()
+    if image_format == "JPEG":
+        image.convert("RGB").save(buffer, format="JPEG", quality=82, optimize=True, progressive=True)
+    else:
+        image.save(buffer, format=image_format)
+    return buffer.getvalue()
+
+def _variant(data: bytes, content_type: str, image: Image.Image) -> Dict[str, Any]:
+    return {
+        "data": data,
+        "content_type": content_type,
+        "width": image.width,
+        "height": image.height,
+        "size": len(data),
+        "etag": hashlib.sha256(data).hexdigest()[:32]
+    }
+
+def generate_derivatives(source: Union[bytes, str], content_type: str) -> Dict[str, Dict[str, Any]]:
+    """Build the original (capped) and smaller renditions of an uploaded palm image.
+
+    `source` is either the image bytes or a path to a spooled upload, so large
+    uploads are read straight from disk by the worker process.
+    """
+
+    image = Image.open(BytesIO(source) if isinstance(source, bytes) else source)
+    image_format = image.format or "JPEG"
+    # The bytes decide the type, not what the client declared
+    original_type = Image.MIME.get(image_format, content_type)
+    image = ImageOps.exif_transpose(image)
+
+    variants = {}
+
+    # Keep the upload untouched unless it exceeds the size cap
+    if image.width > ORIGINAL_MAX_SIZE or image.height > ORIGINAL_MAX_SIZE:
+        image.thumbnail((ORIGINAL_MAX_SIZE, ORIGINAL_MAX_SIZE), Image.Resampling.LANCZOS)
+        variants["original"] = _variant(_encode(image, image_format), original_type, image)
+    else:
+        if not isinstance(source, bytes):
+            with open(source, "rb") as f:
+                source = f.read()
+        variants["original"] = _variant(source, original_type, image)
+
+    # Derivatives are always JPEG, they only serve as previews
+    for name, max_size in DERIVATIVE_SIZES.items():
+        derivative = image.copy()
+        derivative.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+        variants[name] = _variant(_encode(derivative, "JPEG"), "image/jpeg", derivative)
+
+    return variants
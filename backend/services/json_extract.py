@@ -0,0 +1,262 @@
+"""
+Tolerant JSON extraction for LLM responses
+
+Models wrap JSON in prose or code fences, leave trailing commas, emit
+Python literals or stop mid-object. `parse_llm_json` finds the first
+balanced JSON value in a response, repairs those issues, completes
+truncated output where possible and optionally validates it against a
+pydantic model. `IncrementalJsonParser` does the same for a growing
+stream so partial results can be rendered before the response finishes;
+nothing streams LLM output through the gateway yet, so for now only the
+benchmarks use it.
+"""
+import json
+import re
+from typing import Any, List, Optional, Tuple, Type
+from pydantic import BaseModel, ValidationError
+
+class LlmJsonError(ValueError):
+    """No usable JSON could be extracted from an LLM response"""
+
+_CLOSERS = {"{": "}", "[": "]"}
+
+_PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+_SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "‘": "'", "’": "'"})
+
+_WORD = re.compile(r"[A-Za-z]+")
+
+_CLOSING_AHEAD = re.compile(r"\s*(?:[}\]]|$)")
+
+class _Scanner:
+    """Incremental bracket/string scanner over a JSON value in a text buffer.
+
+    Tracks open containers and string state, and records "cut points":
+    positions where everything before is a complete prefix of the value
+    (right after an opening bracket, or just before a comma).
+    """
+
+    def __init__(self, opener: str = "{", pos: int = 0):
+        self.opener = opener
+        self.start: Optional[int] = None
+        self.end: Optional[int] = None
+        self.pos = pos
+        self.stack: List[str] = []
+        self.in_string = False
+        self.escape = False
+        self.cuts: List[Tuple[int, Tuple[str, ...]]] = []
+
+    def scan(self, text: str):
+        if self.end is not None:
+            return
+        if self.start is None:
+            self.start = text.find(self.opener, self.pos)
+            if self.start == -1:
+                self.start = None
+                self.pos = len(text)
+                return
+            self.pos = self.start
+
+        for i in range(self.pos, len(text)):
+            c = text[i]
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif c == "\\":
+                    self.escape = True
+                elif c == '"':
+                    self.in_string = False
+                continue
+
+            if c == '"':
+                self.in_string = True
+            elif c in _CLOSERS:
+                self.stack.append(_CLOSERS[c])
+                self.cuts.append((i + 1, tuple(self.stack)))
+            elif c in "}]":
+                if self.stack:
+                    self.stack.pop()
+                if not self.stack:
+                    self.end = i + 1
+                    self.pos = i + 1
+                    return
+            elif c == ",":
+                self.cuts.append((i, tuple(self.stack)))
+
+        self.pos = len(text)
+
+    def completions(self, text: str) -> List[str]:
+        """Candidate closings of a truncated value, most complete first"""
+        body = text[self.start:self.pos]
+        candidates = []
+
+        if self.in_string:
+            trimmed = body[:-1] if self.escape else body
+            candidates.append(trimmed + '"' + "".join(reversed(self.stack)))
+        else:
+            candidates.append(body.rstrip().rstrip(",:") + "".join(reversed(self.stack)))
+
+        # Cut back to the last complete members
+        for cut, stack in reversed(self.cuts[-5:]):
+            candidates.append(text[self.start:cut] + "".join(reversed(stack)))
+
+        return candidates
+
+def _repair(candidate: str) -> str:
+    """Drop trailing commas, map Python literals to JSON and escape raw newlines/tabs in strings"""
+
+    out = []
+    in_string = False
+    escape = False
+    i = 0
+    while i < len(candidate):
+        c = candidate[i]
+        if in_string:
+            if escape:
+                escape = False
+            elif c == "\\":
+                escape = True
+            elif c == '"':
+                in_string = False
+            elif c == "\n":
+                c = "\\n"
+            elif c == "\t":
+                c = "\\t"
+            elif c == "\r":
+                c = ""
+            out.append(c)
+            i += 1
+            continue
+
+        if c == '"':
+            in_string = True
+        elif c == ",":
+            # Drop a comma that only precedes whitespace and a closing bracket
+            if _CLOSING_AHEAD.match(candidate, i + 1):
+                i += 1
+                continue
+        elif c.isalpha():
+            word = _WORD.match(candidate, i).group(0)
+            out.append(_PYTHON_LITERALS.get(word, word))
+            i += len(word)
+            continue
+
+        out.append(c)
+        i += 1
+
+    return "".join(out)
+
+def _loads(candidate: str) -> Any:
+    """json.loads, then with repairs, then with smart quotes normalized"""
+    try:
+        return json.loads(candidate)
+    except json.JSONDecodeError:
+        pass
+    try:
+        return json.loads(_repair(candidate))
+    except json.JSONDecodeError:
+        pass
+    return json.loads(_repair(candidate.translate(_SMART_QUOTES)))
+
+def _validate(data: Any, schema: Optional[Type[BaseModel]]) -> Any:
+    if schema is None:
+        return data
+    try:
+        return schema(**data).dict()
+    except (ValidationError, TypeError) as e:
+        raise LlmJsonError(f"LLM JSON does not match {schema.__name__}: {str(e)}")
+
+def extract_json(text: str, expect: type = dict) -> Any:
+    """First balanced JSON object (or array with expect=list) in text"""
+
+    if not text:
+        raise LlmJsonError("Empty LLM response")
+
+    # Fast path: the whole response is the JSON we want
+    try:
+        data = json.loads(text)
+        if isinstance(data, expect):
+            return data
+    except json.JSONDecodeError:
+        pass
+
+    opener = "[" if expect is list else "{"
+    scanner = _Scanner(opener)
+    scanner.scan(text)
+    if scanner.start is None:
+        raise LlmJsonError("No JSON found in LLM response")
+
+    while scanner.start is not None:
+        candidates = [text[scanner.start:scanner.end]] if scanner.end is not None else scanner.completions(text)
+        for candidate in candidates:
+            try:
+                data = _loads(candidate)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(data, expect):
+                return data
+
+        # A bracketed aside in prose ("Here {x} is...") isn't the JSON;
+        # keep looking after it. A truncated value runs to the end.
+        if scanner.end is None:
+            break
+        scanner = _Scanner(opener, scanner.end)
+        scanner.scan(text)
+
+    raise LlmJsonError("Could not parse JSON from LLM response")
+
+def parse_llm_json(text: str, schema: Optional[Type[BaseModel]] = None, expect: type = dict) -> Any:
+    """Extract JSON from an LLM response and validate it against a pydantic model.
+
+    Returns the validated data as a plain dict (or the raw JSON without a
+    schema); raises LlmJsonError if nothing usable is found.
+    """
+    return _validate(extract_json(text, expect), schema)
+
+class IncrementalJsonParser:
+    """Parse a JSON object from a response that arrives in chunks.
+
+    `feed()` returns the best-effort partial object once it changes: open
+    strings and containers are closed where the text stops, and a member
+    that cannot be closed yet is left out. `result()` parses and validates
+    the final response like `parse_llm_json`.
+    """
+
+    def __init__(self, schema: Optional[Type[BaseModel]] = None):
+        self.schema = schema
+        self.text = ""
+        self._scanner = _Scanner("{")
+        self._last: Optional[Any] = None
+
+    def feed(self, chunk: str) -> Optional[Any]:
+        self.text += chunk
+        partial = self.snapshot()
+        if partial is None or partial == self._last:
+            return None
+        self._last = partial
+        return partial
+
+    def snapshot(self) -> Optional[Any]:
+        self._scanner.scan(self.text)
+        if self._scanner.start is None:
+            return None
+        if self._scanner.end is not None:
+            candidates = [self.text[self._scanner.start:self._scanner.end]]
+        else:
+            candidates = self._scanner.completions(self.text)
+
+        for candidate in candidates:
+            try:
+                data = _loads(candidate)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(data, dict):
+                return data
+        return None
+
+    @property
+    def complete(self) -> bool:
+        return self._scanner.end is not None
+
+    def result(self) -> Any:
+        return parse_llm_json(self.text, self.schema)
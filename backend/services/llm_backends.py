@@ -0,0 +1,303 @@
+"""
+LLM backends
+
+The gateway (services/llm_gateway.py) sends every request through the
+backend selected by LLM_BACKEND:
+
+- "emergent" (default): the Emergent LLM SDK, needs EMERGENT_LLM_KEY
+- "fake": a local stand-in that answers each endpoint with schema-valid
+  output after a simulated delay, for load tests and benchmarks without
+  network access or a key
+
+The fake backend is deterministic for a given seed: the same prompt gets
+the same answer, and a run of calls sees the same latencies and errors.
+
+    FAKE_LLM_LATENCY_MS       median time to first token (default 800)
+    FAKE_LLM_LATENCY_SIGMA    spread of the lognormal latency (default 0.5)
+    FAKE_LLM_TOKENS_PER_SECOND  streaming speed after the first token (default 60, 0 = instant)
+    FAKE_LLM_ERROR_RATE       fraction of calls that fail (default 0)
+    FAKE_LLM_SEED             seed for latencies, errors and content (default 0)
+"""
+import asyncio
+import json
+import math
+import os
+import random
+import zlib
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+from services.tokens import CHARS_PER_TOKEN
+
+DEFAULT_PROVIDER = "openai"
+
+class LlmBackend:
+    """Sends one prompt to a model"""
+
+    name = "base"
+
+    async def send(
+        self,
+        endpoint: str,
+        model: str,
+        system_message: str,
+        text: str,
+        session_id: str,
+        images_base64: Optional[List[str]] = None
+    ) -> str:
+        raise NotImplementedError
+
+    async def stream(
+        self,
+        endpoint: str,
+        model: str,
+        system_message: str,
+        text: str,
+        session_id: str,
+        images_base64: Optional[List[str]] = None
+    ) -> AsyncIterator[str]:
+        """Response chunks as they arrive; backends without streaming yield the whole response"""
+        yield await self.send(endpoint, model, system_message, text, session_id, images_base64)
+
+    def configured(self) -> bool:
+        return True
+
+class EmergentBackend(LlmBackend):
+    name = "emergent"
+
+    def configured(self) -> bool:
+        return bool(os.environ.get('EMERGENT_LLM_KEY'))
+
+    async def send(
+        self,
+        endpoint: str,
+        model: str,
+        system_message: str,
+        text: str,
+        session_id: str,
+        images_base64: Optional[List[str]] = None
+    ) -> str:
+        # Imported here so the fake backend runs without the SDK installed
+        from emergentintegrations.llm.chat import LlmChat, UserMessage, ImageContent
+
+        chat = LlmChat(
+            api_key=os.environ.get('EMERGENT_LLM_KEY'),
+            session_id=session_id,
+            system_message=system_message
+        ).with_model(DEFAULT_PROVIDER, model)
+
+        message = UserMessage(
+            text=text,
+            file_contents=[ImageContent(image_base64=image) for image in images_base64]
+        ) if images_base64 else UserMessage(text=text)
+
+        return await chat.send_message(message)
+
+class FakeLlmError(Exception):
+    """Simulated upstream failure"""
+
+_WORDS = (
+    "you focus energy clear steady practice growth notice small daily habit calm "
+    "strength people trust plan reflect balance curious direct thoughtful value "
+    "progress patient honest build learn listen rest structure creative goal"
+).split()
+
+def _text(rng: random.Random, words: int) -> str:
+    sentence = " ".join(rng.choice(_WORDS) for _ in range(words))
+    return sentence[0].upper() + sentence[1:] + "."
+
+def _items(rng: random.Random, count: int, words: int = 8) -> List[str]:
+    return [_text(rng, words) for _ in range(count)]
+
+def _profile_synthesis(rng: random.Random) -> Any:
+    return {
+        "strengths": _items(rng, 4, 12),
+        "challenges": _items(rng, 3, 12),
+        "communication_style": _text(rng, 40),
+        "career_guidance": _text(rng, 50),
+        "study_tactics": _text(rng, 40),
+        "motivation_levers": _text(rng, 40),
+        "relationship_tips": _text(rng, 40),
+        "daily_micro_coaching": _text(rng, 20),
+        "confidence": round(rng.uniform(0.6, 0.9), 2),
+        "reasoning_summary": _text(rng, 30)
+    }
+
+def _daily_content(rng: random.Random) -> Any:
+    return {
+        "horoscope": _text(rng, 90) + " For entertainment only.",
+        "mantra": _text(rng, 8),
+        "micro_routine": {
+            "name": _text(rng, 3),
+            "duration": "5 minutes",
+            "description": _text(rng, 20),
+            "steps": _items(rng, 5)
+        },
+        "meditation": {
+            "title": _text(rng, 4),
+            "duration": "6 minutes",
+            "script": _text(rng, 250)
+        }
+    }
+
+def _meditation(rng: random.Random) -> Any:
+    return {
+        "title": _text(rng, 4),
+        "duration": "10 minutes",
+        "script": " [pause] ".join(_items(rng, 20, 15)),
+        "techniques_used": _items(rng, 3, 3),
+        "personality_adaptations": _text(rng, 25)
+    }
+
+def _test_analysis(rng: random.Random) -> Any:
+    return {
+        "insights": _text(rng, 170),
+        "key_implications": _items(rng, 4),
+        "actionable_next_steps": _items(rng, 4),
+        "confidence_level": round(rng.uniform(0.6, 0.9), 2),
+        "source_attribution": "based on personality assessment",
+        "disclaimer": "For self-reflection, not a clinical assessment."
+    }
+
+def _palm_reading(rng: random.Random) -> Any:
+    return {
+        "life_line": {"length": "long", "depth": "deep", "meaning": _text(rng, 20),
+                      "health_indicators": _items(rng, 2, 5)},
+        "heart_line": {"curve": "curved", "ending": "between index and middle finger",
+                       "meaning": _text(rng, 20), "relationship_traits": _items(rng, 3, 4)},
+        "head_line": {"length": "medium", "slope": "curved", "meaning": _text(rng, 20),
+                      "cognitive_traits": _items(rng, 3, 4)},
+        "fate_line": {"presence": "faint", "start_point": "base of the palm",
+                      "meaning": _text(rng, 20), "career_indicators": _items(rng, 2, 4)},
+        "personality_traits": _items(rng, 5),
+        "life_predictions": _items(rng, 5),
+        "confidence": round(rng.uniform(0.6, 0.9), 2)
+    }
+
+def _blueprint_synthesis(rng: random.Random) -> Any:
+    sections = ["coreTraits", "work", "relationships", "daily"]
+    data: Dict[str, Any] = {section: "\n\n".join(_items(rng, 3, 60)) for section in sections}
+    data.update({
+        "strengths": _items(rng, 6, 3),
+        "challenges": _items(rng, 4, 3),
+        "attributions": {section: ["Profile data", "Test results"] for section in sections},
+        "confidence": {section: rng.choice(["High", "Medium", "Low"]) for section in sections},
+        "evidenceLabel": {section: rng.choice(["Evidence-Based", "Mixed", "Esoteric"]) for section in sections}
+    })
+    return data
+
+def _quick_questions(rng: random.Random) -> Any:
+    return [_text(rng, 9).rstrip(".") + "?" for _ in range(8)]
+
+# Endpoints answered with JSON; anything else (chat, summaries) gets prose
+FAKE_RESPONSES: Dict[str, Callable[[random.Random], Any]] = {
+    "profile_synthesis": _profile_synthesis,
+    "daily_content": _daily_content,
+    "meditation": _meditation,
+    "test_analysis": _test_analysis,
+    "palm_reading": _palm_reading,
+    "blueprint_synthesis": _blueprint_synthesis,
+    "quick_questions_batch": _quick_questions
+}
+
+# Prose length by endpoint, in words
+FAKE_TEXT_WORDS = {"chat": 120, "chat_memory_summary": 60}
+
+class FakeLlmBackend(LlmBackend):
+    """Local stand-in with simulated latency, streaming and failures"""
+
+    name = "fake"
+
+    def __init__(
+        self,
+        latency_ms: float = 800,
+        latency_sigma: float = 0.5,
+        tokens_per_second: float = 60,
+        error_rate: float = 0.0,
+        seed: int = 0
+    ):
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.seed = seed
+        # Latencies and errors follow call order, so a sequential run replays exactly
+        self._rng = random.Random(seed)
+        self.calls = 0
+
+    def response_for(self, endpoint: str, system_message: str, text: str) -> str:
+        """Deterministic response for a prompt"""
+
+        rng = random.Random(zlib.crc32(f"{self.seed}|{endpoint}|{system_message}|{text}".encode()))
+        build = FAKE_RESPONSES.get(endpoint)
+        if build:
+            return json.dumps(build(rng), indent=2)
+        return _text(rng, FAKE_TEXT_WORDS.get(endpoint, 80))
+
+    def first_token_seconds(self) -> float:
+        """Lognormal latency around the configured median"""
+        return self.latency_ms / 1000 * math.exp(self._rng.gauss(0, self.latency_sigma))
+
+    async def stream(
+        self,
+        endpoint: str,
+        model: str,
+        system_message: str,
+        text: str,
+        session_id: str,
+        images_base64: Optional[List[str]] = None
+    ) -> AsyncIterator[str]:
+        self.calls += 1
+        delay = self.first_token_seconds()
+        fail = self._rng.random() < self.error_rate
+
+        await asyncio.sleep(delay)
+        if fail:
+            raise FakeLlmError(f"Simulated {model} failure for {endpoint}")
+
+        response = self.response_for(endpoint, system_message, text)
+        if not self.tokens_per_second:
+            yield response
+            return
+
+        # One chunk per token, paced at the configured rate
+        for start in range(0, len(response), CHARS_PER_TOKEN):
+            yield response[start:start + CHARS_PER_TOKEN]
+            await asyncio.sleep(1 / self.tokens_per_second)
+
+    async def send(
+        self,
+        endpoint: str,
+        model: str,
+        system_message: str,
+        text: str,
+        session_id: str,
+        images_base64: Optional[List[str]] = None
+    ) -> str:
+        chunks = []
+        async for chunk in self.stream(endpoint, model, system_message, text, session_id, images_base64):
+            chunks.append(chunk)
+        return "".join(chunks)
+
+def create_backend(name: Optional[str] = None) -> LlmBackend:
+    name = name or os.environ.get('LLM_BACKEND', 'emergent')
+    if name == "fake":
+        return FakeLlmBackend(
+            latency_ms=float(os.environ.get('FAKE_LLM_LATENCY_MS', '800')),
+            latency_sigma=float(os.environ.get('FAKE_LLM_LATENCY_SIGMA', '0.5')),
+            tokens_per_second=float(os.environ.get('FAKE_LLM_TOKENS_PER_SECOND', '60')),
+            error_rate=float(os.environ.get('FAKE_LLM_ERROR_RATE', '0')),
+            seed=int(os.environ.get('FAKE_LLM_SEED', '0'))
+        )
+    if name != "emergent":
+        raise ValueError(f"Unknown LLM_BACKEND: {name}")
+    return EmergentBackend()
+
+llm_backend = create_backend()
+
+def set_llm_backend(backend: LlmBackend):
+    """Swap the backend at runtime (load tests, benchmarks)"""
+    global llm_backend
+    llm_backend = backend
+
+def llm_configured() -> bool:
+    """Whether LLM calls can be made (the fake backend needs no key)"""
+    return llm_backend.configured()
@@ -0,0 +1,257 @@
+"""
+LLM gateway
+
+Single entry point for LLM calls. Services pass an endpoint name (the
+feature making the call, e.g. "chat" or "palm_reading") and the user
+session along with the prompt; the gateway:
+
+- picks the models to try (services/model_router.py)
+- bounds the whole call by a deadline for the endpoint's call class
+- retries failures with jittered backoff while the deadline allows,
+  moving to the next model on each retry
+- hedges interactive calls: if the first request is still running after
+  the model's p95 latency, a second one is sent and the first answer wins
+- fails fast with CircuitOpenError while the provider's circuit is open
+  (services/circuit_breaker.py); callers serve their usual fallbacks
+- records usage for every request sent (services/llm_usage.py)
+
+The response is an LlmReply: the text, plus the model that actually
+answered (routing, premium upgrades and fallbacks mean it is not always
+the route's default) for callers that store it.
+
+Requests go out through the configured backend (services/llm_backends.py),
+which is the Emergent SDK unless LLM_BACKEND=fake.
+"""
+import asyncio
+import os
+import random
+import time
+from typing import Dict, List, Optional
+from services import llm_backends
+from services.circuit_breaker import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+from services import metrics
+from services.llm_usage import usage_recorder
+from services.model_router import model_router
+from services.request_timing import timed
+from services.tokens import estimate_tokens
+
+# Vision input cost of one image at high detail, up to 1024px (4 tiles + base)
+IMAGE_TOKENS = 765
+
+# Total time allowed per call, retries included; LLM_DEADLINE_<CLASS>_SECONDS overrides
+CALL_CLASS_DEADLINES = {
+    "interactive": 20.0,
+    "content": 30.0,
+    "synthesis": 60.0,
+    "vision": 60.0,
+    "background": 120.0
+}
+
+# Call classes where a duplicate request is worth its cost to cut tail latency
+HEDGED_CALL_CLASSES = {"interactive", "content"}
+
+MAX_ATTEMPTS = 3
+
+# Full-jitter exponential backoff between attempts
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 4.0
+
+# Don't start an attempt with less time than this left
+MIN_ATTEMPT_SECONDS = 2.0
+
+class LlmTimeoutError(Exception):
+    """The LLM call did not finish within its deadline"""
+
+class LlmReply(str):
+    """Response text that also carries the model that produced it"""
+
+    model: str
+
+    def __new__(cls, text: str, model: str):
+        reply = super().__new__(cls, text)
+        reply.model = model
+        return reply
+
+# One circuit for the provider; every model goes through the same upstream
+llm_breaker = CircuitBreaker(
+    "llm",
+    error_rate_threshold=float(os.environ.get('LLM_BREAKER_ERROR_RATE', '0.5')),
+    min_requests=int(os.environ.get('LLM_BREAKER_MIN_REQUESTS', '10')),
+    open_seconds=float(os.environ.get('LLM_BREAKER_OPEN_SECONDS', '30'))
+)
+
+CIRCUIT_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+circuit_state = metrics.registry.gauge("llm_circuit_state", "LLM circuit: 0 closed, 1 half-open, 2 open")
+circuit_rejected = metrics.registry.counter("llm_circuit_rejected_total", "LLM calls rejected while the circuit was open")
+
+def _collect_circuit_metrics():
+    circuit_state.set(CIRCUIT_STATE_VALUES[llm_breaker.state])
+    circuit_rejected.set_total(llm_breaker.rejected)
+
+metrics.registry.add_collector(_collect_circuit_metrics)
+
+def call_deadline(call_class: str) -> float:
+    default = CALL_CLASS_DEADLINES.get(call_class, 30.0)
+    return float(os.environ.get(f'LLM_DEADLINE_{call_class.upper()}_SECONDS', default))
+
+async def send_llm_message(
+    endpoint: str,
+    system_message: str,
+    text: str,
+    session_id: str,
+    user_session: Optional[str] = None,
+    images_base64: Optional[List[str]] = None,
+    premium: bool = False,
+    model: Optional[str] = None
+) -> LlmReply:
+    """Send one prompt and return the response text (with `.model`).
+
+    Raises CircuitOpenError right away while the circuit is open, otherwise
+    the last error (LlmTimeoutError if the deadline ran out) when no attempt
+    succeeds. `model` pins the model and skips routing.
+    """
+
+    with timed("llm"):
+        return await _call(endpoint, system_message, text, session_id, user_session, images_base64, premium, model)
+
+async def _call(
+    endpoint: str,
+    system_message: str,
+    text: str,
+    session_id: str,
+    user_session: Optional[str],
+    images_base64: Optional[List[str]],
+    premium: bool,
+    model: Optional[str]
+) -> LlmReply:
+    llm_breaker.check()
+
+    input_tokens = estimate_tokens(system_message) + estimate_tokens(text)
+    input_tokens += IMAGE_TOKENS * len(images_base64 or [])
+
+    policy = model_router.policy(endpoint)
+    models = [model] if model else model_router.route(endpoint, input_tokens, premium)
+    deadline = time.monotonic() + call_deadline(policy.call_class)
+    hedge = policy.call_class in HEDGED_CALL_CLASSES
+
+    def request(candidate: str) -> asyncio.Task:
+        return asyncio.create_task(_send(
+            endpoint, candidate, system_message, text, session_id,
+            user_session, images_base64, input_tokens, llm_breaker.generation
+        ))
+
+    last_error: Optional[Exception] = None
+    for attempt in range(MAX_ATTEMPTS):
+        if attempt:
+            backoff = random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+            if deadline - time.monotonic() - backoff < MIN_ATTEMPT_SECONDS:
+                break
+            await asyncio.sleep(backoff)
+            # The circuit may have opened since the first attempt
+            if not llm_breaker.allow_request():
+                break
+
+        candidate = models[attempt % len(models)]
+        try:
+            return await _attempt(request, candidate, hedge, deadline)
+        except Exception as e:
+            print(f"LLM call to {candidate} for {endpoint} failed (attempt {attempt + 1}): {str(e) or type(e).__name__}")
+            last_error = e
+
+    raise last_error or LlmTimeoutError(f"No time left for {endpoint}")
+
+async def _attempt(request, model: str, hedge: bool, deadline: float) -> LlmReply:
+    """One request, plus a hedge to the same model after its p95 latency; first success wins"""
+
+    started = time.monotonic()
+    generation = llm_breaker.generation
+    tasks: Dict[asyncio.Task, str] = {request(model): model}
+    error: Optional[BaseException] = None
+
+    try:
+        # No duplicate requests while the circuit is probing
+        hedge_after = model_router.latency_percentile(model) if hedge and llm_breaker.state == CLOSED else None
+        if hedge_after is not None and started + hedge_after / 1000 < deadline:
+            done, _ = await asyncio.wait(tasks, timeout=hedge_after / 1000)
+            if not done:
+                tasks[request(model)] = model
+
+        while tasks:
+            done, _ = await asyncio.wait(
+                tasks, timeout=max(0.0, deadline - time.monotonic()),
+                return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                # Deadline hit: count it against every model still pending
+                for pending_model in tasks.values():
+                    model_router.record(pending_model, (time.monotonic() - started) * 1000, False)
+                    llm_breaker.record_failure(generation)
+                raise LlmTimeoutError(f"{model} did not answer within the deadline")
+
+            for task in done:
+                tasks.pop(task)
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+
+        raise error
+
+    finally:
+        # Losing hedges and timed-out requests
+        for task in tasks:
+            task.cancel()
+
+async def _send(
+    endpoint: str,
+    model: str,
+    system_message: str,
+    text: str,
+    session_id: str,
+    user_session: Optional[str],
+    images_base64: Optional[List[str]],
+    input_tokens: int,
+    generation: int
+) -> LlmReply:
+    started = time.perf_counter()
+    response = ""
+    success = False
+    cancelled = False
+    try:
+        response = await llm_backends.llm_backend.send(
+            endpoint, model, system_message, text, session_id, images_base64
+        )
+        success = True
+        return LlmReply(response, model)
+
+    except asyncio.CancelledError:
+        # Cancelled by the gateway, which accounts for timeouts itself
+        cancelled = True
+        raise
+
+    finally:
+        latency_ms = (time.perf_counter() - started) * 1000
+        output_tokens = estimate_tokens(response)
+        call_class = model_router.policy(endpoint).call_class
+        outcome = "cancelled" if cancelled else "success" if success else "error"
+        metrics.llm_requests.inc(call_class=call_class, model=model, outcome=outcome)
+        if success:
+            metrics.llm_request_duration.observe(latency_ms / 1000, call_class=call_class, model=model)
+        metrics.llm_tokens.inc(input_tokens, call_class=call_class, direction="input")
+        metrics.llm_tokens.inc(output_tokens, call_class=call_class, direction="output")
+        if not cancelled:
+            model_router.record(model, latency_ms, success)
+            if success:
+                llm_breaker.record_success(generation)
+            else:
+                llm_breaker.record_failure(generation)
+        # Input tokens are spent even when a request is cancelled
+        usage_recorder.record_call(
+            endpoint=endpoint,
+            model=model,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            latency_ms=latency_ms,
+            outcome=outcome,
+            user_session=user_session
+        )
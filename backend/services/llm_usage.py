@@ -0,0 +1,172 @@
+"""
+LLM usage accounting
+
+Every LLM call made through services/llm_gateway.py is recorded here:
+model, estimated input/output tokens, latency, outcome, endpoint and user
+session. Calls are aggregated in memory per (day, endpoint, model, user)
+and flushed to the `llm_usage` collection periodically with $inc upserts,
+so recording costs a dict update and the database sees one write per
+bucket per flush.
+"""
+import asyncio
+import logging
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL_SECONDS = float(os.environ.get('LLM_USAGE_FLUSH_SECONDS', '30'))
+
+# USD per 1M tokens (input, output); used for cost estimates only
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00)
+}
+
+BucketKey = Tuple[str, str, str, str]
+
+def estimate_cost(model: str, input_tokens: int, output_tokens: int) -> float:
+    input_price, output_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+def _new_bucket() -> Dict[str, Any]:
+    return {
+        "calls": 0,
+        "errors": 0,
+        "cancelled": 0,
+        "cache_hits": 0,
+        "input_tokens": 0,
+        "output_tokens": 0,
+        "latency_ms": 0.0,
+        "cost_usd": 0.0
+    }
+
+class LlmUsageRecorder:
+    """In-memory usage aggregation with periodic flush to MongoDB"""
+
+    def __init__(self, flush_interval: float = FLUSH_INTERVAL_SECONDS):
+        self.flush_interval = flush_interval
+        self.db: Optional[AsyncIOMotorDatabase] = None
+        self._buckets: Dict[BucketKey, Dict[str, Any]] = defaultdict(_new_bucket)
+        self._task: Optional[asyncio.Task] = None
+
+    def record_call(
+        self,
+        endpoint: str,
+        model: str,
+        input_tokens: int,
+        output_tokens: int,
+        latency_ms: float,
+        outcome: str = "success",
+        user_session: Optional[str] = None
+    ):
+        """Record one LLM call; `outcome` is success, error or cancelled.
+
+        Cancelled calls (losing hedges, abandoned attempts) still cost their
+        tokens but count in neither calls, errors nor latency.
+        """
+        bucket = self._buckets[self._key(endpoint, model, user_session)]
+        if outcome == "cancelled":
+            bucket["cancelled"] += 1
+        else:
+            bucket["calls"] += 1
+            bucket["errors"] += 0 if outcome == "success" else 1
+            bucket["latency_ms"] += latency_ms
+        bucket["input_tokens"] += input_tokens
+        bucket["output_tokens"] += output_tokens
+        bucket["cost_usd"] += estimate_cost(model, input_tokens, output_tokens)
+
+    def record_cache_hit(self, endpoint: str, user_session: Optional[str] = None):
+        """Record a request answered from stored output instead of an LLM call"""
+        self._buckets[self._key(endpoint, "cache", user_session)]["cache_hits"] += 1
+
+    @staticmethod
+    def _key(endpoint: str, model: str, user_session: Optional[str]) -> BucketKey:
+        return (datetime.utcnow().strftime("%Y-%m-%d"), endpoint, model, user_session or "anonymous")
+
+    async def start(self, db: AsyncIOMotorDatabase):
+        self.db = db
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def flush(self):
+        """Write buffered buckets to `llm_usage`"""
+        if self.db is None or not self._buckets:
+            return
+
+        buckets, self._buckets = self._buckets, defaultdict(_new_bucket)
+        operations = [
+            UpdateOne(
+                {"_id": "|".join(key)},
+                {
+                    "$inc": bucket,
+                    "$setOnInsert": {
+                        "day": key[0],
+                        "endpoint": key[1],
+                        "model": key[2],
+                        "user_session": key[3]
+                    }
+                },
+                upsert=True
+            )
+            for key, bucket in buckets.items()
+        ]
+
+        try:
+            await self.db.llm_usage.bulk_write(operations, ordered=False)
+        except Exception as e:
+            logger.error(f"Failed to flush LLM usage: {e}")
+            # Keep the counts for the next flush
+            for key, bucket in buckets.items():
+                merged = self._buckets[key]
+                for field, value in bucket.items():
+                    merged[field] += value
+
+    async def rollup(self, days: int = 7, group_by: str = "endpoint") -> List[Dict[str, Any]]:
+        """Usage totals per day and endpoint (or model / user_session)"""
+        await self.flush()
+        if self.db is None:
+            return []
+
+        since = (datetime.utcnow() - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+        pipeline = [
+            {"$match": {"day": {"$gte": since}}},
+            {"$group": {
+                "_id": {"day": "$day", group_by: f"${group_by}"},
+                **{field: {"$sum": f"${field}"} for field in _new_bucket()}
+            }},
+            {"$sort": {"_id.day": -1, "cost_usd": -1}}
+        ]
+
+        rows = []
+        async for doc in self.db.llm_usage.aggregate(pipeline):
+            row = {**doc.pop("_id"), **doc}
+            calls = row["calls"]
+            latency_ms = row.pop("latency_ms")
+            row["avg_latency_ms"] = round(latency_ms / calls, 1) if calls else 0.0
+            sent = calls + row["cancelled"]
+            row["avg_input_tokens"] = round(row["input_tokens"] / sent) if sent else 0
+            row["cost_usd"] = round(row["cost_usd"], 4)
+            rows.append(row)
+        return rows
+
+usage_recorder = LlmUsageRecorder()
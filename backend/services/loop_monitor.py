@@ -0,0 +1,159 @@
+"""
+Event loop lag monitor
+
+A task that sleeps for a fixed interval and measures how late it wakes
+up. The overshoot is time the loop spent running something else without
+yielding: blocking calls, CPU-heavy code or too many ready callbacks.
+
+With LOOP_BLOCK_DEBUG=1 a watchdog thread also catches the blocking call
+itself: the loop refreshes a heartbeat every few milliseconds and, when
+the heartbeat goes stale for longer than the threshold, the watchdog
+captures the loop thread's stack while it is still blocked. Offenders are
+logged with their stack and counted per call site in
+event_loop_blocked_total.
+
+    LOOP_LAG_INTERVAL_SECONDS   lag check interval (default 0.5)
+    LOOP_BLOCK_DEBUG            enable the blocking-call watchdog (default 0)
+    LOOP_BLOCK_THRESHOLD_MS     report callbacks blocking longer (default 100)
+"""
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, Optional
+from services.metrics import registry
+
+logger = logging.getLogger("loop_monitor")
+
+CHECK_INTERVAL_SECONDS = float(os.environ.get('LOOP_LAG_INTERVAL_SECONDS', '0.5'))
+BLOCK_DEBUG = os.environ.get('LOOP_BLOCK_DEBUG', '0') == '1'
+BLOCK_THRESHOLD_MS = float(os.environ.get('LOOP_BLOCK_THRESHOLD_MS', '100'))
+
+# Frames from our own code name the call site; library frames usually don't
+APP_ROOT = str(Path(__file__).resolve().parent.parent)
+
+loop_lag = registry.gauge("event_loop_lag_seconds", "Most recent event loop lag")
+loop_lag_histogram = registry.histogram(
+    "event_loop_lag_distribution_seconds", "Event loop lag per check",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+loop_blocked = registry.counter("event_loop_blocked_total", "Callbacks caught blocking the event loop", ["site"])
+
+def _call_site(stack: traceback.StackSummary) -> str:
+    """Innermost frame in application code, else the innermost frame"""
+    for frame in reversed(stack):
+        if frame.filename.startswith(APP_ROOT) and frame.filename != __file__:
+            return f"{os.path.relpath(frame.filename, APP_ROOT)}:{frame.lineno} in {frame.name}"
+    frame = stack[-1]
+    return f"{frame.filename}:{frame.lineno} in {frame.name}"
+
+class LoopLagMonitor:
+    def __init__(
+        self,
+        interval: float = CHECK_INTERVAL_SECONDS,
+        block_debug: bool = BLOCK_DEBUG,
+        block_threshold_ms: float = BLOCK_THRESHOLD_MS
+    ):
+        self.interval = interval
+        self.block_debug = block_debug
+        self.block_threshold = block_threshold_ms / 1000
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        # Most recent offenders, newest last
+        self.blocks: Deque[Dict[str, Any]] = deque(maxlen=20)
+        self._task: Optional[asyncio.Task] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._heartbeat = 0.0
+        self._loop_thread_id: Optional[int] = None
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        if self.block_debug and self._watchdog is None:
+            self._loop_thread_id = threading.get_ident()
+            self._heartbeat = time.monotonic()
+            self._stopping.clear()
+            self._heartbeat_task = asyncio.create_task(self._beat())
+            self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+            self._watchdog.start()
+            print(f"Event loop watchdog on, reporting callbacks blocking over {self.block_threshold * 1000:.0f}ms")
+
+    async def stop(self):
+        tasks = [task for task in (self._task, self._heartbeat_task) if task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = self._heartbeat_task = None
+
+        if self._watchdog:
+            self._stopping.set()
+            self._watchdog.join(timeout=1)
+            self._watchdog = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - started - self.interval)
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            loop_lag.set(lag)
+            loop_lag_histogram.observe(lag)
+
+    async def _beat(self):
+        while True:
+            self._heartbeat = time.monotonic()
+            await asyncio.sleep(self.block_threshold / 4)
+
+    def _watch(self):
+        """Watchdog thread: capture the loop's stack once per stall"""
+        reported = None
+        block: Optional[Dict[str, Any]] = None
+        while not self._stopping.wait(self.block_threshold / 4):
+            heartbeat = self._heartbeat
+            if block is not None and heartbeat != reported:
+                # Loop is running again: record how long the stall lasted
+                block["blocked_ms"] = round((heartbeat - reported) * 1000, 1)
+                block = None
+            stalled = time.monotonic() - heartbeat
+            if stalled < self.block_threshold or heartbeat == reported:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            reported = heartbeat
+            block = self._report(traceback.extract_stack(frame), stalled)
+
+    def _report(self, stack: traceback.StackSummary, stalled: float) -> Dict[str, Any]:
+        site = _call_site(stack)
+        loop_blocked.inc(site=site)
+        block = {
+            "site": site,
+            "blocked_ms": round(stalled * 1000, 1),
+            "detected_at": time.time()
+        }
+        self.blocks.append(block)
+        logger.warning(
+            f"Event loop blocked for over {stalled * 1000:.0f}ms at {site}\n"
+            + "".join(stack.format())
+        )
+        return block
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {
+            "last_lag_ms": round(self.last_lag * 1000, 1),
+            "max_lag_ms": round(self.max_lag * 1000, 1)
+        }
+        if self.block_debug:
+            stats["recent_blocks"] = list(self.blocks)
+        return stats
+
+loop_monitor = LoopLagMonitor()
@@ -0,0 +1,258 @@
+"""
+Prometheus metrics
+
+A small registry of counters, gauges and histograms rendered in the
+Prometheus text format at /metrics. Values updated on the hot path
+(requests, LLM calls, Mongo pool events) are recorded as they happen;
+values owned elsewhere (cache counters, queue depth, circuit state) are
+read by collectors registered with `registry.add_collector` at scrape time.
+"""
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from pymongo import monitoring
+
+# Seconds; the Prometheus client defaults
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LLM_BUCKETS = (0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0, 120.0)
+
+LabelKey = Tuple[str, ...]
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        # Pool events arrive from driver threads
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelKey:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        return "\n".join(lines + self.samples())
+
+class _Value(_Metric):
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in values]
+
+class Counter(_Value):
+    type = "counter"
+
+    def set_total(self, value: float, **labels: str):
+        """Mirror a count kept elsewhere (it must only go up)"""
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+class Gauge(_Value):
+    type = "gauge"
+
+    def set(self, value: float, **labels: str):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def dec(self, amount: float = 1.0, **labels: str):
+        self.inc(-amount, **labels)
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # Per label set: bucket counts (not cumulative), sum, count
+        self._series: Dict[LabelKey, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = ([0] * len(self.buckets), [0.0, 0.0])
+            counts, totals = series
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            totals[0] += value
+            totals[1] += 1
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            series = [(key, list(counts), list(totals)) for key, (counts, totals) in self._series.items()]
+
+        lines = []
+        for key, counts, (total, count) in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {_format_value(count)}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+
+    def _register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], None]):
+        """Run before each scrape to refresh gauges from their source"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            try:
+                collector()
+            except Exception as e:
+                print(f"Error in metrics collector {getattr(collector, '__name__', collector)}: {str(e)}")
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+registry = Registry()
+
+# HTTP
+http_requests = registry.counter("http_requests_total", "HTTP requests by route and status", ["method", "route", "status"])
+http_request_duration = registry.histogram("http_request_duration_seconds", "HTTP request latency", ["method", "route"])
+http_in_flight = registry.gauge("http_requests_in_flight", "HTTP requests being served")
+
+# LLM
+llm_requests = registry.counter("llm_requests_total", "LLM requests sent upstream", ["call_class", "model", "outcome"])
+llm_request_duration = registry.histogram("llm_request_duration_seconds", "LLM request latency", ["call_class", "model"], LLM_BUCKETS)
+llm_tokens = registry.counter("llm_tokens_total", "Estimated LLM tokens", ["call_class", "direction"])
+
+# MongoDB connection pool
+mongo_pool_connections = registry.gauge("mongodb_pool_connections", "Open connections per server", ["address"])
+mongo_pool_checked_out = registry.gauge("mongodb_pool_checked_out", "Connections in use per server", ["address"])
+mongo_pool_checkout_wait = registry.histogram("mongodb_pool_checkout_wait_seconds", "Time waiting for a pooled connection", ["address"])
+mongo_pool_checkout_failures = registry.counter("mongodb_pool_checkout_failures_total", "Failed connection checkouts", ["address", "reason"])
+
+class MetricsMiddleware:
+    """ASGI middleware counting requests, latency and in-flight requests per route"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_in_flight.dec()
+            # Route templates, not raw paths, keep label cardinality bounded
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            http_requests.inc(method=scope["method"], route=route, status=str(status))
+            http_request_duration.observe(time.perf_counter() - started, method=scope["method"], route=route)
+
+def _address(event) -> str:
+    host, port = event.address
+    return f"{host}:{port}"
+
+class _PoolMetrics(monitoring.ConnectionPoolListener):
+    """Connection pool usage from pymongo pool events"""
+
+    def __init__(self):
+        # Checkout start and finish are published on the same thread
+        self._local = threading.local()
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        mongo_pool_connections.inc(address=_address(event))
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        mongo_pool_connections.dec(address=_address(event))
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+
+    def connection_check_out_failed(self, event):
+        mongo_pool_checkout_failures.inc(address=_address(event), reason=str(event.reason))
+
+    def connection_checked_out(self, event):
+        address = _address(event)
+        mongo_pool_checked_out.inc(address=address)
+        started: Optional[float] = getattr(self._local, "started", None)
+        if started is not None:
+            mongo_pool_checkout_wait.observe(time.perf_counter() - started, address=address)
+            self._local.started = None
+
+    def connection_checked_in(self, event):
+        mongo_pool_checked_out.dec(address=_address(event))
+
+# Listeners only apply to clients created after registration
+monitoring.register(_PoolMetrics())
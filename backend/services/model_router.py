@@ -0,0 +1,152 @@
+"""
+LLM model routing
+
+Picks the model for each call from a per-endpoint policy: call class,
+prompt size, user tier and the recent latency / error rate of each model.
+The gateway (services/llm_gateway.py) tries the returned models in order,
+so a slow or failing primary is skipped in favour of its fallbacks.
+"""
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+# Upstream health is tracked with exponentially weighted averages
+EWMA_ALPHA = 0.2
+
+# Samples needed before a model can be judged unhealthy
+MIN_SAMPLES = 5
+
+# Error rate above which a model is skipped while fallbacks are available
+MAX_ERROR_RATE = 0.5
+
+# A skipped model gets no new samples; after this long it is tried again
+RECOVERY_SECONDS = 60
+
+# Recent successful latencies kept per model for percentiles
+LATENCY_WINDOW = 200
+
+class RoutePolicy:
+    """Routing rules for one endpoint"""
+
+    def __init__(
+        self,
+        call_class: str,
+        model: str,
+        fallbacks: Optional[List[str]] = None,
+        latency_slo_ms: float = 10000,
+        premium_model: Optional[str] = None,
+        large_model_max_tokens: int = 4000
+    ):
+        self.call_class = call_class
+        self.model = model
+        self.fallbacks = fallbacks or []
+        self.latency_slo_ms = latency_slo_ms
+        # Model for premium users, used while the prompt stays small enough
+        # for it to answer within the SLO
+        self.premium_model = premium_model
+        self.large_model_max_tokens = large_model_max_tokens
+
+ROUTES: Dict[str, RoutePolicy] = {
+    # Interactive: the user is waiting on the reply
+    "chat": RoutePolicy("interactive", "gpt-4o-mini", ["gpt-4o"], latency_slo_ms=6000,
+                        premium_model="gpt-4o", large_model_max_tokens=2000),
+    # Synthesis: one-off, quality matters most
+    "profile_synthesis": RoutePolicy("synthesis", "gpt-4o-mini", ["gpt-4o"], latency_slo_ms=20000,
+                                     premium_model="gpt-4o"),
+    "blueprint_synthesis": RoutePolicy("synthesis", "gpt-4o-mini", ["gpt-4o"], latency_slo_ms=20000,
+                                       premium_model="gpt-4o"),
+    # Generated content with a cached or rule-based fallback
+    "daily_content": RoutePolicy("content", "gpt-4o-mini", ["gpt-4o"], latency_slo_ms=10000),
+    "meditation": RoutePolicy("content", "gpt-4o-mini", ["gpt-4o"], latency_slo_ms=10000),
+    "test_analysis": RoutePolicy("content", "gpt-4o-mini", ["gpt-4o"], latency_slo_ms=10000),
+    # Vision runs in the job queue; gpt-4o-mini also accepts images
+    "palm_reading": RoutePolicy("vision", "gpt-4o", ["gpt-4o-mini"], latency_slo_ms=30000),
+    # Background work nobody waits on
+    "chat_memory_summary": RoutePolicy("background", "gpt-4o-mini", latency_slo_ms=30000),
+    "quick_questions_batch": RoutePolicy("background", "gpt-4o-mini", latency_slo_ms=60000)
+}
+
+DEFAULT_ROUTE = RoutePolicy("content", "gpt-4o-mini", ["gpt-4o"])
+
+class ModelRouter:
+    """Routing policy plus per-model latency and error tracking"""
+
+    def __init__(self, routes: Dict[str, RoutePolicy]):
+        self.routes = routes
+        self._health: Dict[str, Dict[str, float]] = {}
+        self._latencies: Dict[str, Deque[float]] = {}
+
+    def policy(self, endpoint: str) -> RoutePolicy:
+        return self.routes.get(endpoint, DEFAULT_ROUTE)
+
+    def route(self, endpoint: str, input_tokens: int = 0, premium: bool = False) -> List[str]:
+        """Models to try for a call, in order"""
+
+        policy = self.policy(endpoint)
+
+        primary = policy.model
+        if premium and policy.premium_model and input_tokens <= policy.large_model_max_tokens:
+            primary = policy.premium_model
+
+        candidates = [primary] + [m for m in [policy.model] + policy.fallbacks if m != primary]
+        candidates = list(dict.fromkeys(candidates))
+
+        # Healthy models first; if none are healthy keep the policy order
+        healthy = [m for m in candidates if self.is_healthy(m, policy.latency_slo_ms)]
+        if healthy:
+            candidates = healthy + [m for m in candidates if m not in healthy]
+
+        return candidates
+
+    def is_healthy(self, model: str, latency_slo_ms: float) -> bool:
+        health = self._health.get(model)
+        if not health or health["samples"] < MIN_SAMPLES:
+            return True
+        if time.monotonic() - health["updated_at"] > RECOVERY_SECONDS:
+            return True
+        return health["error_rate"] <= MAX_ERROR_RATE and health["latency_ms"] <= latency_slo_ms
+
+    def record(self, model: str, latency_ms: float, success: bool):
+        """Update a model's health after a call"""
+
+        if success:
+            self._latencies.setdefault(model, deque(maxlen=LATENCY_WINDOW)).append(latency_ms)
+
+        health = self._health.get(model)
+        if health is None:
+            self._health[model] = {
+                "samples": 1,
+                "latency_ms": latency_ms,
+                "error_rate": 0.0 if success else 1.0,
+                "updated_at": time.monotonic()
+            }
+            return
+
+        health["samples"] += 1
+        health["updated_at"] = time.monotonic()
+        # Failures often return fast; only successful calls say how slow the model is
+        if success:
+            health["latency_ms"] += EWMA_ALPHA * (latency_ms - health["latency_ms"])
+        health["error_rate"] += EWMA_ALPHA * ((0.0 if success else 1.0) - health["error_rate"])
+
+    def latency_percentile(self, model: str, percentile: float = 0.95) -> Optional[float]:
+        """Recent successful-call latency percentile in ms; None until enough samples"""
+
+        latencies = self._latencies.get(model)
+        if not latencies or len(latencies) < MIN_SAMPLES:
+            return None
+        ordered = sorted(latencies)
+        return ordered[min(len(ordered) - 1, int(percentile * len(ordered)))]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            model: {
+                "samples": int(health["samples"]),
+                "latency_ms": round(health["latency_ms"], 1),
+                "p95_latency_ms": round(self.latency_percentile(model) or 0.0, 1),
+                "error_rate": round(health["error_rate"], 3)
+            }
+            for model, health in self._health.items()
+        }
+
+model_router = ModelRouter(ROUTES)
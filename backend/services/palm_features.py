@@ -0,0 +1,206 @@
+"""
+Palm feature extraction
+
+CPU-only image analysis with NumPy/Pillow that runs in the process pool
+(see services/worker_pool.py). It produces a compact feature dict that is
+stored with the scan, used as structured hints in the vision prompt and
+turned into an instant preliminary reading while the AI analysis runs.
+"""
+from io import BytesIO
+from typing import Any, Dict, List, Union
+import numpy as np
+from PIL import Image
+
+# Images are analyzed at this longest edge; line detail survives, cost stays low
+ANALYSIS_SIZE = 256
+
+# Coarse grid used for the line-strength map
+GRID_SIZE = 4
+
+# Relative strength above which a line is reported as visible
+LINE_VISIBLE_THRESHOLD = 1.1
+
+# Floor for the texture baseline so sensor noise on smooth skin is not amplified
+MIN_BASELINE = 8.0
+
+def _load_rgb(source: Union[bytes, str]) -> np.ndarray:
+    image = Image.open(BytesIO(source) if isinstance(source, bytes) else source).convert("RGB")
+    image.thumbnail((ANALYSIS_SIZE, ANALYSIS_SIZE), Image.Resampling.BILINEAR)
+    return np.asarray(image, dtype=np.float32)
+
+def _skin_mask(rgb: np.ndarray) -> np.ndarray:
+    """Hand mask from the classic YCbCr skin range, with a brightness fallback"""
+    r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+    cb = 128 - 0.168736 * r - 0.331264 * g + 0.5 * b
+    cr = 128 + 0.5 * r - 0.418688 * g - 0.081312 * b
+    mask = (cb >= 77) & (cb <= 127) & (cr >= 133) & (cr <= 173)
+
+    # Poor lighting breaks the chroma range; fall back to the brighter half
+    if mask.mean() < 0.05:
+        luma = 0.299 * r + 0.587 * g + 0.114 * b
+        mask = luma > np.median(luma)
+
+    return mask
+
+def _erode(mask: np.ndarray, iterations: int) -> np.ndarray:
+    """Binary erosion with a 3x3 cross, so the hand outline is not mistaken for lines"""
+    for _ in range(iterations):
+        padded = np.pad(mask, 1, constant_values=False)
+        mask = (
+            padded[1:-1, 1:-1] & padded[:-2, 1:-1] & padded[2:, 1:-1]
+            & padded[1:-1, :-2] & padded[1:-1, 2:]
+        )
+    return mask
+
+def _sobel(gray: np.ndarray):
+    """Horizontal and vertical Sobel gradients"""
+    p = np.pad(gray, 1, mode="edge")
+    gx = (
+        (p[:-2, 2:] + 2 * p[1:-1, 2:] + p[2:, 2:])
+        - (p[:-2, :-2] + 2 * p[1:-1, :-2] + p[2:, :-2])
+    )
+    gy = (
+        (p[2:, :-2] + 2 * p[2:, 1:-1] + p[2:, 2:])
+        - (p[:-2, :-2] + 2 * p[:-2, 1:-1] + p[:-2, 2:])
+    )
+    return gx, gy
+
+def _orientation(mask: np.ndarray) -> Dict[str, Any]:
+    """Principal axis of the hand mask from second-order image moments"""
+    ys, xs = np.nonzero(mask)
+    if len(xs) < 10:
+        return {"angle_degrees": 0.0, "axis": "unknown", "centroid": [0.5, 0.5]}
+
+    cx, cy = xs.mean(), ys.mean()
+    cov = np.cov(np.vstack([xs - cx, ys - cy]))
+    eigenvalues, eigenvectors = np.linalg.eigh(cov)
+    major = eigenvectors[:, np.argmax(eigenvalues)]
+
+    # Angle of the major axis from vertical, in [-90, 90)
+    angle = float(np.degrees(np.arctan2(major[0], major[1])))
+    angle = (angle + 90) % 180 - 90
+
+    axis = "vertical" if abs(angle) < 30 else "horizontal" if abs(angle) > 60 else "tilted"
+
+    return {
+        "angle_degrees": round(angle, 1) + 0.0,
+        "axis": axis,
+        "centroid": [round(cx / mask.shape[1], 3), round(cy / mask.shape[0], 3)]
+    }
+
+def _zone_strength(magnitude: np.ndarray, weight: np.ndarray, mask: np.ndarray, baseline: float) -> float:
+    zone = mask & (weight > 0)
+    if zone.sum() < 10 or baseline <= 0:
+        return 0.0
+    return float((magnitude[zone] * weight[zone]).mean() / baseline)
+
+def extract_palm_features(source: Union[bytes, str]) -> Dict[str, Any]:
+    """Extract hand mask statistics, orientation and coarse line strengths"""
+
+    rgb = _load_rgb(source)
+    height, width = rgb.shape[:2]
+    gray = rgb @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+    mask = _skin_mask(rgb)
+    coverage = float(mask.mean())
+    inner = _erode(mask, max(2, min(height, width) // 40))
+
+    gx, gy = _sobel(gray)
+    magnitude = np.hypot(gx, gy)
+    # Palm creases run mostly across the hand: share of horizontal gradient energy
+    horizontal = np.abs(gy) / (np.abs(gx) + np.abs(gy) + 1e-6)
+
+    baseline = max(float(magnitude[inner].mean()) if inner.any() else 0.0, MIN_BASELINE)
+
+    # Coarse strength map over the bounding box of the palm
+    strength_map: List[List[float]] = []
+    ys, xs = np.nonzero(inner if inner.any() else mask)
+    if len(xs):
+        top, bottom, left, right = ys.min(), ys.max() + 1, xs.min(), xs.max() + 1
+    else:
+        top, bottom, left, right = 0, height, 0, width
+    row_edges = np.linspace(top, bottom, GRID_SIZE + 1).astype(int)
+    col_edges = np.linspace(left, right, GRID_SIZE + 1).astype(int)
+    for i in range(GRID_SIZE):
+        row = []
+        for j in range(GRID_SIZE):
+            cell = (slice(row_edges[i], row_edges[i + 1]), slice(col_edges[j], col_edges[j + 1]))
+            cell_mask = inner[cell]
+            value = float(magnitude[cell][cell_mask].mean() / baseline) if cell_mask.sum() > 4 and baseline > 0 else 0.0
+            row.append(round(value, 2))
+        strength_map.append(row)
+
+    # Line zones in the palm's bounding box, assuming fingers point up:
+    # heart line across the upper band, head line across the middle,
+    # life line around the lower thumb-side arc, fate line up the centre
+    yy, xx = np.mgrid[0:height, 0:width]
+    span_y = max(bottom - top, 1)
+    span_x = max(right - left, 1)
+    rel_y = (yy - top) / span_y
+    rel_x = (xx - left) / span_x
+    vertical = 1.0 - horizontal
+
+    zones = {
+        "heart_line": ((rel_y > 0.15) & (rel_y < 0.35)) * horizontal,
+        "head_line": ((rel_y > 0.35) & (rel_y < 0.55)) * horizontal,
+        "life_line": ((rel_y > 0.4) & (rel_y < 0.9) & ((rel_x < 0.4) | (rel_x > 0.6))) * 1.0,
+        "fate_line": ((rel_y > 0.45) & (rel_y < 0.95) & (rel_x > 0.4) & (rel_x < 0.6)) * vertical
+    }
+
+    line_strength = {
+        name: round(_zone_strength(magnitude, weight, inner, baseline), 2)
+        for name, weight in zones.items()
+    }
+
+    # Variance of a Laplacian approximation as a sharpness measure
+    laplacian = gray[1:-1, 2:] + gray[1:-1, :-2] + gray[2:, 1:-1] + gray[:-2, 1:-1] - 4 * gray[1:-1, 1:-1]
+
+    return {
+        "palm_detected": 0.1 <= coverage <= 0.95,
+        "mask_coverage": round(coverage, 3),
+        "orientation": _orientation(mask),
+        "line_strength": line_strength,
+        "lines_visible": {
+            name: value >= LINE_VISIBLE_THRESHOLD for name, value in line_strength.items()
+        },
+        "strength_map": strength_map,
+        "quality": {
+            "brightness": round(float(gray.mean()) / 255, 3),
+            "contrast": round(float(gray.std()) / 128, 3),
+            "sharpness": round(float(laplacian.var()), 1)
+        }
+    }
+
+def build_preliminary_reading(features: Dict[str, Any]) -> Dict[str, Any]:
+    """Instant, low-confidence reading derived from extracted features"""
+
+    strength = features.get("line_strength", {})
+    traits = []
+
+    if strength.get("heart_line", 0) >= 1.3:
+        traits.append("Emotionally expressive and open in relationships")
+    else:
+        traits.append("Reserved with feelings, sharing them with a trusted few")
+
+    if strength.get("head_line", 0) >= 1.3:
+        traits.append("Focused, deliberate thinker")
+    else:
+        traits.append("Flexible, intuitive thinker")
+
+    if strength.get("life_line", 0) >= 1.3:
+        traits.append("Steady energy and strong resilience")
+    else:
+        traits.append("Energy that comes in bursts; pacing helps")
+
+    if strength.get("fate_line", 0) >= LINE_VISIBLE_THRESHOLD:
+        traits.append("Clear sense of direction in work and life")
+    else:
+        traits.append("Self-made path shaped by your own choices")
+
+    return {
+        "preliminary": True,
+        "personality_traits": traits,
+        "lines_visible": features.get("lines_visible", {}),
+        "confidence": 0.4 if features.get("palm_detected") else 0.2,
+        "message": "Quick reading from line measurements. Your detailed AI reading is on its way."
+    }
@@ -0,0 +1,145 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from services.palmistry_service import PalmistryService
+from services.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Statuses after which a scan will not change again
+TERMINAL_STATUSES = ("completed", "failed")
+
+queue_backlog = registry.gauge("palmistry_queue_backlog", "Palm scans waiting for a worker")
+queue_busy_workers = registry.gauge("palmistry_queue_busy_workers", "Palm analysis workers running a job")
+queue_jobs = registry.counter("palmistry_queue_jobs_total", "Palm analysis jobs finished", ["outcome"])
+queue_job_duration = registry.histogram(
+    "palmistry_queue_job_duration_seconds", "Palm analysis job duration",
+    buckets=(1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+)
+
+class PalmistryJobQueue:
+    """Background queue that runs palm analysis outside of the request cycle.
+
+    Job state lives on the `palm_scans` documents, so any worker process can
+    report status; the in-memory queue only schedules work for this process.
+    """
+
+    def __init__(self, db: AsyncIOMotorDatabase, worker_count: Optional[int] = None):
+        self.db = db
+        self.worker_count = worker_count or int(os.environ.get('PALMISTRY_WORKERS', '2'))
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._workers: List[asyncio.Task] = []
+        self._listeners: Dict[str, List[asyncio.Queue]] = {}
+
+    @property
+    def backlog(self) -> int:
+        """Number of scans waiting for a worker in this process"""
+        return self._queue.qsize()
+
+    @property
+    def workers_alive(self) -> int:
+        """Workers still running (a crashed worker stops consuming)"""
+        return sum(1 for worker in self._workers if not worker.done())
+
+    async def start(self):
+        """Start workers and re-queue scans left over from a previous run"""
+
+        for _ in range(self.worker_count):
+            self._workers.append(asyncio.create_task(self._worker()))
+
+        try:
+            # Scans stuck in processing for too long were orphaned by a crashed worker
+            stale_before = datetime.utcnow() - timedelta(minutes=10)
+            await self.db.palm_scans.update_many(
+                {"status": "processing", "started_at": {"$lt": stale_before}},
+                {"$set": {"status": "queued"}}
+            )
+
+            cursor = self.db.palm_scans.find({"status": "queued"}, {"_id": 1})
+            async for scan in cursor:
+                self._queue.put_nowait(str(scan["_id"]))
+        except Exception as e:
+            logger.error(f"Failed to recover queued palm scans: {e}")
+        queue_backlog.set(self.backlog)
+
+    async def stop(self):
+        """Cancel running workers"""
+
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def enqueue(self, scan_id: str):
+        """Queue a saved scan for analysis"""
+
+        self._queue.put_nowait(scan_id)
+        queue_backlog.set(self.backlog)
+        self._notify(scan_id, "queued")
+
+    async def enqueue_deferred(self, user_session: str) -> int:
+        """Queue guest scans that were waiting for the user to log in"""
+
+        palmistry_service = PalmistryService(self.db)
+        scan_ids = await palmistry_service.get_deferred_scan_ids(user_session)
+
+        for scan_id in scan_ids:
+            result = await self.db.palm_scans.update_one(
+                {"_id": scan_id, "status": "awaiting_login"},
+                {"$set": {"status": "queued"}}
+            )
+            if result.modified_count:
+                await self.enqueue(scan_id)
+
+        return len(scan_ids)
+
+    def subscribe(self, scan_id: str) -> asyncio.Queue:
+        """Register for status change notifications of a scan"""
+
+        listener: asyncio.Queue = asyncio.Queue()
+        self._listeners.setdefault(scan_id, []).append(listener)
+        return listener
+
+    def unsubscribe(self, scan_id: str, listener: asyncio.Queue):
+        """Remove a status change listener"""
+
+        listeners = self._listeners.get(scan_id, [])
+        if listener in listeners:
+            listeners.remove(listener)
+        if not listeners:
+            self._listeners.pop(scan_id, None)
+
+    def _notify(self, scan_id: str, status: str):
+        for listener in self._listeners.get(scan_id, []):
+            listener.put_nowait(status)
+
+    async def _worker(self):
+        while True:
+            scan_id = await self._queue.get()
+            queue_backlog.set(self.backlog)
+            queue_busy_workers.inc()
+            started = time.perf_counter()
+            try:
+                await self._process(scan_id)
+            finally:
+                queue_busy_workers.dec()
+                queue_job_duration.observe(time.perf_counter() - started)
+                self._queue.task_done()
+
+    async def _process(self, scan_id: str):
+        palmistry_service = PalmistryService(self.db)
+
+        try:
+            self._notify(scan_id, "processing")
+            analysis = await palmistry_service.process_palm_scan(scan_id)
+            if analysis:
+                self._notify(scan_id, "completed")
+            queue_jobs.inc(outcome="completed" if analysis else "skipped")
+        except Exception as e:
+            logger.error(f"Palm analysis job {scan_id} failed: {e}")
+            queue_jobs.inc(outcome="failed")
+            self._notify(scan_id, "failed")
@@ -1,168 +1,350 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Union
 from datetime import datetime
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from models import PalmScan, PalmistryResult, PalmistryResponse
+from models import PalmScan, PalmistryResult, PalmistryResponse, PalmReadingOutput
+from services.blob_store import BlobStore
+from services.image_derivatives import generate_derivatives, VARIANTS
+from services.palm_features import extract_palm_features, build_preliminary_reading
+from services.cache import TTLCache
+from services.context_cache import invalidate_user_context
+from services.worker_pool import run_in_process
 import base64
-import uuid
-import os
 from dotenv import load_dotenv
-from emergentintegrations.llm.chat import LlmChat, UserMessage, ImageContent
+from services.llm_backends import llm_configured
+from services.llm_gateway import send_llm_message
+from services.json_extract import parse_llm_json, LlmJsonError
 import json
 
 load_dotenv()
 
+# Compact summaries of each session's latest palm reading; an empty dict
+# records that the session has no reading yet. Per process and only
+# invalidated locally, so the TTL bounds how long another worker can miss
+# a new reading; it mainly absorbs the burst of reads one page load makes
+# (summary, progress, chat context rebuild).
+latest_reading_cache = TTLCache("palm_latest_reading", max_size=10000, ttl_seconds=30)
+
 class PalmistryService:
     def __init__(self, db: AsyncIOMotorDatabase):
         self.db = db
+        self.blob_store = BlobStore(db, bucket_name="palm_images")
     
-    async def analyze_palm_scan(
+    async def create_palm_scan(
         self,
         user_session: str,
         user_id: Optional[str],
-        image_data: str
-    ) -> PalmistryResponse:
-        """Analyze palm scan image using AI vision analysis"""
+        image_data: str,
+        status: str = "queued"
+    ) -> Optional[PalmScan]:
+        """Validate and save a palm scan from a base64 data URL"""
+        
+        # Validate image data
+        if not image_data or not image_data.startswith('data:image') or ',' not in image_data:
+            return None
+        
+        header, base64_image = image_data.split(',', 1)
+        content_type = header[len('data:'):].split(';')[0]
         
         try:
-            # Validate image data
-            if not image_data or not image_data.startswith('data:image'):
-                return PalmistryResponse(
-                    success=False,
-                    analysis=None,
-                    message="Invalid image data provided"
-                )
-            
-            # Save palm scan
-            palm_scan = PalmScan(
-                user_session=user_session,
-                user_id=user_id,
-                image_data=image_data
+            image_bytes = base64.b64decode(base64_image)
+        except ValueError:
+            return None
+        
+        return await self.create_palm_scan_from_source(
+            user_session, user_id, image_bytes, content_type, status
+        )
+    
+    async def create_palm_scan_from_source(
+        self,
+        user_session: str,
+        user_id: Optional[str],
+        source: Union[bytes, str],
+        content_type: str,
+        status: str = "queued"
+    ) -> Optional[PalmScan]:
+        """Save a palm scan and its image derivatives so it can be analyzed by the job queue.
+
+        `source` is the image bytes or the path of a spooled upload; images are
+        only kept in the blob store, never as base64 on the scan document.
+        """
+        
+        # Resize and build previews off the event loop
+        try:
+            variants = await run_in_process(generate_derivatives, source, content_type)
+        except Exception as e:
+            print(f"Image processing failed: {str(e)}")
+            return None
+        
+        # Line measurements from the medium rendition; hints for the vision prompt
+        features = await self._extract_palm_features(variants["medium"]["data"])
+        
+        palm_scan = PalmScan(
+            user_session=user_session,
+            user_id=user_id,
+            features=features,
+            images={
+                name: {key: value for key, value in variant.items() if key != "data"}
+                for name, variant in variants.items()
+            },
+            status=status
+        )
+        
+        # Store every variant alongside the original in the blob store
+        for name, variant in variants.items():
+            await self.blob_store.put(
+                self._image_key(palm_scan.id, name),
+                variant["data"],
+                metadata={
+                    "user_session": user_session,
+                    "content_type": variant["content_type"],
+                    "etag": variant["etag"]
+                }
             )
+        
+        scan_dict = palm_scan.dict()
+        scan_dict['_id'] = scan_dict.pop('id')
+        await self.db.palm_scans.insert_one(scan_dict)
+        
+        return palm_scan
+    
+    async def open_scan_image(self, scan_id: str, variant: str, user_session: str):
+        """Open a stored scan image variant for streaming, if owned by the session"""
+        
+        if variant not in VARIANTS:
+            return None
+        
+        grid_out = await self.blob_store.open(self._image_key(scan_id, variant))
+        if grid_out is None or (grid_out.metadata or {}).get("user_session") != user_session:
+            return None
+        
+        return grid_out
+    
+    async def _load_scan_image(self, scan: Dict[str, Any]) -> Optional[bytes]:
+        """Load the image to analyze, from the blob store or a legacy data URL"""
+        
+        # Extracted features carry the fine line detail, so the vision
+        # model gets the medium rendition instead of the full original
+        if scan.get("images"):
+            variant = "medium" if scan.get("features") else "original"
+            return await self.blob_store.get(self._image_key(str(scan["_id"]), variant))
+        
+        image_data = scan.get("image_data")
+        if image_data:
+            return base64.b64decode(image_data.split(',', 1)[-1])
+        
+        return None
+    
+    @staticmethod
+    def _image_key(scan_id: str, variant: str) -> str:
+        return f"palm/{scan_id}/{variant}"
+    
+    async def process_palm_scan(self, scan_id: str) -> Optional[PalmistryResult]:
+        """Run AI analysis for a queued scan and record the outcome on the scan"""
+        
+        # Claim the scan atomically so it is only analyzed once
+        scan = await self.db.palm_scans.find_one_and_update(
+            {"_id": scan_id, "status": "queued"},
+            {"$set": {"status": "processing", "started_at": datetime.utcnow()}}
+        )
+        if not scan:
+            return None
+        
+        try:
+            image_bytes = await self._load_scan_image(scan)
+            if image_bytes is None:
+                raise Exception("Palm scan image not found")
             
-            scan_result = await self.db.palm_scans.insert_one(palm_scan.dict())
-            scan_id = str(scan_result.inserted_id)
-            
-            # Generate AI-powered palmistry analysis
-            analysis = await self._generate_ai_analysis(user_session, scan_id, image_data)
+            analysis = await self._generate_ai_analysis(
+                scan["user_session"], scan_id, image_bytes, scan.get("features")
+            )
             
-            return PalmistryResponse(
-                success=True,
-                analysis=analysis,
-                message="Palm analysis completed successfully"
+            await self.db.palm_scans.update_one(
+                {"_id": scan_id},
+                {"$set": {
+                    "status": "completed",
+                    "result_id": analysis.id,
+                    "confidence": analysis.confidence,
+                    "completed_at": datetime.utcnow()
+                }}
             )
+            await self._update_latest_reading(analysis, scan.get("user_id"))
+            return analysis
             
         except Exception as e:
-            return PalmistryResponse(
-                success=False,
-                analysis=None,
-                message=f"Palm analysis failed: {str(e)}"
+            await self.db.palm_scans.update_one(
+                {"_id": scan_id},
+                {"$set": {
+                    "status": "failed",
+                    "error": str(e),
+                    "completed_at": datetime.utcnow()
+                }}
             )
+            raise
     
-    async def _generate_ai_analysis(self, user_session: str, scan_id: str, image_data: str) -> PalmistryResult:
+    async def get_palm_scan_status(
+        self,
+        scan_id: str,
+        user_session: str
+    ) -> Optional[PalmistryResponse]:
+        """Get job status of a palm scan, including the analysis once completed"""
+        
+        scan = await self.db.palm_scans.find_one(
+            {"_id": scan_id, "user_session": user_session},
+            {"image_data": 0}
+        )
+        if not scan:
+            return None
+        
+        status = scan.get("status", "completed")
+        analysis = None
+        
+        if status == "completed":
+            doc = await self.db.palmistry_results.find_one({"scan_id": scan_id})
+            if doc:
+                doc.pop('_id', None)
+                analysis = PalmistryResult(**doc)
+        
+        messages = {
+            "awaiting_login": "Please log in to get your palm reading results. Your scan has been saved and will be analyzed after login.",
+            "queued": "Palm scan queued for analysis",
+            "processing": "Palm analysis in progress",
+            "completed": "Palm analysis completed successfully",
+            "failed": f"Palm analysis failed: {scan.get('error', 'Unknown error')}"
+        }
+        
+        preliminary = None
+        if analysis is None and scan.get("features"):
+            preliminary = build_preliminary_reading(scan["features"])
+        
+        return PalmistryResponse(
+            success=status not in ("failed", "awaiting_login"),
+            analysis=analysis,
+            message=messages.get(status, status),
+            scan_id=scan_id,
+            status=status,
+            preliminary=preliminary
+        )
+    
+    async def get_latest_reading(self, user_session: str) -> Optional[Dict[str, Any]]:
+        """Get a compact summary of the session's latest palm reading"""
+        
+        summary = latest_reading_cache.get(user_session)
+        if summary is None:
+            doc = await self.db.palm_latest_readings.find_one({"_id": user_session})
+            summary = doc["summary"] if doc else {}
+            latest_reading_cache.set(user_session, summary)
+        
+        return summary or None
+    
+    async def _update_latest_reading(self, analysis: PalmistryResult, user_id: Optional[str]):
+        """Point the session at its newest reading and cache the summary"""
+        
+        summary = {
+            "scan_id": analysis.scan_id,
+            "result_id": analysis.id,
+            "key_traits": analysis.personality_traits[:3],
+            "heart_line": analysis.heart_line.get("meaning", ""),
+            "head_line": analysis.head_line.get("meaning", ""),
+            "confidence": analysis.confidence,
+            "analysis_date": analysis.analysis_date
+        }
+        
+        await self.db.palm_latest_readings.replace_one(
+            {"_id": analysis.user_session},
+            {"user_id": user_id, "summary": summary, "updated_at": datetime.utcnow()},
+            upsert=True
+        )
+        latest_reading_cache.set(analysis.user_session, summary)
+        await invalidate_user_context(self.db, analysis.user_session)
+    
+    async def delete_latest_reading(self, user_session: str):
+        """Drop the session's latest-reading pointer and its cached summary"""
+        
+        await self.db.palm_latest_readings.delete_one({"_id": user_session})
+        latest_reading_cache.invalidate(user_session)
+    
+    async def delete_palm_data(self, user_session: str):
+        """Delete the session's scans, their stored images, readings and latest-reading pointer"""
+        
+        scans = await self.db.palm_scans.find({"user_session": user_session}, {"_id": 1}).to_list(length=None)
+        scan_ids = [str(scan["_id"]) for scan in scans]
+        for scan_id in scan_ids:
+            for variant in VARIANTS:
+                await self.blob_store.delete(self._image_key(scan_id, variant))
+        
+        await self.db.palmistry_results.delete_many({"user_session": user_session})
+        await self.db.palm_scans.delete_many({"user_session": user_session})
+        await self.delete_latest_reading(user_session)
+    
+    async def get_deferred_scan_ids(self, user_session: str) -> List[str]:
+        """Get ids of guest scans waiting for login before analysis"""
+        
+        cursor = self.db.palm_scans.find(
+            {"user_session": user_session, "status": "awaiting_login"},
+            {"_id": 1}
+        )
+        scans = await cursor.to_list(length=50)
+        return [str(scan["_id"]) for scan in scans]
+    
+    async def _generate_ai_analysis(
+        self,
+        user_session: str,
+        scan_id: str,
+        image_bytes: bytes,
+        features: Optional[Dict[str, Any]] = None
+    ) -> PalmistryResult:
         """Generate AI-powered palmistry analysis using vision model"""
         
         try:
-            # Get API key from environment
-            api_key = os.environ.get('EMERGENT_LLM_KEY')
-            if not api_key:
+            if not llm_configured():
                 raise Exception("EMERGENT_LLM_KEY not found in environment variables")
             
-            # Extract base64 from image data (remove data:image/jpeg;base64, prefix)
-            base64_image = image_data.split(',')[1] if ',' in image_data else image_data
-            
-            # Initialize AI chat with vision capabilities (using GPT-4o which supports vision)
-            chat = LlmChat(
-                api_key=api_key,
-                session_id=f"palmistry_{scan_id}",
-                system_message="""You are a professional palmist with decades of experience in palm reading and ancient divination arts. 
-                
-You analyze palm images with deep expertise in:
-- Major palm lines (life, heart, head, fate lines)
-- Palm mounts (Venus, Jupiter, Saturn, Apollo, Mercury)
-- Hand shapes and their meanings
-- Finger characteristics and nail analysis
-- Traditional palmistry interpretations combined with modern psychological insights
-
-Provide detailed, accurate, and insightful palm readings that offer both personality insights and life guidance. 
-Your analysis should be professional, empathetic, and constructive while maintaining mystical authenticity.
+            system_message = """You are an experienced, empathetic palmist. Read the major lines (life, heart, head, fate), mounts and hand shape, combining traditional palmistry with modern psychological insight.
 
-Return your analysis as a JSON object with this exact structure:
+Return only a JSON object with this exact structure:
 {
-    "life_line": {
-        "length": "long/medium/short",
-        "depth": "deep/medium/shallow", 
-        "meaning": "detailed interpretation",
-        "health_indicators": ["list of health insights"]
-    },
-    "heart_line": {
-        "curve": "straight/curved/moderate",
-        "ending": "description of where it ends",
-        "meaning": "detailed interpretation",
-        "relationship_traits": ["list of relationship insights"]
-    },
-    "head_line": {
-        "length": "long/medium/short",
-        "slope": "straight/curved/steep",
-        "meaning": "detailed interpretation", 
-        "cognitive_traits": ["list of thinking patterns"]
-    },
-    "fate_line": {
-        "presence": "clear/faint/absent",
-        "start_point": "description",
-        "meaning": "detailed interpretation",
-        "career_indicators": ["list of career insights"]
-    },
-    "personality_traits": ["list of 4-6 key personality insights"],
-    "life_predictions": ["list of 4-6 life guidance points"],
+    "life_line": {"length": "long/medium/short", "depth": "deep/medium/shallow", "meaning": "interpretation", "health_indicators": ["..."]},
+    "heart_line": {"curve": "straight/curved/moderate", "ending": "where it ends", "meaning": "interpretation", "relationship_traits": ["..."]},
+    "head_line": {"length": "long/medium/short", "slope": "straight/curved/steep", "meaning": "interpretation", "cognitive_traits": ["..."]},
+    "fate_line": {"presence": "clear/faint/absent", "start_point": "description", "meaning": "interpretation", "career_indicators": ["..."]},
+    "personality_traits": ["4-6 insights"],
+    "life_predictions": ["4-6 guidance points"],
     "confidence": 0.85
-}
-
-Analyze the palm image thoroughly and provide professional insights."""
-            ).with_model("openai", "gpt-4o")
+}"""
             
-            # Create image content for analysis
-            image_content = ImageContent(
-                image_base64=base64_image
-            )
+            # The only base64 copy of the image
+            image_base64 = base64.b64encode(image_bytes).decode()
             
-            # Create analysis message
-            analysis_message = UserMessage(
-                text="Please analyze this palm image in detail. Examine the major palm lines (life, heart, head, fate), mounts, hand shape, and any other significant features. Provide a comprehensive palmistry reading with personality insights and life guidance. Return the analysis as the specified JSON format.",
-                file_contents=[image_content]
-            )
+            prompt = "Analyze this palm image and return the JSON reading."
+            if features:
+                # Measured hints let the model work from a smaller image
+                hints = {
+                    "palm_detected": features.get("palm_detected"),
+                    "orientation": features.get("orientation", {}).get("axis"),
+                    "relative_line_strength": features.get("line_strength"),
+                    "lines_visible": features.get("lines_visible")
+                }
+                prompt += f" Measured hints (1.0 = average palm texture): {json.dumps(hints, separators=(',', ':'))}"
             
-            # Send to AI for analysis
-            response = await chat.send_message(analysis_message)
+            # Send to the vision model (routed to GPT-4o) for analysis
+            response = await send_llm_message(
+                "palm_reading", system_message, prompt,
+                session_id=f"palmistry_{scan_id}",
+                user_session=user_session,
+                images_base64=[image_base64]
+            )
             
-            # Parse the JSON response
             try:
-                # Extract JSON from response if it contains markdown formatting
-                response_text = response.strip()
-                if '```json' in response_text:
-                    json_start = response_text.find('```json') + 7
-                    json_end = response_text.find('```', json_start)
-                    response_text = response_text[json_start:json_end].strip()
-                elif '```' in response_text:
-                    json_start = response_text.find('```') + 3
-                    json_end = response_text.rfind('```')
-                    response_text = response_text[json_start:json_end].strip()
-                
-                analysis_data = json.loads(response_text)
+                analysis_data = parse_llm_json(response, PalmReadingOutput)
                 
                 # Create PalmistryResult with AI analysis
                 analysis = PalmistryResult(
                     user_session=user_session,
                     scan_id=scan_id,
-                    life_line=analysis_data.get("life_line", {}),
-                    heart_line=analysis_data.get("heart_line", {}),
-                    head_line=analysis_data.get("head_line", {}),
-                    fate_line=analysis_data.get("fate_line", {}),
-                    personality_traits=analysis_data.get("personality_traits", []),
-                    life_predictions=analysis_data.get("life_predictions", []),
-                    confidence=analysis_data.get("confidence", 0.8)
+                    **analysis_data
                 )
                 
-            except json.JSONDecodeError as e:
+            except LlmJsonError as e:
                 print(f"Error parsing AI response as JSON: {str(e)}")
                 print(f"AI Response: {response}")
                 
@@ -285,7 +467,8 @@ Analyze the palm image thoroughly and provide professional insights."""
             if user_id:
                 query["user_id"] = user_id
             
-            cursor = self.db.palm_scans.find(query).sort("created_at", -1)
+            # Full images are served separately, history only links to them
+            cursor = self.db.palm_scans.find(query, {"image_data": 0}).sort("created_at", -1)
             scans = await cursor.to_list(length=50)
             
             # Get corresponding analyses
@@ -299,9 +482,15 @@ Analyze the palm image thoroughly and provide professional insights."""
                 scan_id = str(scan["_id"])
                 analysis = next((a for a in analyses if a["scan_id"] == scan_id), None)
                 
+                image_urls = {
+                    name: f"/api/palmistry/image/{scan_id}/{name}?user_session={user_session}"
+                    for name in scan.get("images", {})
+                }
+                
                 results.append({
                     "scan": scan,
                     "analysis": analysis,
+                    "image_urls": image_urls,
                     "date": scan["created_at"]
                 })
             
@@ -322,24 +511,11 @@ Analyze the palm image thoroughly and provide professional insights."""
             "suggestions": []
         }
     
-    def _extract_palm_features(self, image_data: str) -> Dict[str, Any]:
-        """Extract palm features from image (placeholder for ML model)"""
+    async def _extract_palm_features(self, image_bytes: bytes) -> Dict[str, Any]:
+        """Extract palm features from image in the worker pool"""
         
-        # Mock feature extraction - in production would use ML model
-        return {
-            "palm_detected": True,
-            "hand_orientation": "right",
-            "lines_visible": {
-                "life_line": True,
-                "heart_line": True,
-                "head_line": True,
-                "fate_line": True
-            },
-            "mounts_detected": {
-                "venus": True,
-                "jupiter": True,
-                "saturn": True,
-                "apollo": True,
-                "mercury": True
-            }
-        }
\ No newline at end of file
+        try:
+            return await run_in_process(extract_palm_features, image_bytes)
+        except Exception as e:
+            print(f"Palm feature extraction failed: {str(e)}")
+            return {}
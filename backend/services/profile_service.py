@@ -3,6 +3,10 @@ from datetime import datetime, date
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from services.ai_service import AIService
 from services.test_service import TestScoringService
+from services.palmistry_service import PalmistryService
+from services.context_cache import invalidate_user_context
+from services.conversation_memory import ConversationMemory
+from services.llm_usage import usage_recorder
 from models import TestResult, UnifiedProfile, DailyContent
 
 class ProfileService:
@@ -10,6 +14,7 @@ class ProfileService:
         self.db = db
         self.ai_service = AIService()
         self.scoring_service = TestScoringService()
+        self.palmistry_service = PalmistryService(db)
     
     async def get_user_test_results(self, user_session: str, user_id: Optional[str] = None) -> List[TestResult]:
         """Get all test results for a user session"""
@@ -32,6 +37,7 @@ class ProfileService:
             result_dict = test_result.dict()
             result_dict['_id'] = result_dict.pop('id')
             await self.db.test_results.insert_one(result_dict)
+            await invalidate_user_context(self.db, test_result.user_session)
             return True
         except Exception as e:
             print(f"Error saving test result: {str(e)}")
@@ -41,7 +47,8 @@ class ProfileService:
         self, 
         user_session: str, 
         user_goals: Optional[str] = None,
-        regenerate: bool = False
+        regenerate: bool = False,
+        is_premium: bool = False
     ) -> Dict[str, Any]:
         """Generate or retrieve unified personality profile"""
         
@@ -49,6 +56,7 @@ class ProfileService:
         if not regenerate:
             existing_profile = await self.get_unified_profile(user_session)
             if existing_profile:
+                usage_recorder.record_cache_hit("profile_synthesis", user_session)
                 return {
                     "success": True,
                     "profile": existing_profile,
@@ -79,9 +87,20 @@ class ProfileService:
                 "completed_at": result.completed_at.isoformat()
             })
         
+        # Include the latest palm reading as an esoteric data point
+        palm_reading = await self.palmistry_service.get_latest_reading(user_session)
+        if palm_reading:
+            test_data.append({
+                "test_id": "palmistry",
+                "result_type": "Palm reading (entertainment)",
+                "confidence": palm_reading["confidence"],
+                "raw_score": {"key_traits": palm_reading["key_traits"]},
+                "completed_at": palm_reading["analysis_date"].isoformat()
+            })
+        
         # Generate AI synthesis
         ai_response = await self.ai_service.synthesize_personality_profile(
-            test_data, user_session, user_goals
+            test_data, user_session, user_goals, is_premium
         )
         
         if not ai_response["success"]:
@@ -137,6 +156,7 @@ class ProfileService:
             profile_dict = profile.dict()
             profile_dict['_id'] = profile_dict.pop('id')
             await self.db.unified_profiles.insert_one(profile_dict)
+            await invalidate_user_context(self.db, profile.user_session)
             return True
         except Exception as e:
             print(f"Error saving unified profile: {str(e)}")
@@ -156,6 +176,7 @@ class ProfileService:
         # Check if content already exists for this date
         existing_content = await self.get_daily_content(user_session, target_date)
         if existing_content:
+            usage_recorder.record_cache_hit("daily_content", user_session)
             return {
                 "success": True,
                 "content": existing_content,
@@ -211,6 +232,14 @@ class ProfileService:
             return DailyContent(**doc)
         return None
     
+    async def get_daily_content_id(self, user_session: str, target_date: str) -> Optional[str]:
+        """Id of the stored daily content for a date, without loading it"""
+        doc = await self.db.daily_content.find_one(
+            {"user_session": user_session, "date": target_date},
+            {"_id": 1}
+        )
+        return str(doc["_id"]) if doc else None
+    
     async def save_daily_content(self, content: DailyContent) -> bool:
         """Save daily content to database"""
         try:
@@ -314,9 +343,10 @@ class ProfileService:
         
         return {
             "user_session": user_session,
-            "test_results": [result.dict() for result in test_results],
-            "unified_profile": profile.dict() if profile else None,
-            "daily_content_history": [content.dict() for content in daily_content],
+            # Models are dumped when the response renders
+            "test_results": test_results,
+            "unified_profile": profile,
+            "daily_content_history": daily_content,
             "export_date": datetime.utcnow().isoformat()
         }
     
@@ -326,6 +356,12 @@ class ProfileService:
             await self.db.test_results.delete_many({"user_session": user_session})
             await self.db.unified_profiles.delete_many({"user_session": user_session})
             await self.db.daily_content.delete_many({"user_session": user_session})
+            # Scans, their images in GridFS and readings, plus the latest-reading
+            # pointer that chat context, profile synthesis and progress read
+            await self.palmistry_service.delete_palm_data(user_session)
+            # Otherwise the rolling summary returns in the next chat prompt
+            await ConversationMemory(self.db).clear(user_session)
+            await invalidate_user_context(self.db, user_session)
             return True
         except Exception as e:
             print(f"Error deleting user data: {str(e)}")
@@ -0,0 +1,181 @@
+"""
+On-demand profiling of the running worker
+
+- CPU: a sampling profiler. A background thread reads every thread's
+  stack (sys._current_frames) at a fixed rate and counts identical stacks,
+  producing collapsed-stack output that flamegraph.pl, speedscope and
+  inferno read directly. Nothing is instrumented, so overhead stays at
+  one stack walk per thread per sample.
+- Memory: tracemalloc snapshots taken before and after the window,
+  compared per allocation site.
+
+Only one profile runs at a time per worker.
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+DEFAULT_INTERVAL_MS = 5
+MAX_PROFILE_SECONDS = 60
+TRACEMALLOC_FRAMES = int(os.environ.get('TRACEMALLOC_FRAMES', '10'))
+
+APP_ROOT = str(Path(__file__).resolve().parent.parent)
+
+# A thread whose innermost frame is in one of these is waiting, not working
+IDLE_MODULES = {"threading.py", "queue.py", "selectors.py", "socket.py", "ssl.py"}
+
+_profiling = asyncio.Lock()
+
+def profiling_in_progress() -> bool:
+    return _profiling.locked()
+
+def _short_path(filename: str) -> str:
+    if filename.startswith(APP_ROOT):
+        return os.path.relpath(filename, APP_ROOT)
+    # .../site-packages/starlette/routing.py -> starlette/routing.py
+    marker = "site-packages" + os.sep
+    index = filename.rfind(marker)
+    if index != -1:
+        return filename[index + len(marker):]
+    # Standard library
+    return os.path.basename(filename)
+
+class SamplingProfiler:
+    """Collapsed stacks sampled from every thread but its own"""
+
+    def __init__(self, interval_ms: float = DEFAULT_INTERVAL_MS, include_idle: bool = False):
+        self.interval = interval_ms / 1000
+        self.include_idle = include_idle
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.started = 0.0
+        self.elapsed = 0.0
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # Labels per code object, so repeated frames aren't reformatted
+        self._labels: Dict[Any, str] = {}
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread:
+            self._thread.join()
+        self.elapsed = time.perf_counter() - self.started
+
+    def _label(self, frame) -> str:
+        code = frame.f_code
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+        return label
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stopping.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                if not self.include_idle and os.path.basename(frame.f_code.co_filename) in IDLE_MODULES:
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(self._label(frame))
+                    frame = frame.f_back
+                labels.append(names.get(thread_id, str(thread_id)))
+                self.stacks[";".join(reversed(labels))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        """One "root;...;leaf count" line per distinct stack"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def top_functions(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Functions by samples spent in them (self) and under them (total)"""
+        own: Counter = Counter()
+        total: Counter = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")[1:]
+            own[frames[-1]] += count
+            for label in set(frames):
+                total[label] += count
+        seen = sum(self.stacks.values()) or 1
+        return [
+            {
+                "function": label,
+                "self_pct": round(100 * own[label] / seen, 1),
+                "total_pct": round(100 * total[label] / seen, 1)
+            }
+            for label, _ in own.most_common(limit)
+        ]
+
+async def profile_cpu(seconds: float, interval_ms: float = DEFAULT_INTERVAL_MS, include_idle: bool = False) -> SamplingProfiler:
+    """Sample every thread of this worker for `seconds`"""
+    async with _profiling:
+        profiler = SamplingProfiler(interval_ms, include_idle)
+        profiler.start()
+        try:
+            await asyncio.sleep(min(seconds, MAX_PROFILE_SECONDS))
+        finally:
+            profiler.stop()
+        return profiler
+
+def _allocation_stats(stats: List[tracemalloc.StatisticDiff], limit: int) -> List[Dict[str, Any]]:
+    rows = []
+    for stat in stats[:limit]:
+        frame = stat.traceback[0]
+        rows.append({
+            "site": f"{_short_path(frame.filename)}:{frame.lineno}",
+            "size_kb": round(stat.size / 1024, 1),
+            "size_diff_kb": round(stat.size_diff / 1024, 1),
+            "count": stat.count,
+            "count_diff": stat.count_diff,
+            "traceback": [f"{_short_path(f.filename)}:{f.lineno}" for f in stat.traceback]
+        })
+    return rows
+
+def _snapshot() -> tracemalloc.Snapshot:
+    """Current traces, without the profiler's own and import machinery's"""
+    return tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap*>")
+    ])
+
+async def profile_allocations(seconds: float, limit: int = 25, group_by: str = "lineno") -> Dict[str, Any]:
+    """Allocation growth per site over `seconds` (tracemalloc)"""
+    async with _profiling:
+        # Tracing slows allocation noticeably, so only while profiling
+        # unless it was already on (PYTHONTRACEMALLOC)
+        started_here = not tracemalloc.is_tracing()
+        if started_here:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        try:
+            # Snapshots walk every traced allocation; on a loaded process that
+            # takes long enough to stall the loop, so they run in a thread
+            before = await asyncio.to_thread(_snapshot)
+            await asyncio.sleep(min(seconds, MAX_PROFILE_SECONDS))
+            after = await asyncio.to_thread(_snapshot)
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            if started_here:
+                tracemalloc.stop()
+
+        stats = await asyncio.to_thread(after.compare_to, before, group_by)
+        return {
+            "traced_kb": round(current / 1024, 1),
+            "peak_kb": round(peak / 1024, 1),
+            "growth_kb": round(sum(stat.size_diff for stat in stats) / 1024, 1),
+            # Already tracing: sizes include everything since tracing began
+            "tracing_was_on": not started_here,
+            "top": _allocation_stats(stats, limit)
+        }
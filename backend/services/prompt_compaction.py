@@ -0,0 +1,141 @@
+"""
+Prompt compaction for profile synthesis
+
+Test results carry everything the scorers produce: answer counts, birth
+data and, for premium tests, the whole `analysis` dict. The synthesis
+prompt only needs each test's result type, confidence and most telling
+dimensions, so results are reduced to that, serialized as compact JSON and
+trimmed further if they still exceed the token budget.
+
+A dimension is telling when it sits far from its scale's midpoint, so a
+very low score counts as much as a very high one. Short tests (Big Five,
+DISC, MBTI's four axes) and numerology's core numbers are never trimmed.
+"""
+import json
+import statistics
+from typing import Any, Dict, List, Optional, Tuple
+from services.tokens import estimate_tokens, truncate_to_tokens
+
+# Scorer output that is either repeated elsewhere or not useful to the model
+DROPPED_KEYS = {"analysis", "birth_data", "error"}
+
+# Dimensions kept per test, most telling first
+MAX_DIMENSIONS = 8
+
+# Dimensions kept per test when over budget
+MIN_DIMENSIONS = 3
+
+# Tests with this many dimensions or fewer are always kept whole
+SHORT_TEST_DIMENSIONS = 5
+
+# Premium scorers report every dimension on a 0-100 scale; the count-based
+# tests (MBTI, DISC, Enneagram) are compared against their own mean instead
+PERCENT_SCALE_TESTS = {"bigFive", "values", "riasec", "darkTriad", "grit", "chronotype"}
+
+# Opposite poles scored separately; ranked by how decisive the axis is and
+# kept together, so a weak pole stays next to its strong one
+PAIRED_POLES = {"mbti": (("E", "I"), ("S", "N"), ("T", "F"), ("J", "P"))}
+
+# Numbers that are identifiers rather than scores: magnitude means nothing
+UNRANKED_TESTS = {"numerology"}
+
+# Longest string value kept (e.g. Human Design authority, palm traits)
+MAX_TEXT_TOKENS = 20
+
+def _to_json(data: Any) -> str:
+    return json.dumps(data, separators=(",", ":"), default=str)
+
+def _ranked_dimensions(numbers: Dict[str, Any], test_id: Optional[str]) -> List[List[str]]:
+    """Dimension groups (a key, or an MBTI pole pair), most telling first"""
+
+    pairs = PAIRED_POLES.get(test_id, ())
+    paired = {key for pair in pairs for key in pair}
+    groups = [[key for key in pair if key in numbers] for pair in pairs]
+    groups = [group for group in groups if group]
+    groups += [[key] for key in numbers if key not in paired]
+
+    if test_id in UNRANKED_TESTS:
+        return groups
+
+    midpoint = 50 if test_id in PERCENT_SCALE_TESTS else statistics.mean(numbers.values())
+
+    def salience(group: List[str]) -> float:
+        if len(group) == 2:
+            return abs(numbers[group[0]] - numbers[group[1]])
+        return abs(numbers[group[0]] - midpoint)
+
+    return sorted(groups, key=salience, reverse=True)
+
+def compact_scores(raw_score: Dict[str, Any], max_dimensions: int = MAX_DIMENSIONS, test_id: Optional[str] = None) -> Dict[str, Any]:
+    """Most telling numeric dimensions (rounded) plus short text fields"""
+
+    numbers = {}
+    texts = {}
+    for key, value in raw_score.items():
+        if key in DROPPED_KEYS or value is None:
+            continue
+        if isinstance(value, bool):
+            texts[key] = value
+        elif isinstance(value, (int, float)):
+            numbers[key] = round(value, 2) if isinstance(value, float) else value
+        elif isinstance(value, str):
+            texts[key] = truncate_to_tokens(value, MAX_TEXT_TOKENS)
+        elif isinstance(value, list):
+            texts[key] = [truncate_to_tokens(str(item), MAX_TEXT_TOKENS) for item in value[:3]]
+
+    if not numbers:
+        return texts
+
+    groups = _ranked_dimensions(numbers, test_id)
+    if len(groups) > SHORT_TEST_DIMENSIONS and test_id not in UNRANKED_TESTS:
+        groups = groups[:max_dimensions]
+    kept = {key: numbers[key] for group in groups for key in group}
+    return {**kept, **texts}
+
+def compact_test_result(result: Dict[str, Any], max_dimensions: int = MAX_DIMENSIONS) -> Dict[str, Any]:
+    compact = {
+        "test": result.get("test_id"),
+        "type": result.get("result_type"),
+        "confidence": round(result.get("confidence", 0.7), 2)
+    }
+    scores = compact_scores(result.get("raw_score") or {}, max_dimensions, result.get("test_id"))
+    # Human Design repeats its type in the scores
+    scores = {key: value for key, value in scores.items() if value != compact["type"]}
+    if scores:
+        compact["scores"] = scores
+    return compact
+
+def compact_test_results(test_results: List[Dict[str, Any]], max_tokens: int) -> Tuple[str, List[str]]:
+    """Compact JSON for the synthesis prompt within max_tokens.
+
+    Over budget, results are trimmed in steps: fewer dimensions per test,
+    then scores dropped (numerology's numbers are the result, so they stay)
+    and finally whole tests removed, lowest confidence first (the most confident test is always kept). Returns the JSON and
+    the ids of tests that were left out.
+    """
+
+    # Most confident first, so trimming works from the end
+    ordered = sorted(test_results, key=lambda r: r.get("confidence", 0.0), reverse=True)
+    compact = [compact_test_result(r) for r in ordered]
+
+    text = _to_json(compact)
+    if estimate_tokens(text) <= max_tokens:
+        return text, []
+
+    compact = [compact_test_result(r, MIN_DIMENSIONS) for r in ordered]
+    text = _to_json(compact)
+
+    for entry in reversed(compact):
+        if estimate_tokens(text) <= max_tokens:
+            return text, []
+        if entry["test"] in UNRANKED_TESTS:
+            continue
+        entry.pop("scores", None)
+        text = _to_json(compact)
+
+    dropped = []
+    while len(compact) > 1 and estimate_tokens(text) > max_tokens:
+        dropped.append(compact.pop()["test"])
+        text = _to_json(compact)
+
+    return text, dropped
@@ -0,0 +1,123 @@
+"""
+Quick-question suggestions for the chat screen
+
+Suggestions depend only on the user's archetype: MBTI type, Enneagram type
+and whether a unified profile exists. The full table is small (17 x 10 x 2
+keys), so it is built once at startup, optionally enriched with question
+sets written by the offline batch job (generate_quick_questions.py) and
+then served by dictionary lookup.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+MBTI_TYPES = [
+    "INTJ", "INTP", "ENTJ", "ENTP", "INFJ", "INFP", "ENFJ", "ENFP",
+    "ISTJ", "ISFJ", "ESTJ", "ESFJ", "ISTP", "ISFP", "ESTP", "ESFP"
+]
+
+ENNEAGRAM_TYPES = [str(n) for n in range(1, 10)]
+
+MAX_QUESTIONS = 8
+
+# Shown before any test has been taken
+ONBOARDING_QUESTIONS = [
+    "What personality test should I take first?",
+    "How can I better understand myself?",
+    "What are the benefits of personality assessments?",
+    "How do I start my self-discovery journey?"
+]
+
+ArchetypeKey = Tuple[Optional[str], Optional[str], bool]
+
+_table: Dict[ArchetypeKey, List[str]] = {}
+
+def archetype_key(context: Dict[str, Any]) -> ArchetypeKey:
+    """Archetype key for a chat context (see ChatService.get_user_context_with_summary)"""
+    mbti = context.get("mbti", {}).get("type")
+    enneagram = context.get("enneagram", {}).get("type")
+    return (
+        str(mbti).upper() if mbti else None,
+        str(enneagram) if enneagram else None,
+        "unified_profile" in context
+    )
+
+def key_to_id(key: ArchetypeKey) -> str:
+    """Document id for a key in the quick_question_sets collection, e.g. "INTJ|5|1" """
+    mbti, enneagram, has_profile = key
+    return f"{mbti or '-'}|{enneagram or '-'}|{int(has_profile)}"
+
+def id_to_key(doc_id: str) -> ArchetypeKey:
+    mbti, enneagram, has_profile = doc_id.split("|")
+    return (None if mbti == "-" else mbti, None if enneagram == "-" else enneagram, has_profile == "1")
+
+def all_archetype_keys() -> List[ArchetypeKey]:
+    return [
+        (mbti, enneagram, has_profile)
+        for mbti in MBTI_TYPES + [None]
+        for enneagram in ENNEAGRAM_TYPES + [None]
+        for has_profile in (False, True)
+    ]
+
+def build_default_questions(key: ArchetypeKey) -> List[str]:
+    """Rule-based suggestions for an archetype (for users with at least one result)"""
+
+    mbti, enneagram, has_profile = key
+    questions = []
+
+    if mbti:
+        questions.append(f"How can I use my {mbti} personality type in my career?")
+        questions.append("What are the best ways to communicate with other personality types?")
+
+    if enneagram:
+        questions.append(f"How can I grow as an Enneagram Type {enneagram}?")
+        questions.append("What are healthy ways to manage my core fears?")
+
+    if has_profile:
+        questions.append("How can I leverage my unique combination of traits?")
+        questions.append("What specific steps should I take for personal growth?")
+        questions.append("How can I become more of a 'superhuman' version of myself?")
+
+    questions.extend([
+        "What meditation practices work best for my personality?",
+        "How can I improve my relationships based on my personality?",
+        "What career paths align with my personality profile?"
+    ])
+
+    return questions[:MAX_QUESTIONS]
+
+async def load_quick_questions(db: Optional[AsyncIOMotorDatabase] = None) -> int:
+    """Build the suggestion table; stored question sets override the defaults.
+
+    Returns the number of enriched archetypes.
+    """
+
+    table = {key: build_default_questions(key) for key in all_archetype_keys()}
+
+    enriched = 0
+    if db is not None:
+        try:
+            async for doc in db.quick_question_sets.find({}):
+                questions = [q for q in doc.get("questions", []) if isinstance(q, str) and q.strip()]
+                if questions:
+                    table[id_to_key(doc["_id"])] = questions[:MAX_QUESTIONS]
+                    enriched += 1
+        except Exception as e:
+            print(f"Error loading quick question sets: {str(e)}")
+
+    _table.clear()
+    _table.update(table)
+    return enriched
+
+def get_quick_questions(context: Dict[str, Any]) -> List[str]:
+    """Suggestions for a chat context"""
+
+    if not context:
+        return ONBOARDING_QUESTIONS
+
+    key = archetype_key(context)
+    questions = _table.get(key)
+    if questions is None:
+        # Types outside the known lists (or a table not loaded yet)
+        questions = build_default_questions(key)
+        _table[key] = questions
+    return questions
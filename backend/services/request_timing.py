@@ -0,0 +1,156 @@
+"""
+Per-request timing
+
+RequestTimingMiddleware gives every HTTP request a timing context; code
+anywhere below it adds time to named stages with `timed("stage")`:
+
+- db: every MongoDB command, via a pymongo command listener
+- llm: LLM gateway calls, retries and hedges included
+- scoring: test scoring
+- render: JSON response rendering (FastJSONResponse)
+
+The breakdown is logged as one JSON line for a sample of requests and for
+every slow one, and can be returned in a Server-Timing header (visible in
+browser dev tools). The header exposes internal timings to every client,
+so it is off unless enabled for a debugging or staging deployment. Stage
+times can overlap when work runs concurrently.
+
+    REQUEST_TIMING_HEADER       send Server-Timing (default 0)
+    REQUEST_TIMING_SAMPLE_RATE  fraction of requests logged (default 0.01)
+    REQUEST_TIMING_SLOW_MS      always log requests slower than this (default 2000)
+"""
+import json
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+from pymongo import monitoring
+
+logger = logging.getLogger("request_timing")
+
+SEND_HEADER = os.environ.get('REQUEST_TIMING_HEADER', '0') == '1'
+SAMPLE_RATE = float(os.environ.get('REQUEST_TIMING_SAMPLE_RATE', '0.01'))
+SLOW_REQUEST_MS = float(os.environ.get('REQUEST_TIMING_SLOW_MS', '2000'))
+
+class RequestTiming:
+    """Time spent per stage during one request"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        # Set once the response is sent; background tasks don't count
+        self.finished = False
+        # DB events are published from Motor's executor threads
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, ms: float):
+        with self._lock:
+            if self.finished:
+                return
+            self.stages[stage] = self.stages.get(stage, 0.0) + ms
+            self.counts[stage] = self.counts.get(stage, 0) + 1
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def server_timing(self, total_ms: float) -> str:
+        entries = [
+            f'{stage};dur={ms:.1f};desc="{self.counts[stage]}x"'
+            for stage, ms in self.stages.items()
+        ]
+        entries.append(f"total;dur={total_ms:.1f}")
+        return ", ".join(entries)
+
+_current: ContextVar[Optional[RequestTiming]] = ContextVar("request_timing", default=None)
+
+def current_timing() -> Optional[RequestTiming]:
+    return _current.get()
+
+@contextmanager
+def timed(stage: str):
+    """Add the time spent in the block to a stage of the current request"""
+    timing = _current.get()
+    if timing is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.add(stage, (time.perf_counter() - started) * 1000)
+
+class _CommandTimer(monitoring.CommandListener):
+    """Attributes MongoDB command time to the request that issued it"""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._record(event)
+
+    def failed(self, event):
+        self._record(event)
+
+    def _record(self, event):
+        # Motor runs commands in a thread with a copy of the caller's context
+        timing = _current.get()
+        if timing is not None:
+            timing.add("db", event.duration_micros / 1000)
+
+# Listeners only apply to clients created after registration
+monitoring.register(_CommandTimer())
+
+class RequestTimingMiddleware:
+    """ASGI middleware: timing context, Server-Timing header and sampled logs"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timing = RequestTiming()
+        token = _current.set(timing)
+        status = 500
+        total_ms: Optional[float] = None
+
+        async def send_with_timing(message):
+            nonlocal status, total_ms
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if SEND_HEADER:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", timing.server_timing(timing.elapsed_ms()).encode()))
+                    message = {**message, "headers": headers}
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                total_ms = timing.elapsed_ms()
+                timing.finished = True
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            if total_ms is None:
+                total_ms = timing.elapsed_ms()
+            if total_ms >= SLOW_REQUEST_MS or random.random() < SAMPLE_RATE:
+                self._log(scope, status, total_ms, timing)
+
+    def _log(self, scope, status: int, total_ms: float, timing: RequestTiming):
+        route = scope.get("route")
+        logger.info(json.dumps({
+            "event": "request_timing",
+            "method": scope["method"],
+            "route": getattr(route, "path", None) or scope["path"],
+            "status": status,
+            "duration_ms": round(total_ms, 1),
+            "stages_ms": {stage: round(ms, 1) for stage, ms in timing.stages.items()},
+            "stage_counts": timing.counts
+        }))
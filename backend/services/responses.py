@@ -0,0 +1,97 @@
+"""
+Fast JSON responses
+
+FastJSONResponse renders with orjson, which serializes datetimes, UUIDs,
+enums and non-string keys natively and falls back to `model_dump()` for
+pydantic models, so handlers can hand it models or Mongo documents
+without converting them first.
+
+It is the app's default response class, but FastAPI still validates
+whatever a handler returns against its `response_model` and runs
+jsonable_encoder over it before rendering. Handlers skip both by
+returning a FastJSONResponse themselves: endpoints with plain dict
+payloads (history, export) build one directly, and `response_model`
+routes hand their already-built model to `model_response`.
+
+Content that never changes once stored (a generated profile, a day's
+content) is served with a strong ETag; `not_modified` lets the handler
+answer If-None-Match with a 304 before building the response.
+"""
+import hashlib
+from decimal import Decimal
+from typing import Any, Optional
+import orjson
+from bson import ObjectId
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from services.compression import strip_encoding
+from services.request_timing import timed
+
+def _default(obj: Any) -> Any:
+    """Types orjson doesn't serialize natively"""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+class FastJSONResponse(JSONResponse):
+    """orjson-rendered JSONResponse that records rendering time"""
+
+    def render(self, content: Any) -> bytes:
+        with timed("render"):
+            return dumps(content)
+
+def model_response(model: BaseModel, response: Optional[Response] = None) -> FastJSONResponse:
+    """Send a response model as built, without FastAPI's validate-and-encode pass.
+
+    Headers, cookies and status set on the injected `response` are carried
+    over; FastAPI ignores them once a handler returns its own Response.
+    """
+    rendered = FastJSONResponse(model)
+    if response is not None:
+        rendered.raw_headers.extend(
+            (name, value) for name, value in response.raw_headers if name != b"content-length"
+        )
+        if response.status_code:
+            rendered.status_code = response.status_code
+    return rendered
+
+# Bump when the shape of ETag-cached responses changes, so clients refetch
+ETAG_VERSION = "1"
+
+# Per-user content: clients may keep it but must revalidate
+CACHE_CONTROL = "private, no-cache"
+
+def make_etag(*parts: Any) -> str:
+    """Strong ETag from whatever identifies the representation"""
+    key = "|".join([ETAG_VERSION, *(str(part) for part in parts)])
+    return '"' + hashlib.sha1(key.encode()).hexdigest()[:20] + '"'
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison; the encoding suffix added by
+    # CompressionMiddleware names the same content
+    return any(
+        strip_encoding(tag.strip().removeprefix("W/")) == etag
+        for tag in if_none_match.split(",")
+    )
+
+def not_modified(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """Tag the response; a 304 to return instead when the client is current"""
+    if _matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return None
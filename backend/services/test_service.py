@@ -1,6 +1,7 @@
 from typing import Dict, Any, Tuple
 import json
 from .premium_test_service import PremiumTestScoringService
+from .request_timing import timed
 
 class TestScoringService:
     """Service for scoring personality tests and determining result types"""
@@ -160,6 +161,7 @@ class TestScoringService:
         return result_type, scores, confidence
     
     @staticmethod
+    @timed("scoring")
     def score_test_comprehensive(test_id: str, answers: Dict[str, Any]) -> Tuple[str, Dict[str, Any], float]:
         """Score any test (regular or premium) and return results"""
         
@@ -0,0 +1,26 @@
+"""
+Token estimation helpers
+
+The upstream tokenizer isn't available locally, so prompts are budgeted with
+the usual ~4 characters per token approximation for English text.
+"""
+
+CHARS_PER_TOKEN = 4
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of a piece of text"""
+    if not text:
+        return 0
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+def truncate_to_tokens(text: str, max_tokens: int, marker: str = "...") -> str:
+    """Cut text to roughly max_tokens, preferring a word boundary"""
+    if max_tokens <= 0:
+        return ""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars - len(marker)]
+    if " " in cut:
+        cut = cut.rsplit(" ", 1)[0]
+    return cut + marker
@@ -0,0 +1,151 @@
+"""
+Streaming multipart uploads
+
+Parses a multipart request body chunk by chunk and spools the file part to
+memory up to a threshold, then to a temporary file on disk, enforcing a hard
+size limit while the body is still arriving. Unlike FastAPI's UploadFile
+this never needs the whole body in memory and rejects oversized uploads
+without buffering them first.
+"""
+import asyncio
+import os
+import tempfile
+from io import BytesIO
+from typing import Optional, Union
+from fastapi import Request
+import multipart
+from multipart.multipart import parse_options_header
+
+class UploadTooLargeError(Exception):
+    """Raised when an upload exceeds the configured size limit"""
+
+class InvalidUploadError(Exception):
+    """Raised when the request body is not a usable multipart upload"""
+
+class SpooledUpload:
+    """File part buffered in memory up to `memory_bytes`, then on disk"""
+
+    def __init__(self, max_bytes: int, memory_bytes: int):
+        self.max_bytes = max_bytes
+        self.memory_bytes = memory_bytes
+        self.size = 0
+        self.content_type: Optional[str] = None
+        self.filename: Optional[str] = None
+        self._buffer: Optional[BytesIO] = BytesIO()
+        self._file = None
+
+    @property
+    def on_disk(self) -> bool:
+        return self._file is not None
+
+    async def write(self, data: bytes):
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            raise UploadTooLargeError(f"Upload exceeds {self.max_bytes} bytes")
+
+        if self._file is None and self.size > self.memory_bytes:
+            # Roll over to disk; a named file lets worker processes open it directly
+            self._file = tempfile.NamedTemporaryFile(prefix="upload_", delete=False)
+            self._file.write(self._buffer.getbuffer())
+            self._buffer = None
+
+        if self._file is not None:
+            await asyncio.to_thread(self._file.write, data)
+        else:
+            self._buffer.write(data)
+
+    def source(self) -> Union[bytes, str]:
+        """Bytes for small uploads, or a file path once spooled to disk"""
+        if self._file is not None:
+            self._file.flush()
+            return self._file.name
+        return self._buffer.getvalue()
+
+    def close(self):
+        """Release the buffer and remove any temporary file"""
+        if self._file is not None:
+            self._file.close()
+            try:
+                os.unlink(self._file.name)
+            except OSError:
+                pass
+            self._file = None
+        self._buffer = None
+
+async def spool_multipart_file(
+    request: Request,
+    field_name: str = "file",
+    max_bytes: int = 10 * 1024 * 1024,
+    memory_bytes: int = 1024 * 1024
+) -> SpooledUpload:
+    """Stream the named file field of a multipart request into a SpooledUpload"""
+
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes + 64 * 1024:
+        raise UploadTooLargeError(f"Upload exceeds {max_bytes} bytes")
+
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise InvalidUploadError("Expected a multipart/form-data body")
+
+    upload = SpooledUpload(max_bytes, memory_bytes)
+    state = {"headers": {}, "header_name": b"", "header_value": b"", "target": False, "found": False}
+    pending = []
+
+    def on_part_begin():
+        state["headers"] = {}
+        state["target"] = False
+
+    def on_header_field(data: bytes, start: int, end: int):
+        state["header_name"] += data[start:end]
+
+    def on_header_value(data: bytes, start: int, end: int):
+        state["header_value"] += data[start:end]
+
+    def on_header_end():
+        state["headers"][state["header_name"].lower()] = state["header_value"]
+        state["header_name"] = b""
+        state["header_value"] = b""
+
+    def on_headers_finished():
+        _, options = parse_options_header(state["headers"].get(b"content-disposition", b""))
+        if options.get(b"name", b"").decode("latin-1") == field_name and b"filename" in options and not state["found"]:
+            state["target"] = True
+            state["found"] = True
+            upload.filename = options[b"filename"].decode("utf-8", "replace")
+            upload.content_type = state["headers"].get(b"content-type", b"application/octet-stream").decode("latin-1")
+
+    def on_part_data(data: bytes, start: int, end: int):
+        if state["target"]:
+            pending.append(data[start:end])
+
+    callbacks = {
+        "on_part_begin": on_part_begin,
+        "on_part_data": on_part_data,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+    }
+
+    parser = multipart.MultipartParser(boundary, callbacks)
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            for data in pending:
+                await upload.write(data)
+            pending.clear()
+        parser.finalize()
+    except UploadTooLargeError:
+        upload.close()
+        raise
+    except Exception as e:
+        upload.close()
+        raise InvalidUploadError(f"Malformed multipart body: {str(e)}")
+
+    if not state["found"]:
+        upload.close()
+        raise InvalidUploadError(f"Missing file field '{field_name}'")
+
+    return upload
@@ -0,0 +1,29 @@
+import asyncio
+import functools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Optional
+
+# Shared process pool for CPU-bound work (image processing) that would
+# otherwise block the event loop
+_pool: Optional[ProcessPoolExecutor] = None
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Get the shared process pool, creating it on first use"""
+    global _pool
+    if _pool is None:
+        max_workers = int(os.environ.get('CPU_WORKERS', str(min(4, os.cpu_count() or 1))))
+        _pool = ProcessPoolExecutor(max_workers=max_workers)
+    return _pool
+
+async def run_in_process(fn: Callable, *args, **kwargs) -> Any:
+    """Run a picklable top-level function in the shared process pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_process_pool(), functools.partial(fn, *args, **kwargs))
+
+def shutdown_process_pool():
+    """Shut down the shared process pool"""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None